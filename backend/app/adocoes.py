@@ -0,0 +1,83 @@
+from typing import List
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.database import abrir_sessao
+from app.models import Adocao, Animal, Usuario, UsuarioOngAssociacao
+from app.mudancas import agora
+from app.notificacoes import enviar_email
+from app.tarefas import enfileirar, tarefa
+
+PENDENTE = "pendente"
+APROVADA = "aprovada"
+REJEITADA = "rejeitada"
+CANCELADA = "cancelada"
+
+MOTIVO_ADOTADO = "O animal foi adotado por outra pessoa"
+
+
+async def _pedido(session, adocao_id: int):
+    return (await session.execute(
+        select(Adocao, Animal.nome, Usuario.nome, Usuario.email)
+        .join(Animal, Animal.id == Adocao.animal_id)
+        .join(Usuario, Usuario.id == Adocao.usuario_id)
+        .where(Adocao.id == adocao_id)
+    )).first()
+
+
+@tarefa("notificar_pedido_adocao")
+async def notificar_pedido_adocao(dados: dict):
+    async with abrir_sessao() as session:
+        pedido = await _pedido(session, dados["adocao_id"])
+        if pedido is None or pedido[0].status != PENDENTE:
+            return
+        adocao, animal, adotante, email_adotante = pedido
+        emails: List[str] = list((await session.execute(
+            select(Usuario.email)
+            .join(UsuarioOngAssociacao, UsuarioOngAssociacao.usuario_id == Usuario.id)
+            .where(UsuarioOngAssociacao.ong_id == adocao.ong_id)
+        )).scalars())
+
+    corpo = f"{adotante} ({email_adotante}) quer adotar {animal}."
+    if adocao.mensagem:
+        corpo += f"\n\nMensagem:\n{adocao.mensagem}"
+    await enviar_email(emails, f"Novo pedido de adoção: {animal}", corpo)
+
+
+@tarefa("adocao_aprovada")
+async def concluir_aprovacao(dados: dict):
+    """Rejeita os demais pedidos pendentes do animal e avisa todos os adotantes envolvidos."""
+    async with abrir_sessao() as session:
+        adocao = await session.get(Adocao, dados["adocao_id"])
+        if adocao is None or adocao.status != APROVADA:
+            return
+        rejeitadas = (await session.execute(
+            update(Adocao)
+            .where(Adocao.animal_id == adocao.animal_id, Adocao.status == PENDENTE)
+            .values(status=REJEITADA, motivo=MOTIVO_ADOTADO, decidido_em=agora())
+            .returning(Adocao.id)
+        )).scalars().all()
+        # uma tarefa por aviso: um e-mail que falha não reenvia os outros
+        for adocao_id in [adocao.id, *rejeitadas]:
+            enfileirar(session, "notificar_adotante", {"adocao_id": adocao_id})
+        await session.commit()
+
+
+@tarefa("notificar_adotante")
+async def notificar_adotante(dados: dict):
+    async with abrir_sessao() as session:
+        pedido = await _pedido(session, dados["adocao_id"])
+    if pedido is None:
+        return
+    adocao, animal, adotante, email = pedido
+    if adocao.status == APROVADA:
+        await enviar_email([email], f"Pedido de adoção aprovado: {animal}", (
+            f"Olá, {adotante}! Seu pedido para adotar {animal} foi aprovado. "
+            "A ONG entrará em contato para combinar os próximos passos."
+        ))
+    elif adocao.status == REJEITADA:
+        corpo = f"Olá, {adotante}. Seu pedido para adotar {animal} não foi aprovado."
+        if adocao.motivo:
+            corpo += f"\n\nMotivo: {adocao.motivo}"
+        await enviar_email([email], f"Pedido de adoção: {animal}", corpo)
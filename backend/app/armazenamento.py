@@ -0,0 +1,124 @@
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import MIDIA_BACKEND, MIDIA_DIR, MIDIA_S3_BUCKET, MIDIA_S3_ENDPOINT, MIDIA_URL_BASE
+
+
+class Armazenamento(ABC):
+    """Destino das imagens enviadas, endereçadas pela chave (derivada do conteúdo)."""
+
+    url_base: str
+
+    @abstractmethod
+    def diretorio_temporario(self) -> str:
+        """Onde o upload é gravado antes de ``salvar``."""
+
+    @abstractmethod
+    async def existe(self, chave: str) -> bool:
+        """Se já há um arquivo em ``chave`` (conteúdo idêntico, pela chave)."""
+
+    @abstractmethod
+    async def salvar(self, caminho_temporario: str, chave: str, content_type: str):
+        """Move o arquivo temporário para ``chave``; o temporário deixa de existir."""
+
+    @abstractmethod
+    async def ler(self, chave: str) -> bytes:
+        """Conteúdo completo do arquivo em ``chave``."""
+
+    async def salvar_bytes(self, chave: str, dados: bytes, content_type: str):
+        caminho = os.path.join(self.diretorio_temporario(), f"{uuid.uuid4().hex}.parcial")
+
+        def gravar():
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(caminho, "wb") as destino:
+                destino.write(dados)
+
+        await run_in_threadpool(gravar)
+        await self.salvar(caminho, chave, content_type)
+
+    def url(self, chave: str) -> str:
+        return f"{self.url_base.rstrip('/')}/{chave}"
+
+
+class ArmazenamentoLocal(Armazenamento):
+    def __init__(self, raiz: str, url_base: str):
+        self.raiz = raiz
+        self.url_base = url_base
+
+    def caminho(self, chave: str) -> str:
+        return os.path.join(self.raiz, *chave.split("/"))
+
+    def diretorio_temporario(self) -> str:
+        # no mesmo sistema de arquivos do destino, para o rename ser atômico
+        return os.path.join(self.raiz, ".tmp")
+
+    async def existe(self, chave: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self.caminho(chave))
+
+    async def ler(self, chave: str) -> bytes:
+        def ler_arquivo():
+            with open(self.caminho(chave), "rb") as origem:
+                return origem.read()
+
+        return await run_in_threadpool(ler_arquivo)
+
+    async def salvar(self, caminho_temporario: str, chave: str, content_type: str):
+        destino = self.caminho(chave)
+
+        def mover():
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(caminho_temporario, destino)
+
+        await run_in_threadpool(mover)
+
+
+class ArmazenamentoS3(Armazenamento):
+    """Bucket S3 ou compatível (ex.: MinIO local) via boto3, dependência opcional."""
+
+    def __init__(self, bucket: str, endpoint_url: str, url_base: str):
+        import boto3
+
+        self.bucket = bucket
+        self.url_base = url_base
+        self.cliente = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def diretorio_temporario(self) -> str:
+        return os.path.join(tempfile.gettempdir(), "rede-de-patas-uploads")
+
+    async def existe(self, chave: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            await run_in_threadpool(self.cliente.head_object, Bucket=self.bucket, Key=chave)
+            return True
+        except ClientError:
+            return False
+
+    async def ler(self, chave: str) -> bytes:
+        objeto = await run_in_threadpool(self.cliente.get_object, Bucket=self.bucket, Key=chave)
+        return await run_in_threadpool(objeto["Body"].read)
+
+    async def salvar(self, caminho_temporario: str, chave: str, content_type: str):
+        try:
+            await run_in_threadpool(
+                self.cliente.upload_file,
+                caminho_temporario,
+                self.bucket,
+                chave,
+                ExtraArgs={"ContentType": content_type},
+            )
+        finally:
+            await run_in_threadpool(os.remove, caminho_temporario)
+
+
+def criar_armazenamento() -> Armazenamento:
+    if MIDIA_BACKEND == "s3":
+        return ArmazenamentoS3(MIDIA_S3_BUCKET, MIDIA_S3_ENDPOINT, MIDIA_URL_BASE)
+    return ArmazenamentoLocal(MIDIA_DIR, MIDIA_URL_BASE)
+
+
+armazenamento = criar_armazenamento()
@@ -1,20 +1,67 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+from app.config import BCRYPT_ROUNDS, HASH_MAX_PENDENTES, HASH_WORKERS
 
 
 SECRET_KEY = "sua_chave_secreta_segura"  
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# hashes com custo diferente de BCRYPT_ROUNDS são marcados para atualização e
+# refeitos no próximo login bem-sucedido
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def verificar_senha(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verificar_e_atualizar_senha(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def hash_senha(password):
     return pwd_context.hash(password)
 
+# bcrypt é CPU puro: roda num pool de processos dedicado para usar todos os
+# núcleos sem ocupar o event loop nem o threadpool das rotas
+_executor: Optional[ProcessPoolExecutor] = None
+_pendentes: Optional[asyncio.Semaphore] = None
+
+def _pool_hash() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+async def _executar_no_pool(funcao, *args):
+    global _pendentes
+    if _pendentes is None:
+        _pendentes = asyncio.Semaphore(HASH_MAX_PENDENTES)
+    async with _pendentes:
+        return await asyncio.get_running_loop().run_in_executor(_pool_hash(), funcao, *args)
+
+async def hash_senha_async(password) -> str:
+    return await _executar_no_pool(hash_senha, password)
+
+async def verificar_senha_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    return await _executar_no_pool(verificar_e_atualizar_senha, plain_password, hashed_password)
+
+def encerrar_pool_hash():
+    global _executor, _pendentes
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _pendentes = None
+
 def criar_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Float, Integer, String, cast, column, func, literal, literal_column, null, table, text, union_all
+from sqlmodel import select
+
+from app.database import DIALETO
+from app.models import Animal
+
+FACETAS = ("especie", "porte", "sexo")
+
+
+def _consulta_fts5(texto: str) -> str:
+    # cada termo vira uma frase com prefixo; evita que a sintaxe do FTS5 vaze para o usuário
+    termos = [termo.replace('"', '""') for termo in texto.split()]
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+def _filtrados(campos: Sequence[str], texto: Optional[str], filtros: list):
+    colunas = [getattr(Animal, campo) for campo in campos]
+
+    if not texto:
+        consulta = select(*colunas, literal(0.0).label("relevancia"))
+    elif DIALETO == "postgresql":
+        tsquery = func.websearch_to_tsquery("portuguese", texto)
+        busca = literal_column("animal.busca")
+        consulta = (
+            select(*colunas, func.ts_rank_cd(busca, tsquery, type_=Float).label("relevancia"))
+            .where(busca.op("@@")(tsquery))
+        )
+    elif DIALETO == "sqlite":
+        fts = table("animal_fts", column("rowid"))
+        consulta = (
+            select(*colunas, (-literal_column("bm25(animal_fts)", Float)).label("relevancia"))
+            .join_from(Animal, fts, fts.c.rowid == Animal.id)
+            .where(text("animal_fts MATCH :consulta_fts").bindparams(consulta_fts=_consulta_fts5(texto)))
+        )
+    else:
+        padrao = f"%{texto.lower()}%"
+        consulta = (
+            select(*colunas, literal(0.0).label("relevancia"))
+            .where(func.lower(func.coalesce(Animal.nome, "") + " " + func.coalesce(Animal.descricao, "")).like(padrao))
+        )
+
+    if filtros:
+        consulta = consulta.where(*filtros)
+    return consulta.cte("filtrados")
+
+
+async def buscar_animais(
+    session,
+    campos: Sequence[str],
+    texto: Optional[str],
+    filtros: list,
+    limit: int,
+    offset: int,
+) -> dict:
+    """Resultados ordenados por relevância, total e contagem por faceta numa única consulta.
+
+    As linhas de todas as partes vêm no mesmo UNION ALL, distinguidas pela coluna ``tipo``.
+    """
+    filtrados = _filtrados(campos, texto, filtros)
+
+    colunas_animal = [filtrados.c[campo] for campo in campos] + [filtrados.c.relevancia]
+    nulos_animal = [cast(null(), coluna.type).label(coluna.name) for coluna in colunas_animal]
+
+    pagina = (
+        select(
+            literal("resultado").label("tipo"),
+            cast(null(), String).label("valor"),
+            cast(null(), Integer).label("contagem"),
+            *colunas_animal,
+        )
+        .order_by(filtrados.c.relevancia.desc(), filtrados.c.id)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    partes = [
+        select(*pagina.c),
+        select(
+            literal("total").label("tipo"),
+            cast(null(), String).label("valor"),
+            func.count().label("contagem"),
+            *nulos_animal,
+        ).select_from(filtrados),
+    ]
+    for faceta in FACETAS:
+        partes.append(
+            select(
+                literal(faceta).label("tipo"),
+                cast(filtrados.c[faceta], String).label("valor"),
+                func.count().label("contagem"),
+                *nulos_animal,
+            ).group_by(filtrados.c[faceta])
+        )
+
+    itens: List[dict] = []
+    facetas: Dict[str, Dict[str, int]] = {faceta: {} for faceta in FACETAS}
+    total = 0
+    for linha in (await session.execute(union_all(*partes))).all():
+        dados = linha._mapping
+        if dados["tipo"] == "resultado":
+            itens.append({campo: dados[campo] for campo in campos} | {"relevancia": dados["relevancia"]})
+        elif dados["tipo"] == "total":
+            total = dados["contagem"]
+        elif dados["valor"] is not None:
+            facetas[dados["tipo"]][dados["valor"]] = dados["contagem"]
+
+    itens.sort(key=lambda item: (-item["relevancia"], item["id"]))
+    return {"itens": itens, "total": total, "facetas": facetas}
@@ -0,0 +1,247 @@
+import hashlib
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import orjson
+
+from app.config import CACHE_BACKEND, CACHE_MAX_BYTES, CACHE_MAX_ITENS, CACHE_REDIS_URL, CACHE_TTL
+
+# (etag, headers da rota, corpo)
+Resposta = Tuple[str, List[Tuple[str, str]], bytes]
+
+
+class CacheMemoria:
+    """LRU em processo com TTL, limitado em número de itens e em bytes."""
+
+    # a geração de cada worker só vê as escritas feitas nele: não pode validar ETags
+    compartilhado = False
+
+    def __init__(self, ttl: float, max_itens: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._geracoes: dict = {}
+        self._lock = threading.Lock()
+
+    async def versao(self, namespace: str) -> str:
+        return str(self._geracoes.get(namespace, 0))
+
+    async def invalidar(self, namespace: str):
+        with self._lock:
+            self._geracoes[namespace] = self._geracoes.get(namespace, 0) + 1
+
+    async def obter(self, chave: str) -> Optional[Resposta]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            resposta, expira_em = item
+            if expira_em < time.monotonic():
+                self._remover(chave)
+                return None
+            self._itens.move_to_end(chave)
+            return resposta
+
+    async def definir(self, chave: str, resposta: Resposta):
+        tamanho = len(resposta[2])
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (resposta, time.monotonic() + self.ttl)
+            self._bytes += tamanho
+            while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+                self._remover(next(iter(self._itens)))
+
+    def _remover(self, chave: str):
+        resposta, _ = self._itens.pop(chave)
+        self._bytes -= len(resposta[2])
+
+
+class CacheRedis:
+    """Backend compartilhado entre workers (Redis ou compatível, ex.: KeyDB, Valkey)."""
+
+    compartilhado = True
+
+    def __init__(self, url: str, ttl: float):
+        import redis.asyncio as redis
+
+        self.ttl = int(ttl)
+        self.cliente = redis.Redis.from_url(url)
+
+    async def versao(self, namespace: str) -> str:
+        geracao, epoca = await self.cliente.mget(f"cache:geracao:{namespace}", "cache:epoca")
+        if epoca is None:
+            # Redis novo ou esvaziado: contadores zerados ganham outra época
+            await self.cliente.set("cache:epoca", secrets.token_hex(4), nx=True)
+            epoca = await self.cliente.get("cache:epoca")
+        return f"{epoca.decode()}.{int(geracao or 0)}"
+
+    async def invalidar(self, namespace: str):
+        await self.cliente.incr(f"cache:geracao:{namespace}")
+
+    async def obter(self, chave: str) -> Optional[Resposta]:
+        valor = await self.cliente.get(f"cache:{chave}")
+        if valor is None:
+            return None
+        etag, headers, corpo = valor.split(b"\0", 2)
+        return etag.decode(), [tuple(par) for par in orjson.loads(headers)], corpo
+
+    async def definir(self, chave: str, resposta: Resposta):
+        etag, headers, corpo = resposta
+        await self.cliente.set(
+            f"cache:{chave}", etag.encode() + b"\0" + orjson.dumps(headers) + b"\0" + corpo, ex=self.ttl
+        )
+
+
+def criar_cache():
+    if CACHE_BACKEND == "redis":
+        return CacheRedis(CACHE_REDIS_URL, CACHE_TTL)
+    if CACHE_BACKEND == "memoria":
+        return CacheMemoria(CACHE_TTL, CACHE_MAX_ITENS, CACHE_MAX_BYTES)
+    return None
+
+
+cache_respostas = criar_cache()
+
+# rotas públicas de leitura cacheáveis e o namespace que as invalida
+ROTAS_CACHEAVEIS = [
+    (re.compile(r"^/animais$"), "animais"),
+    (re.compile(r"^/animais/busca$"), "animais"),
+    (re.compile(r"^/animais/\d+$"), "animais"),
+    (re.compile(r"^/ongs$"), "ongs"),
+]
+
+
+async def invalidar_cache(*namespaces: str):
+    if cache_respostas is None:
+        return
+    for namespace in namespaces:
+        await cache_respostas.invalidar(namespace)
+
+
+def _namespace(path: str) -> Optional[str]:
+    for padrao, namespace in ROTAS_CACHEAVEIS:
+        if padrao.match(path):
+            return namespace
+    return None
+
+
+def _sem_fraco(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match usa comparação fraca
+    if not if_none_match:
+        return False
+    candidatos = [_sem_fraco(valor.strip()) for valor in if_none_match.split(",")]
+    return "*" in candidatos or _sem_fraco(etag) in candidatos
+
+
+def etag_versao(chave: str) -> str:
+    """ETag fraca da versão do namespace e da URL: muda a cada escrita, não depende do corpo.
+
+    Fraca porque a mesma versão pode ir comprimida ou não.
+    """
+    return f'W/"{hashlib.sha1(chave.encode()).hexdigest()[:20]}"'
+
+
+def etag_corpo(corpo: bytes) -> str:
+    """ETag fraca do conteúdo, para o cache em memória (a versão dele é só do processo)."""
+    return f'W/"{hashlib.sha1(corpo).hexdigest()[:20]}"'
+
+
+# definidos pelo próprio middleware ou que não podem ser servidos a outro cliente
+_HEADERS_DESCARTADOS = {b"content-length", b"etag", b"cache-control", b"set-cookie"}
+
+
+def _headers_guardados(headers) -> List[Tuple[str, str]]:
+    return [
+        (nome.decode("latin-1"), valor.decode("latin-1"))
+        for nome, valor in headers if nome.lower() not in _HEADERS_DESCARTADOS
+    ]
+
+
+class CacheRespostasMiddleware:
+    def __init__(self, app, cache=None):
+        self.app = app
+        self.cache = cache if cache is not None else cache_respostas
+
+    async def __call__(self, scope, receive, send):
+        if self.cache is None or scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        namespace = _namespace(scope["path"])
+        if namespace is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if_none_match = headers.get(b"if-none-match", b"").decode("latin-1") or None
+        query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+        versao = await self.cache.versao(namespace)
+        chave = f"{namespace}:{versao}:{scope['path']}?{query}"
+        etag = None
+        if self.cache.compartilhado:
+            etag = etag_versao(chave)
+            # nada mudou desde a versão que o cliente tem: responde sem consultar cache nem banco
+            if _etag_confere(if_none_match, etag):
+                await self._nao_modificado(send, etag)
+                return
+
+        guardada = await self.cache.obter(chave)
+        if guardada is not None:
+            if _etag_confere(if_none_match, guardada[0]):
+                await self._nao_modificado(send, guardada[0])
+            else:
+                await self._responder(send, guardada, b"HIT")
+            return
+
+        inicio = {}
+        partes = []
+
+        async def capturar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                inicio.update(mensagem)
+            elif mensagem["type"] == "http.response.body":
+                partes.append(mensagem.get("body", b""))
+
+        await self.app(scope, receive, capturar)
+
+        corpo = b"".join(partes)
+        if inicio.get("status") != 200:
+            await send(inicio)
+            await send({"type": "http.response.body", "body": corpo})
+            return
+
+        resposta = (etag or etag_corpo(corpo), _headers_guardados(inicio.get("headers", [])), corpo)
+        await self.cache.definir(chave, resposta)
+        if _etag_confere(if_none_match, resposta[0]):
+            await self._nao_modificado(send, resposta[0])
+        else:
+            await self._responder(send, resposta, b"MISS")
+
+    async def _nao_modificado(self, send, etag: str):
+        headers = [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _responder(self, send, resposta: Resposta, estado: bytes):
+        etag, guardados, corpo = resposta
+        headers = [(nome.encode("latin-1"), valor.encode("latin-1")) for nome, valor in guardados]
+        headers += [
+            (b"etag", etag.encode()), (b"x-cache", estado), (b"cache-control", b"no-cache"),
+            (b"content-length", str(len(corpo)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": corpo})
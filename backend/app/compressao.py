@@ -0,0 +1,149 @@
+import zlib
+from typing import Optional
+
+from app.config import COMPRESSAO, COMPRESSAO_MIN_BYTES, COMPRESSAO_NIVEL_BROTLI, COMPRESSAO_NIVEL_GZIP
+
+try:
+    import brotli
+except ImportError:  # pacote opcional: sem ele só gzip
+    brotli = None
+
+# respostas geradas pela API; imagens e arquivos já comprimidos ficam de fora
+TIPOS_COMPRIMIVEIS = (
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "text/csv",
+    "text/plain",
+    "text/html",
+)
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """"br" ou "gzip" conforme o Accept-Encoding (com pesos q); None para enviar sem compressão."""
+    pesos = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        peso = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                peso = float(parametro[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nome.strip().lower()] = peso
+    candidatas = ("br", "gzip") if brotli is not None else ("gzip",)
+    melhor = None
+    for codificacao in candidatas:
+        peso = pesos.get(codificacao, pesos.get("*", 0.0))
+        if peso > 0 and (melhor is None or peso > melhor[1]):
+            melhor = (codificacao, peso)
+    return melhor[0] if melhor else None
+
+
+class _Compressor:
+    def __init__(self, codificacao: str):
+        if codificacao == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSAO_NIVEL_BROTLI)
+            self._gzip = None
+        else:
+            self._brotli = None
+            # wbits 16+: cabeçalho e rodapé gzip
+            self._gzip = zlib.compressobj(COMPRESSAO_NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(dados)
+        return self._gzip.compress(dados)
+
+    def finalizar(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._gzip.flush()
+
+
+def _comprimivel(headers: dict) -> bool:
+    content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower()
+    return content_type in TIPOS_COMPRIMIVEIS
+
+
+class CompressaoMiddleware:
+    """gzip/brotli negociado pelo Accept-Encoding.
+
+    Respostas pequenas (abaixo de COMPRESSAO_MIN_BYTES) saem como estão; as
+    enviadas em partes (exportações) são comprimidas parte a parte, sem juntar
+    o corpo em memória. O stream de eventos (text/event-stream) nunca passa
+    pelo compressor: o buffer atrasaria cada evento.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not COMPRESSAO or scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        codificacao = escolher_codificacao(accept_encoding) if accept_encoding else None
+
+        inicio = None
+        compressor: Optional[_Compressor] = None
+        repassar = False
+
+        async def enviar(mensagem):
+            nonlocal inicio, compressor, repassar
+            if mensagem["type"] == "http.response.start":
+                headers = dict(mensagem.get("headers", []))
+                if (
+                    mensagem["status"] != 200
+                    or b"content-encoding" in headers
+                    or not _comprimivel(headers)
+                ):
+                    repassar = True
+                    await send(mensagem)
+                    return
+                # só decide quando vier o primeiro pedaço do corpo
+                inicio = mensagem
+                return
+
+            if repassar or mensagem["type"] != "http.response.body":
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            mais = mensagem.get("more_body", False)
+            if inicio is not None:
+                headers = [(nome, valor) for nome, valor in inicio["headers"] if nome.lower() != b"vary"]
+                vary = [valor for nome, valor in inicio["headers"] if nome.lower() == b"vary"]
+                headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                if codificacao is None or (not mais and len(corpo) < COMPRESSAO_MIN_BYTES):
+                    repassar = True
+                    await send({**inicio, "headers": headers})
+                    inicio = None
+                    await send(mensagem)
+                    return
+                compressor = _Compressor(codificacao)
+                # bytes diferentes do original: uma ETag forte passa a fraca
+                headers = [
+                    (nome, b"W/" + valor if nome.lower() == b"etag" and not valor.startswith(b"W/") else valor)
+                    for nome, valor in headers if nome.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", codificacao.encode()))
+                if not mais:
+                    # corpo inteiro de uma vez: o tamanho comprimido é conhecido
+                    comprimido = compressor.comprimir(corpo) + compressor.finalizar()
+                    headers.append((b"content-length", str(len(comprimido)).encode()))
+                    await send({**inicio, "headers": headers})
+                    inicio = None
+                    await send({"type": "http.response.body", "body": comprimido})
+                    return
+                await send({**inicio, "headers": headers})
+                inicio = None
+
+            dados = compressor.comprimir(corpo)
+            if not mais:
+                dados += compressor.finalizar()
+            if dados or not mais:
+                await send({"type": "http.response.body", "body": dados, "more_body": mais})
+
+        await self.app(scope, receive, enviar)
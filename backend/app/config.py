@@ -0,0 +1,133 @@
+import os
+
+
+def _env_bool(nome: str, padrao: bool = False) -> bool:
+    valor = os.getenv(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
+def _url_assincrona(url: str) -> str:
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://rede_user@localhost:5432/rede_de_patas")
+
+# com DATABASE_ASYNC=1 as rotas usam AsyncSession (asyncpg/aiosqlite) em vez do
+# engine síncrono executado no threadpool
+DATABASE_ASYNC = _env_bool("DATABASE_ASYNC")
+DATABASE_ASYNC_URL = os.getenv("DATABASE_ASYNC_URL") or _url_assincrona(DATABASE_URL)
+
+# pool de conexões (ignorado para SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_ECHO = _env_bool("DB_ECHO")
+
+# cache da versão dos tokens (revogação via Usuario.token_versao)
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "30"))
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+
+# hashing de senhas (bcrypt)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_PENDENTES = int(os.getenv("HASH_MAX_PENDENTES", str(HASH_WORKERS * 8)))
+
+# cache de respostas das leituras do catálogo: "memoria", "redis" ou "desligado"
+# (o backend redis requer o pacote opcional redis>=4.2). "memoria" é por processo:
+# só serve a um processo único; com vários workers use redis
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# uploads e armazenamento de imagens: "local" ou "s3" (requer o pacote opcional boto3)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+MIDIA_BACKEND = os.getenv("MIDIA_BACKEND", "local")
+MIDIA_DIR = os.getenv("MIDIA_DIR", "app/static")
+MIDIA_URL_BASE = os.getenv("MIDIA_URL_BASE", "/static")
+MIDIA_S3_BUCKET = os.getenv("MIDIA_S3_BUCKET", "rede-de-patas")
+MIDIA_S3_ENDPOINT = os.getenv("MIDIA_S3_ENDPOINT", "")
+
+# variantes redimensionadas das fotos (requer Pillow)
+IMAGEM_WORKERS = int(os.getenv("IMAGEM_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+IMAGEM_QUALIDADE = int(os.getenv("IMAGEM_QUALIDADE", "80"))
+
+# entrega das imagens locais: "" (o próprio worker), "x-accel" (nginx) ou "x-sendfile" (apache/lighttpd)
+MIDIA_OFFLOAD = os.getenv("MIDIA_OFFLOAD", "")
+MIDIA_OFFLOAD_PREFIXO = os.getenv("MIDIA_OFFLOAD_PREFIXO", "/_midia")
+
+# recomendações: intervalo de reconstrução completa da matriz de características (requer numpy)
+RECOMENDACAO_RECONSTRUIR_SEGUNDOS = float(os.getenv("RECOMENDACAO_RECONSTRUIR_SEGUNDOS", "300"))
+
+# geocodificação offline: CSV "prefixo,lat,lon" de CEPs (prefixo mais longo vence)
+GEO_CEP_ARQUIVO = os.getenv("GEO_CEP_ARQUIVO", os.path.join(os.path.dirname(__file__), "dados", "cep_coordenadas.csv"))
+
+# importação e exportação em lote
+LOTE_MAX_BYTES = int(os.getenv("LOTE_MAX_BYTES", str(50 * 1024 * 1024)))
+LOTE_MAX_REGISTRO_BYTES = int(os.getenv("LOTE_MAX_REGISTRO_BYTES", str(64 * 1024)))
+LOTE_TAMANHO_BLOCO = int(os.getenv("LOTE_TAMANHO_BLOCO", "500"))
+
+# instrumentação: Server-Timing, /metrics (Prometheus) e log de consultas lentas (0 desliga)
+INSTRUMENTACAO = _env_bool("INSTRUMENTACAO", True)
+SERVER_TIMING = _env_bool("SERVER_TIMING", True)
+DB_CONSULTA_LENTA_MS = float(os.getenv("DB_CONSULTA_LENTA_MS", "200"))
+
+# eventos de animais (SSE): "memoria" (por processo), "redis" (compartilhado entre workers;
+# requer redis>=4.2) ou "desligado" (GET /animais/eventos responde 503)
+EVENTOS_BACKEND = os.getenv("EVENTOS_BACKEND", "memoria")
+EVENTOS_REDIS_URL = os.getenv("EVENTOS_REDIS_URL", CACHE_REDIS_URL)
+EVENTOS_FILA_MAX = int(os.getenv("EVENTOS_FILA_MAX", "256"))
+EVENTOS_MAX_ASSINANTES = int(os.getenv("EVENTOS_MAX_ASSINANTES", "1000"))
+EVENTOS_HEARTBEAT_SEGUNDOS = float(os.getenv("EVENTOS_HEARTBEAT_SEGUNDOS", "15"))
+EVENTOS_REPLAY_MAX = int(os.getenv("EVENTOS_REPLAY_MAX", "1000"))
+
+# fila de tarefas em segundo plano (python -m app.worker)
+TAREFAS_CONCORRENCIA = int(os.getenv("TAREFAS_CONCORRENCIA", "4"))
+TAREFAS_INTERVALO = float(os.getenv("TAREFAS_INTERVALO", "1"))
+TAREFAS_TIMEOUT = float(os.getenv("TAREFAS_TIMEOUT", "120"))
+TAREFAS_MAX_TENTATIVAS = int(os.getenv("TAREFAS_MAX_TENTATIVAS", "5"))
+TAREFAS_BACKOFF_BASE = float(os.getenv("TAREFAS_BACKOFF_BASE", "5"))
+TAREFAS_BACKOFF_MAX = float(os.getenv("TAREFAS_BACKOFF_MAX", "900"))
+TAREFAS_RETENCAO_DIAS = float(os.getenv("TAREFAS_RETENCAO_DIAS", "7"))
+
+# notificações por e-mail; sem SMTP_HOST as mensagens só vão para o log
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORTA = int(os.getenv("SMTP_PORTA", "587"))
+SMTP_USUARIO = os.getenv("SMTP_USUARIO", "")
+SMTP_SENHA = os.getenv("SMTP_SENHA", "")
+SMTP_TLS = _env_bool("SMTP_TLS", True)
+SMTP_REMETENTE = os.getenv("SMTP_REMETENTE", "Rede de Patas <nao-responda@rededepatas.org>")
+
+# limite de taxa (token bucket) nas rotas de login e cadastro: "memoria" (por processo),
+# "redis" (compartilhado entre workers; requer redis>=4.2) ou "desligado".
+# Limites no formato "requisições/segundos"; vazio desliga aquele limite.
+LIMITES_BACKEND = os.getenv("LIMITES_BACKEND", "memoria")
+LIMITES_REDIS_URL = os.getenv("LIMITES_REDIS_URL", CACHE_REDIS_URL)
+LIMITES_MAX_CHAVES = int(os.getenv("LIMITES_MAX_CHAVES", "100000"))
+# quantos proxies confiáveis acrescentam ao X-Forwarded-For (0 usa o IP da conexão)
+LIMITES_PROXIES = int(os.getenv("LIMITES_PROXIES", "0"))
+LIMITE_LOGIN_IP = os.getenv("LIMITE_LOGIN_IP", "20/60")
+LIMITE_LOGIN_CONTA = os.getenv("LIMITE_LOGIN_CONTA", "10/300")
+LIMITE_CADASTRO_IP = os.getenv("LIMITE_CADASTRO_IP", "10/3600")
+
+# compressão das respostas (gzip; brotli se o pacote opcional brotli estiver instalado)
+COMPRESSAO = _env_bool("COMPRESSAO", True)
+COMPRESSAO_MIN_BYTES = int(os.getenv("COMPRESSAO_MIN_BYTES", "1024"))
+COMPRESSAO_NIVEL_GZIP = int(os.getenv("COMPRESSAO_NIVEL_GZIP", "6"))
+COMPRESSAO_NIVEL_BROTLI = int(os.getenv("COMPRESSAO_NIVEL_BROTLI", "4"))
+
+# migrações na inicialização de cada processo: prático em desenvolvimento. Em
+# produção deixe desligado e rode "python -m app.migrar" uma vez por deploy
+MIGRAR_AO_INICIAR = _env_bool("MIGRAR_AO_INICIAR")
+# prazo da consulta de teste do /ready
+PRONTIDAO_TIMEOUT = float(os.getenv("PRONTIDAO_TIMEOUT", "2"))
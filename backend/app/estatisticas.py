@@ -0,0 +1,174 @@
+"""Estatísticas das ONGs para os painéis dos administradores.
+
+Os contadores ficam em OngEstatistica, uma linha por ONG, espécie e mês de
+entrada, e são ajustados na mesma transação de cada alteração de animal: a
+leitura não depende do tamanho do catálogo. Para corrigir qualquer desvio
+(ex.: alterações feitas direto no banco), reconstrua periodicamente:
+
+    python -m app.estatisticas            # todas as ONGs
+    python -m app.estatisticas --ong 12   # uma ONG
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+
+from app.database import DIALETO, abrir_sessao
+from app.models import Animal, OngEstatistica
+
+CONTAGENS = ("total", "disponiveis", "vacinados", "castrados")
+# atributos do animal que afetam as estatísticas
+CAMPOS_ESTATISTICA = ("ong_id", "especie", "disponivel", "vacinado", "castrado", "criado_em", "deleted_at")
+
+Chave = Tuple[int, str, str]
+
+
+def parcela(animal) -> dict:
+    """O que o animal soma às estatísticas agora; guarde antes de alterar e compare depois."""
+    return {campo: getattr(animal, campo) for campo in CAMPOS_ESTATISTICA}
+
+
+def _mes(criado_em: Optional[datetime]) -> str:
+    if criado_em is None:
+        criado_em = datetime.now(timezone.utc)
+    elif criado_em.tzinfo is not None:
+        criado_em = criado_em.astimezone(timezone.utc)
+    return criado_em.strftime("%Y-%m")
+
+
+def _somar(deltas: Dict[Chave, List[int]], dados: dict, sinal: int):
+    if dados.get("ong_id") is None or dados.get("deleted_at") is not None:
+        return
+    chave = (dados["ong_id"], dados["especie"], _mes(dados.get("criado_em")))
+    valores = (1, dados.get("disponivel"), dados.get("vacinado"), dados.get("castrado"))
+    soma = deltas[chave]
+    for posicao, valor in enumerate(valores):
+        if valor:
+            soma[posicao] += sinal
+
+
+def _insert():
+    return (postgresql if DIALETO == "postgresql" else sqlite).insert(OngEstatistica)
+
+
+async def ajustar_estatisticas(session, removidos: Iterable[dict] = (), adicionados: Iterable[dict] = ()):
+    """Aplica a diferença entre parcelas antigas e novas na transação da sessão.
+
+    Cada linha recebe um incremento atômico (INSERT ... ON CONFLICT DO UPDATE),
+    então alterações simultâneas na mesma ONG não se sobrescrevem.
+    """
+    deltas: Dict[Chave, List[int]] = defaultdict(lambda: [0] * len(CONTAGENS))
+    for dados in removidos:
+        _somar(deltas, dados, -1)
+    for dados in adicionados:
+        _somar(deltas, dados, 1)
+    linhas = [
+        {"ong_id": ong_id, "especie": especie, "mes": mes, **dict(zip(CONTAGENS, valores))}
+        for (ong_id, especie, mes), valores in sorted(deltas.items())
+        if any(valores)
+    ]
+    if not linhas:
+        return
+    upsert = _insert()
+    upsert = upsert.on_conflict_do_update(
+        index_elements=["ong_id", "especie", "mes"],
+        set_={campo: getattr(OngEstatistica, campo) + getattr(upsert.excluded, campo) for campo in CONTAGENS},
+    )
+    await session.execute(upsert, linhas)
+
+
+def _expressao_mes(dialeto: str):
+    # sem data de entrada conta no mês corrente, como em _mes
+    if dialeto == "postgresql":
+        return func.to_char(func.timezone("UTC", func.coalesce(Animal.criado_em, func.now())), "YYYY-MM")
+    return func.strftime("%Y-%m", func.coalesce(Animal.criado_em, "now"))
+
+
+def instrucoes_reconstrucao(dialeto: str, ong_id: Optional[int] = None) -> list:
+    """DELETE e INSERT ... SELECT que recalculam os contadores a partir da tabela de animais."""
+    mes = _expressao_mes(dialeto)
+    filtros = [Animal.deleted_at.is_(None), Animal.ong_id.is_not(None)]
+    apagar = delete(OngEstatistica)
+    if ong_id is not None:
+        filtros.append(Animal.ong_id == ong_id)
+        apagar = apagar.where(OngEstatistica.ong_id == ong_id)
+    contagens = (
+        select(
+            Animal.ong_id, Animal.especie, mes, func.count(),
+            *[func.sum(case((coluna.is_(True), 1), else_=0)) for coluna in (Animal.disponivel, Animal.vacinado, Animal.castrado)],
+        )
+        .where(*filtros)
+        .group_by(Animal.ong_id, Animal.especie, mes)
+    )
+    return [apagar, insert(OngEstatistica).from_select(["ong_id", "especie", "mes", *CONTAGENS], contagens)]
+
+
+async def reconstruir_estatisticas(ong_id: Optional[int] = None) -> int:
+    async with abrir_sessao() as session:
+        if DIALETO == "postgresql":
+            # ajustes concorrentes esperam o fim da reconstrução e se aplicam sobre ela
+            await session.execute(text("LOCK TABLE ongestatistica IN SHARE ROW EXCLUSIVE MODE"))
+        for instrucao in instrucoes_reconstrucao(DIALETO, ong_id):
+            await session.execute(instrucao)
+        consulta = select(func.count()).select_from(OngEstatistica)
+        if ong_id is not None:
+            consulta = consulta.where(OngEstatistica.ong_id == ong_id)
+        linhas = (await session.execute(consulta)).scalar_one()
+        await session.commit()
+    return linhas
+
+
+async def estatisticas_ong(session, ong_id: int, meses: int) -> dict:
+    linhas = (await session.execute(
+        select(OngEstatistica.especie, OngEstatistica.mes, *[getattr(OngEstatistica, campo) for campo in CONTAGENS])
+        .where(OngEstatistica.ong_id == ong_id)
+    )).all()
+
+    totais = dict.fromkeys(CONTAGENS, 0)
+    por_especie: Dict[str, dict] = {}
+    entradas: Dict[str, int] = defaultdict(int)
+    for especie, mes, *valores in linhas:
+        especie_totais = por_especie.setdefault(especie, dict.fromkeys(CONTAGENS, 0))
+        for campo, valor in zip(CONTAGENS, valores):
+            totais[campo] += valor
+            especie_totais[campo] += valor
+        entradas[mes] += valores[0]
+
+    def resumo(contagens: dict) -> dict:
+        total = contagens["total"]
+        return {
+            **contagens,
+            "adotados": total - contagens["disponiveis"],
+            "taxa_vacinacao": round(contagens["vacinados"] / total, 4) if total else 0.0,
+            "taxa_castracao": round(contagens["castrados"] / total, 4) if total else 0.0,
+        }
+
+    return {
+        "ong_id": ong_id,
+        **resumo(totais),
+        "por_especie": [{"especie": especie, **resumo(contagens)} for especie, contagens in sorted(por_especie.items())],
+        # entradas de animais que continuam no catálogo, pelos meses mais recentes
+        "entradas_por_mes": [
+            {"mes": mes, "total": total} for mes, total in sorted(entradas.items())[-meses:] if total
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ong", type=int, default=None, help="reconstrói só esta ONG")
+    args = parser.parse_args()
+    inicio = time.perf_counter()
+    linhas = asyncio.run(reconstruir_estatisticas(args.ong))
+    print(json.dumps({"linhas": linhas, "segundos": round(time.perf_counter() - inicio, 2)}))
+
+
+if __name__ == "__main__":
+    main()
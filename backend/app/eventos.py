@@ -0,0 +1,256 @@
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Dict, Optional, Sequence, Set
+
+import orjson
+from fastapi import HTTPException
+
+from app.config import (
+    EVENTOS_BACKEND,
+    EVENTOS_FILA_MAX,
+    EVENTOS_HEARTBEAT_SEGUNDOS,
+    EVENTOS_MAX_ASSINANTES,
+    EVENTOS_REDIS_URL,
+    EVENTOS_REPLAY_MAX,
+)
+from app.database import abrir_sessao
+from app.mudancas import ATUALIZADO, REMOVIDO, listar_mudancas
+from app.paginacao import codificar_cursor, decodificar_cursor
+
+logger = logging.getLogger(__name__)
+
+# tipo só dos eventos: no histórico a adoção é uma atualização de ``disponivel``
+ADOTADO = "adotado"
+
+CANAL_REDIS = "animais:eventos"
+
+# marcadores na fila de um assinante
+FIM = object()
+SOBRECARGA = object()
+
+
+@dataclass
+class Evento:
+    tipo: str
+    animal_id: int
+    mudanca: Optional[int]
+    animal: Optional[dict]
+    # estado antes da alteração: quem filtrava pelo valor antigo também é avisado (ex.: adotado, removido)
+    anterior: Optional[dict] = None
+
+    def para_json(self) -> bytes:
+        return orjson.dumps(asdict(self))
+
+    @classmethod
+    def de_json(cls, dados: bytes) -> "Evento":
+        return cls(**orjson.loads(dados))
+
+    def sse(self) -> bytes:
+        linhas = []
+        if self.mudanca is not None:
+            # o id é o cursor de /animais/mudancas: serve de Last-Event-ID e de ``desde``
+            linhas.append(b"id: " + codificar_cursor({"id": self.mudanca}).encode())
+        linhas.append(b"event: " + self.tipo.encode())
+        linhas.append(b"data: " + orjson.dumps({"tipo": self.tipo, "animal_id": self.animal_id, "animal": self.animal}))
+        return b"\n".join(linhas) + b"\n\n"
+
+
+class Assinatura:
+    """Fila limitada de um cliente conectado. Quem não acompanha é desconectado com
+    um evento ``sobrecarga`` e deve se ressincronizar por /animais/mudancas."""
+
+    def __init__(self, filtros: Dict[str, object], tamanho: int):
+        self.filtros = filtros
+        # uma vaga a mais para o marcador de fim ou de sobrecarga
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=tamanho + 1)
+        self.encerrada = False
+
+    def aceita(self, evento: Evento) -> bool:
+        return any(
+            estado is not None and all(estado.get(campo) == valor for campo, valor in self.filtros.items())
+            for estado in (evento.animal, evento.anterior)
+        )
+
+    def entregar(self, item):
+        if self.encerrada:
+            return
+        if item is not FIM and item is not SOBRECARGA and self.fila.qsize() >= self.fila.maxsize - 1:
+            item = SOBRECARGA
+        if item is FIM or item is SOBRECARGA:
+            self.encerrada = True
+        self.fila.put_nowait(item)
+
+
+class BrokerMemoria:
+    """Pub/sub em processo: cada worker só vê os eventos publicados nele."""
+
+    def __init__(self, max_assinantes: int):
+        self.max_assinantes = max_assinantes
+        self.assinantes: Set[Assinatura] = set()
+
+    def lotado(self) -> bool:
+        return len(self.assinantes) >= self.max_assinantes
+
+    def assinar(self, filtros: Dict[str, object]) -> Assinatura:
+        assinatura = Assinatura(filtros, EVENTOS_FILA_MAX)
+        self.assinantes.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        self.assinantes.discard(assinatura)
+
+    async def publicar(self, eventos: Sequence[Evento]):
+        for evento in eventos:
+            self._distribuir(evento)
+
+    def _distribuir(self, evento: Evento):
+        for assinatura in list(self.assinantes):
+            if assinatura.aceita(evento):
+                assinatura.entregar(evento)
+
+    def _avisar_todos(self, marcador):
+        for assinatura in list(self.assinantes):
+            assinatura.entregar(marcador)
+
+    async def encerrar(self):
+        self._avisar_todos(FIM)
+
+
+class BrokerRedis(BrokerMemoria):
+    """Eventos passam pelo Redis (ou compatível): todos os workers recebem todos e
+    distribuem aos seus assinantes."""
+
+    def __init__(self, url: str, max_assinantes: int):
+        import redis.asyncio as redis
+
+        super().__init__(max_assinantes)
+        self.cliente = redis.Redis.from_url(url)
+        self._ouvinte: Optional[asyncio.Task] = None
+
+    def assinar(self, filtros: Dict[str, object]) -> Assinatura:
+        if self._ouvinte is None or self._ouvinte.done():
+            self._ouvinte = asyncio.create_task(self._ouvir())
+        return super().assinar(filtros)
+
+    async def publicar(self, eventos: Sequence[Evento]):
+        async with self.cliente.pipeline(transaction=False) as pipeline:
+            for evento in eventos:
+                pipeline.publish(CANAL_REDIS, evento.para_json())
+            await pipeline.execute()
+
+    async def _ouvir(self):
+        while True:
+            try:
+                async with self.cliente.pubsub() as pubsub:
+                    await pubsub.subscribe(CANAL_REDIS)
+                    async for mensagem in pubsub.listen():
+                        if mensagem["type"] == "message":
+                            self._distribuir(Evento.de_json(mensagem["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # eventos podem ter se perdido: os clientes se ressincronizam pelo feed
+                logger.exception("Conexão com o Redis de eventos perdida")
+                self._avisar_todos(SOBRECARGA)
+                await asyncio.sleep(1)
+
+    async def encerrar(self):
+        await super().encerrar()
+        if self._ouvinte is not None:
+            self._ouvinte.cancel()
+        await self.cliente.aclose()
+
+
+def criar_broker() -> Optional[BrokerMemoria]:
+    if EVENTOS_BACKEND == "redis":
+        return BrokerRedis(EVENTOS_REDIS_URL, EVENTOS_MAX_ASSINANTES)
+    if EVENTOS_BACKEND == "memoria":
+        return BrokerMemoria(EVENTOS_MAX_ASSINANTES)
+    return None
+
+
+broker = criar_broker()
+
+
+async def publicar_eventos(*eventos: Evento):
+    """Chamado depois do commit; uma falha no broker não desfaz nem derruba a requisição."""
+    if broker is None:
+        return
+    try:
+        await broker.publicar(eventos)
+    except Exception:
+        logger.exception("Falha ao publicar %s evento(s) de animais", len(eventos))
+
+
+def cursor_valido(cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    try:
+        decodificar_cursor(cursor)
+        return cursor
+    except HTTPException:
+        return None
+
+
+async def fluxo_eventos(filtros: Dict[str, object], campos: Sequence[str], desde: Optional[str]) -> AsyncIterator[bytes]:
+    """Corpo text/event-stream: mudanças desde o cursor (se houver) e depois os eventos ao vivo.
+
+    A assinatura é feita antes da leitura do histórico, então nada se perde entre
+    os dois; eventos já enviados pelo histórico são descartados pelo id da mudança.
+    """
+    assinatura = broker.assinar(filtros)
+    try:
+        yield b"retry: 3000\n\n"
+        # última mudança enviada de cada animal: entre animais a ordem do feed não é a
+        # dos ids (veja listar_mudancas), mas as de um mesmo animal são serializadas
+        enviadas: Dict[int, int] = {}
+        if desde:
+            async with abrir_sessao() as session:
+                pagina = await listar_mudancas(session, campos, desde, EVENTOS_REPLAY_MAX)
+            if pagina["mais"]:
+                yield b"event: sobrecarga\ndata: {}\n\n"
+                return
+            partes = []
+            for item in pagina["itens"]:
+                evento = Evento(REMOVIDO if item["removido"] else ATUALIZADO, item["animal_id"], item["mudanca"], item["animal"])
+                # o estado anterior de um removido não está no feed: vai para todos
+                if item["removido"] or assinatura.aceita(evento):
+                    partes.append(evento.sse())
+                enviadas[item["animal_id"]] = item["mudanca"]
+            if partes:
+                yield b"".join(partes)
+
+        while True:
+            try:
+                item = await asyncio.wait_for(assinatura.fila.get(), EVENTOS_HEARTBEAT_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+
+            partes = []
+            # o que já estiver na fila vai na mesma escrita
+            while True:
+                if item is FIM:
+                    break
+                if item is SOBRECARGA:
+                    partes.append(b"event: sobrecarga\ndata: {}\n\n")
+                    break
+                if item.mudanca is None or item.mudanca > enviadas.get(item.animal_id, 0):
+                    partes.append(item.sse())
+                if assinatura.fila.empty():
+                    item = None
+                    break
+                item = assinatura.fila.get_nowait()
+
+            if partes:
+                yield b"".join(partes)
+            if item is FIM or item is SOBRECARGA:
+                return
+    finally:
+        broker.cancelar(assinatura)
+
+
+async def encerrar_eventos():
+    if broker is not None:
+        await broker.encerrar()
@@ -0,0 +1,141 @@
+import csv
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from app.config import GEO_CEP_ARQUIVO
+from app.database import DIALETO
+
+RAIO_TERRA_KM = 6371.0
+KM_POR_GRAU = 111.32
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISAO_GEOHASH = 7
+# a busca cobre o círculo com no máximo essa quantidade de células
+MAX_CELULAS = 12
+
+CEP = re.compile(r"\b(\d{5})-?(\d{3})\b")
+
+Coordenadas = Tuple[float, float]
+
+_ceps: Optional[Dict[str, Coordenadas]] = None
+
+
+def carregar_ceps(caminho: str = GEO_CEP_ARQUIVO) -> Dict[str, Coordenadas]:
+    """Carrega a tabela offline ``prefixo,lat,lon`` de CEPs; prefixos mais longos são mais precisos."""
+    global _ceps
+    tabela = {}
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        for linha in csv.DictReader(arquivo):
+            tabela[linha["prefixo"].strip()] = (float(linha["lat"]), float(linha["lon"]))
+    _ceps = tabela
+    return tabela
+
+
+def extrair_cep(texto: Optional[str]) -> Optional[str]:
+    encontrado = CEP.search(texto or "")
+    return encontrado.group(1) + encontrado.group(2) if encontrado else None
+
+
+def geocodificar_cep(cep: Optional[str]) -> Optional[Coordenadas]:
+    if _ceps is None:
+        carregar_ceps()
+    digitos = re.sub(r"\D", "", cep or "")
+    if len(digitos) != 8:
+        return None
+    for tamanho in range(len(digitos), 0, -1):
+        coordenadas = _ceps.get(digitos[:tamanho])
+        if coordenadas is not None:
+            return coordenadas
+    return None
+
+
+def codificar_geohash(lat: float, lon: float, precisao: int = PRECISAO_GEOHASH) -> str:
+    lat_min, lat_max, lon_min, lon_max = -90.0, 90.0, -180.0, 180.0
+    codigo, valor, bits, usar_lon = [], 0, 0, True
+    while len(codigo) < precisao:
+        if usar_lon:
+            meio = (lon_min + lon_max) / 2
+            valor = valor * 2 + (lon >= meio)
+            lon_min, lon_max = (meio, lon_max) if lon >= meio else (lon_min, meio)
+        else:
+            meio = (lat_min + lat_max) / 2
+            valor = valor * 2 + (lat >= meio)
+            lat_min, lat_max = (meio, lat_max) if lat >= meio else (lat_min, meio)
+        usar_lon = not usar_lon
+        bits += 1
+        if bits == 5:
+            codigo.append(BASE32[valor])
+            valor, bits = 0, 0
+    return "".join(codigo)
+
+
+def _tamanho_celula(precisao: int) -> Coordenadas:
+    bits = 5 * precisao
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def caixa(lat: float, lon: float, raio_km: float) -> Tuple[float, float, float, float]:
+    delta_lat = raio_km / KM_POR_GRAU
+    delta_lon = raio_km / (KM_POR_GRAU * max(math.cos(math.radians(lat)), 0.01))
+    return max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0), lon - delta_lon, lon + delta_lon
+
+
+def celulas_cobrindo(lat: float, lon: float, raio_km: float) -> List[str]:
+    """Prefixos geohash que cobrem o círculo; cada um vira uma faixa no índice."""
+    lat_min, lat_max, lon_min, lon_max = caixa(lat, lon, raio_km)
+    for precisao in range(PRECISAO_GEOHASH, 0, -1):
+        altura, largura = _tamanho_celula(precisao)
+        linhas = math.floor(lat_max / altura) - math.floor(lat_min / altura) + 1
+        colunas = math.floor(lon_max / largura) - math.floor(lon_min / largura) + 1
+        if linhas * colunas <= MAX_CELULAS or precisao == 1:
+            break
+
+    celulas = set()
+    for i in range(linhas):
+        ponto_lat = min(lat_min + i * altura, lat_max)
+        for j in range(colunas):
+            ponto_lon = min(lon_min + j * largura, lon_max)
+            ponto_lon = (ponto_lon + 180.0) % 360.0 - 180.0
+            celulas.add(codificar_geohash(ponto_lat, ponto_lon, precisao))
+    return sorted(celulas)
+
+
+def distancia_km(origem: Coordenadas, destino: Coordenadas) -> float:
+    lat1, lon1 = map(math.radians, origem)
+    lat2, lon2 = map(math.radians, destino)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def filtro_raio(lat_coluna, lon_coluna, geohash_coluna, centro: Coordenadas, raio_km: float) -> list:
+    """Condições SQL para pontos a até ``raio_km`` do centro.
+
+    As faixas de geohash usam o índice btree e descartam quase tudo; a distância
+    equirretangular (só aritmética, portável entre bancos) refina o círculo.
+    """
+    lat, lon = centro
+    celulas = celulas_cobrindo(lat, lon, raio_km)
+    if DIALETO == "sqlite":
+        # o SQLite compara texto byte a byte e "~" vem depois de todo o alfabeto
+        # base32: [celula, celula~) é o prefixo, atendido pelo índice comum
+        faixas = [and_(geohash_coluna >= celula, geohash_coluna < celula + "~") for celula in celulas]
+    else:
+        # nos collations usuais do PostgreSQL (en_US, pt_BR) "~" não ordena depois
+        # de [0-9a-z]; LIKE 'celula%' usa o índice text_pattern_ops
+        faixas = [geohash_coluna.like(celula + "%") for celula in celulas]
+    escala = math.cos(math.radians(lat))
+    delta_lat = lat_coluna - lat
+    delta_lon = (lon_coluna - lon) * escala
+    return [or_(*faixas), delta_lat * delta_lat + delta_lon * delta_lon <= (raio_km / KM_POR_GRAU) ** 2]
+
+
+def localizar(texto: Optional[str]) -> dict:
+    """lat/lon/geohash do CEP contido no texto (ou vazios se não for possível geocodificar)."""
+    coordenadas = geocodificar_cep(extrair_cep(texto))
+    if coordenadas is None:
+        return {"lat": None, "lon": None, "geohash": None}
+    lat, lon = coordenadas
+    return {"lat": lat, "lon": lon, "geohash": codificar_geohash(lat, lon)}
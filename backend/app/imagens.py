@@ -0,0 +1,103 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from app.config import IMAGEM_QUALIDADE, IMAGEM_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# maior lado, em pixels, de cada variante gerada
+VARIANTES = {"thumb": 160, "card": 480, "full": 1280}
+
+FORMATOS = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+
+def gerar_variantes(conteudo: bytes) -> Dict[str, Dict[str, bytes]]:
+    """Redimensiona a imagem original em WebP e JPEG, sem os metadados EXIF.
+
+    Roda nos processos do pool de imagens; devolve {variante: {formato: bytes}}.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(conteudo)) as original:
+        # aplica a rotação do EXIF antes de descartá-lo
+        imagem = ImageOps.exif_transpose(original).convert("RGB")
+
+    resultado = {}
+    for variante, lado in VARIANTES.items():
+        copia = imagem.copy()
+        copia.thumbnail((lado, lado), Image.LANCZOS)
+        resultado[variante] = {}
+        for formato, pil in (("webp", "WEBP"), ("jpg", "JPEG")):
+            saida = io.BytesIO()
+            copia.save(saida, pil, quality=IMAGEM_QUALIDADE, optimize=True)
+            resultado[variante][formato] = saida.getvalue()
+    return resultado
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _pool_imagens() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGEM_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def gerar_variantes_async(conteudo: bytes) -> Dict[str, Dict[str, bytes]]:
+    return await asyncio.get_running_loop().run_in_executor(_pool_imagens(), gerar_variantes, conteudo)
+
+
+def encerrar_pool_imagens():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+
+
+def chave_variante(sha256: str, variante: str, formato: str) -> str:
+    return f"animais/{sha256[:2]}/{sha256}_{variante}.{formato}"
+
+
+async def processar_foto_animal(animal_id: int, chave_original: str, sha256: str):
+    """Gera e grava as variantes da foto e registra as URLs WebP no animal."""
+    from app.armazenamento import armazenamento
+    from app.cache import invalidar_cache
+    from app.database import abrir_sessao
+    from app.models import Animal
+    from app.eventos import Evento, publicar_eventos
+    from app.mudancas import ATUALIZADO, registrar_mudanca
+    from app.routes.animais import CAMPOS_ANIMAL
+
+    if not await armazenamento.existe(chave_variante(sha256, "full", "webp")):
+        try:
+            variantes = await gerar_variantes_async(await armazenamento.ler(chave_original))
+        except Exception:
+            logger.exception("Falha ao gerar variantes da foto do animal %s", animal_id)
+            return
+        for variante, formatos in variantes.items():
+            for formato, dados in formatos.items():
+                await armazenamento.salvar_bytes(chave_variante(sha256, variante, formato), dados, FORMATOS[formato])
+
+    async with abrir_sessao() as session:
+        animal = await session.get(Animal, animal_id)
+        # outra foto pode ter sido enviada enquanto as variantes eram geradas
+        if not animal or animal.foto_url != armazenamento.url(chave_original):
+            return
+        animal.foto_thumb_url = armazenamento.url(chave_variante(sha256, "thumb", "webp"))
+        animal.foto_card_url = armazenamento.url(chave_variante(sha256, "card", "webp"))
+        animal.foto_full_url = armazenamento.url(chave_variante(sha256, "full", "webp"))
+        session.add(animal)
+        mudanca = registrar_mudanca(session, animal.id, ATUALIZADO, {
+            "foto_thumb_url": animal.foto_thumb_url,
+            "foto_card_url": animal.foto_card_url,
+            "foto_full_url": animal.foto_full_url,
+        })
+        await session.commit()
+        estado = {campo: getattr(animal, campo) for campo in CAMPOS_ANIMAL}
+    await invalidar_cache("animais")
+    await publicar_eventos(Evento(ATUALIZADO, animal_id, mudanca.id, estado))
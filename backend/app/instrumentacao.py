@@ -0,0 +1,277 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.routing import Match
+
+from app.config import DB_CONSULTA_LENTA_MS, INSTRUMENTACAO, SERVER_TIMING
+
+logger = logging.getLogger("app.consultas_lentas")
+
+
+@dataclass
+class Medicao:
+    inicio: float
+    consultas: int = 0
+    tempo_db: float = 0.0
+    tempo_serializacao: float = 0.0
+    fim_endpoint: Optional[float] = None
+    # depois da resposta enviada (background tasks) nada mais é contado
+    encerrada: bool = False
+
+
+_medicao: ContextVar[Optional[Medicao]] = ContextVar("medicao", default=None)
+
+
+def _parametros_ocultos(parametros):
+    # só os tipos: valores podem conter senhas, e-mails e hashes
+    if isinstance(parametros, dict):
+        return {nome: type(valor).__name__ for nome, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        if parametros and isinstance(parametros[0], (dict, list, tuple)):
+            return [f"{len(parametros)} conjuntos de parâmetros"]
+        return [type(valor).__name__ for valor in parametros]
+    return parametros
+
+
+def _antes(conn, cursor, statement, parametros, context, executemany):
+    conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+
+def _depois(conn, cursor, statement, parametros, context, executemany):
+    inicios = conn.info.get("inicio_consultas")
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+
+    medicao = _medicao.get()
+    if medicao is not None and not medicao.encerrada:
+        medicao.consultas += 1
+        medicao.tempo_db += duracao
+
+    if DB_CONSULTA_LENTA_MS and duracao * 1000 >= DB_CONSULTA_LENTA_MS:
+        logger.warning(
+            "consulta lenta (%.1f ms): %s | parâmetros: %s",
+            duracao * 1000, " ".join(statement.split()), _parametros_ocultos(parametros),
+        )
+
+
+def instrumentar_engine(engine):
+    """Registra os hooks de tempo no engine síncrono (no modo assíncrono, ``async_engine.sync_engine``)."""
+    event.listen(engine, "before_cursor_execute", _antes)
+    event.listen(engine, "after_cursor_execute", _depois)
+
+
+class RotaInstrumentada(APIRoute):
+    """APIRoute que separa o tempo de serialização do tempo do endpoint.
+
+    Marca o fim do endpoint e mede até a resposta pronta: validação pelo
+    response_model, jsonable_encoder e renderização do corpo. Rotas que já
+    devolvem a Response pronta (ex.: ``paginar``) renderizam dentro do endpoint.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def marcado(*args, **kwargs):
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    _marcar_fim_endpoint()
+        else:
+            @functools.wraps(endpoint)
+            def marcado(*args, **kwargs):
+                try:
+                    return endpoint(*args, **kwargs)
+                finally:
+                    _marcar_fim_endpoint()
+        # o handler lê dependant.call a cada chamada
+        self.dependant.call = marcado
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def instrumentado(request):
+            resposta = await handler(request)
+            medicao = _medicao.get()
+            if medicao is not None and medicao.fim_endpoint is not None:
+                medicao.tempo_serializacao += time.perf_counter() - medicao.fim_endpoint
+                medicao.fim_endpoint = None
+            return resposta
+
+        return instrumentado
+
+
+def _marcar_fim_endpoint():
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.fim_endpoint = time.perf_counter()
+
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histograma:
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str], buckets: Sequence[float]):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valores_rotulos: Tuple[str, ...], valor: float):
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                # contagens por bucket (não cumulativas), soma, total
+                serie = self._series[valores_rotulos] = [[0] * len(self.buckets), 0.0, 0]
+            posicao = bisect_left(self.buckets, valor)
+            if posicao < len(self.buckets):
+                serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = [(rotulos, list(contagens), soma, total) for rotulos, (contagens, soma, total) in self._series.items()]
+        for valores, contagens, soma, total in sorted(series):
+            base = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.rotulos, valores))
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                linhas.append(f'{self.nome}_bucket{{{base},le="{limite}"}} {acumulado}')
+            linhas.append(f'{self.nome}_bucket{{{base},le="+Inf"}} {total}')
+            linhas.append(f"{self.nome}_sum{{{base}}} {soma}")
+            linhas.append(f"{self.nome}_count{{{base}}} {total}")
+        return "\n".join(linhas)
+
+
+class Contador:
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str]):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._series: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+        CONTADORES.append(self)
+
+    def incrementar(self, valores_rotulos: Tuple[str, ...], valor: int = 1):
+        with self._lock:
+            self._series[valores_rotulos] = self._series.get(valores_rotulos, 0) + valor
+
+    def exportar(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for valores, total in series:
+            base = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.rotulos, valores))
+            linhas.append(f"{self.nome}{{{base}}} {total}")
+        return "\n".join(linhas)
+
+
+# contadores de outros módulos (ex.: limite de taxa) se registram aqui ao serem criados
+CONTADORES: list = []
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+ROTULOS = ("metodo", "rota", "status")
+duracao_requisicoes = Histograma(
+    "http_requisicao_duracao_segundos", "Latência total da requisição", ROTULOS, BUCKETS_SEGUNDOS
+)
+tempo_db_requisicoes = Histograma(
+    "http_requisicao_db_segundos", "Tempo gasto no banco por requisição", ROTULOS, BUCKETS_SEGUNDOS
+)
+serializacao_requisicoes = Histograma(
+    "http_requisicao_serializacao_segundos", "Tempo de serialização da resposta", ROTULOS, BUCKETS_SEGUNDOS
+)
+consultas_requisicoes = Histograma(
+    "http_requisicao_consultas", "Consultas SQL por requisição", ROTULOS, BUCKETS_CONSULTAS
+)
+HISTOGRAMAS = (duracao_requisicoes, tempo_db_requisicoes, serializacao_requisicoes, consultas_requisicoes)
+
+
+def metricas_prometheus(gauges: Dict[str, float]) -> str:
+    """Histogramas por rota e contadores deste processo mais os gauges informados (ex.: pool de conexões)."""
+    partes = [histograma.exportar() for histograma in HISTOGRAMAS]
+    partes += [contador.exportar() for contador in CONTADORES]
+    for nome, valor in gauges.items():
+        partes.append(f"# TYPE {nome} gauge\n{nome} {valor}")
+    return "\n".join(partes) + "\n"
+
+
+def _rota(scope) -> str:
+    rota = scope.get("route")
+    if rota is not None:
+        return rota.path
+    # respostas servidas antes do roteamento (ex.: cache) não têm rota no scope
+    app = scope.get("app")
+    for candidata in getattr(getattr(app, "router", None), "routes", ()):
+        correspondencia, _ = candidata.matches(scope)
+        if correspondencia == Match.FULL:
+            return candidata.path
+    return "desconhecida"
+
+
+def _server_timing(medicao: Medicao, agora: float) -> bytes:
+    return (
+        f'db;dur={medicao.tempo_db * 1000:.2f};desc="{medicao.consultas} consultas", '
+        f"ser;dur={medicao.tempo_serializacao * 1000:.2f}, "
+        f"total;dur={(agora - medicao.inicio) * 1000:.2f}"
+    ).encode()
+
+
+class InstrumentacaoMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not INSTRUMENTACAO or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicao = Medicao(inicio=time.perf_counter())
+        token = _medicao.set(medicao)
+        status = 500
+
+        def registrar():
+            medicao.encerrada = True
+            rotulos = (scope["method"], _rota(scope), str(status))
+            duracao_requisicoes.observar(rotulos, time.perf_counter() - medicao.inicio)
+            tempo_db_requisicoes.observar(rotulos, medicao.tempo_db)
+            serializacao_requisicoes.observar(rotulos, medicao.tempo_serializacao)
+            consultas_requisicoes.observar(rotulos, medicao.consultas)
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                if SERVER_TIMING:
+                    headers = list(mensagem.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(medicao, time.perf_counter())))
+                    mensagem = {**mensagem, "headers": headers}
+            await send(mensagem)
+            if mensagem["type"] == "http.response.body" and not mensagem.get("more_body", False):
+                registrar()
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao.reset(token)
+            if not medicao.encerrada:
+                registrar()
@@ -0,0 +1,303 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Tuple
+from urllib.parse import parse_qs
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from app.config import (
+    LIMITE_CADASTRO_IP,
+    LIMITE_LOGIN_CONTA,
+    LIMITE_LOGIN_IP,
+    LIMITES_BACKEND,
+    LIMITES_MAX_CHAVES,
+    LIMITES_PROXIES,
+    LIMITES_REDIS_URL,
+)
+from app.instrumentacao import Contador
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Limite:
+    capacidade: int
+    periodo: float
+
+    @property
+    def taxa(self) -> float:
+        # fichas devolvidas ao balde por segundo
+        return self.capacidade / self.periodo
+
+
+def ler_limite(valor: str) -> Optional[Limite]:
+    """Converte "requisições/segundos" (ex.: "20/60"); vazio ou "0" desliga o limite."""
+    valor = valor.strip()
+    if not valor or valor == "0":
+        return None
+    capacidade, _, periodo = valor.partition("/")
+    return Limite(int(capacidade), float(periodo or 1))
+
+
+class BaldesMemoria:
+    """Token buckets em processo; as chaves menos usadas saem primeiro quando o limite de chaves estoura."""
+
+    def __init__(self, max_chaves: int):
+        self.max_chaves = max_chaves
+        self._baldes: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consumir(self, chave: str, limite: Limite) -> float:
+        """Retira uma ficha; devolve 0 se havia ficha ou os segundos até a próxima."""
+        agora = time.monotonic()
+        with self._lock:
+            fichas, atualizado = self._baldes.pop(chave, (limite.capacidade, agora))
+            fichas = min(limite.capacidade, fichas + (agora - atualizado) * limite.taxa)
+            espera = 0.0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / limite.taxa
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.max_chaves:
+                self._baldes.popitem(last=False)
+        return espera
+
+
+# atômico no Redis; o relógio é o do servidor, igual para todos os workers
+_SCRIPT_BALDE = """
+local capacidade = tonumber(ARGV[1])
+local taxa = tonumber(ARGV[2])
+local relogio = redis.call('TIME')
+local agora = tonumber(relogio[1]) + tonumber(relogio[2]) / 1000000
+local estado = redis.call('HMGET', KEYS[1], 'fichas', 'atualizado')
+local fichas = tonumber(estado[1]) or capacidade
+local atualizado = tonumber(estado[2]) or agora
+fichas = math.min(capacidade, fichas + math.max(0, agora - atualizado) * taxa)
+local espera = 0
+if fichas >= 1 then
+    fichas = fichas - 1
+else
+    espera = (1 - fichas) / taxa
+end
+redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'atualizado', tostring(agora))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacidade / taxa * 1000))
+return tostring(espera)
+"""
+
+
+class BaldesRedis:
+    """Token buckets compartilhados entre workers e máquinas."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.cliente = redis.Redis.from_url(url)
+        self._script = self.cliente.register_script(_SCRIPT_BALDE)
+
+    async def consumir(self, chave: str, limite: Limite) -> float:
+        espera = await self._script(keys=[f"limite:{chave}"], args=[limite.capacidade, limite.taxa])
+        return float(espera)
+
+
+def criar_baldes():
+    if LIMITES_BACKEND == "redis":
+        return BaldesRedis(LIMITES_REDIS_URL)
+    if LIMITES_BACKEND == "memoria":
+        return BaldesMemoria(LIMITES_MAX_CHAVES)
+    return None
+
+
+baldes = criar_baldes()
+
+
+@dataclass(frozen=True)
+class Regra:
+    nome: str
+    metodo: str
+    padrao: Pattern
+    por_ip: Optional[Limite]
+    por_conta: Optional[Limite] = None
+    # campo do formulário que identifica a conta
+    campo_conta: Optional[str] = None
+
+
+REGRAS: List[Regra] = [
+    Regra("login", "POST", re.compile(r"^/(usuarios/)?login$"),
+          ler_limite(LIMITE_LOGIN_IP), ler_limite(LIMITE_LOGIN_CONTA), "username"),
+    Regra("cadastro", "POST", re.compile(r"^/usuarios/?$"), ler_limite(LIMITE_CADASTRO_IP)),
+]
+
+# formulários de login são pequenos; acima disso (ou com campos demais) o login é recusado
+MAX_CORPO_CONTA = 16 * 1024
+MAX_CAMPOS_CONTA = 20
+
+verificacoes_limite = Contador(
+    "limite_taxa_verificacoes_total", "Requisições verificadas pelo limite de taxa", ("regra",)
+)
+bloqueios_limite = Contador(
+    "limite_taxa_bloqueios_total", "Requisições recusadas com 429 pelo limite de taxa", ("regra", "chave")
+)
+
+
+def _regra(metodo: str, path: str) -> Optional[Regra]:
+    for regra in REGRAS:
+        if regra.metodo == metodo and regra.padrao.match(path):
+            return regra
+    return None
+
+
+def ip_cliente(scope) -> str:
+    cliente = scope.get("client")
+    ip = cliente[0] if cliente else "desconhecido"
+    if LIMITES_PROXIES:
+        # o último proxy confiável acrescenta o IP que se conectou a ele; o que vem antes é do cliente
+        encaminhado = dict(scope["headers"]).get(b"x-forwarded-for", b"").decode("latin-1")
+        saltos = [salto.strip() for salto in encaminhado.split(",") if salto.strip()]
+        if len(saltos) >= LIMITES_PROXIES:
+            ip = saltos[-LIMITES_PROXIES]
+    return ip
+
+
+def _resumo(valor: str) -> str:
+    # não guarda e-mails no backend de limites
+    return hashlib.sha1(valor.strip().lower().encode()).hexdigest()
+
+
+async def _ler_corpo(receive, maximo: int):
+    mensagens = []
+    partes = []
+    tamanho = 0
+    while True:
+        mensagem = await receive()
+        mensagens.append(mensagem)
+        if mensagem["type"] != "http.request":
+            break
+        corpo = mensagem.get("body", b"")
+        partes.append(corpo)
+        tamanho += len(corpo)
+        if not mensagem.get("more_body", False) or tamanho > maximo:
+            break
+    corpo = b"".join(partes) if tamanho <= maximo else None
+    return corpo, mensagens
+
+
+class LimiteTaxaMiddleware:
+    """Recusa com 429 o excesso de tentativas antes de abrir sessão no banco ou calcular bcrypt."""
+
+    def __init__(self, app, baldes_limite=None):
+        self.app = app
+        self.baldes = baldes_limite if baldes_limite is not None else baldes
+
+    async def __call__(self, scope, receive, send):
+        if self.baldes is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        regra = _regra(scope["method"], scope["path"])
+        if regra is None:
+            await self.app(scope, receive, send)
+            return
+
+        verificacoes_limite.incrementar((regra.nome,))
+        if regra.por_ip is not None:
+            espera = await self._consumir(f"{regra.nome}:ip:{ip_cliente(scope)}", regra.por_ip)
+            if espera:
+                bloqueios_limite.incrementar((regra.nome, "ip"))
+                await self._recusar(send, espera)
+                return
+
+        if regra.por_conta is not None:
+            # sem a conta não há limite por conta: o request não segue adiante
+            conta, mensagens, erro = await self._conta(scope, receive, regra.campo_conta)
+            if erro is not None:
+                await self._responder_erro(send, *erro)
+                return
+            receive = _repetir(mensagens, receive)
+            espera = await self._consumir(f"{regra.nome}:conta:{_resumo(conta)}", regra.por_conta)
+            if espera:
+                bloqueios_limite.incrementar((regra.nome, "conta"))
+                await self._recusar(send, espera)
+                return
+
+        await self.app(scope, receive, send)
+
+    async def _consumir(self, chave: str, limite: Limite) -> float:
+        try:
+            return await self.baldes.consumir(chave, limite)
+        except Exception:
+            # backend fora do ar não derruba o login
+            logger.exception("Falha ao consultar o limite de taxa")
+            return 0.0
+
+    async def _conta(self, scope, receive, campo: str):
+        """(conta, mensagens lidas, erro): ``erro`` é (status, detalhe) quando a conta não pode ser lida."""
+        headers = Headers(scope=scope)
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(("application/x-www-form-urlencoded", "multipart/form-data")):
+            return None, [], (400, "Envie o login como formulário")
+        corpo, mensagens = await _ler_corpo(receive, MAX_CORPO_CONTA)
+        if corpo is None:
+            return None, mensagens, (413, "Formulário de login grande demais")
+        try:
+            if content_type.startswith("multipart/form-data"):
+                valores = await _campos_multipart(headers, corpo)
+            else:
+                valores = parse_qs(corpo.decode("latin-1"), max_num_fields=MAX_CAMPOS_CONTA)
+        except (MultiPartException, ValueError):
+            return None, mensagens, (400, "Formulário de login inválido")
+        conta = (valores.get(campo) or [None])[0]
+        if not isinstance(conta, str) or not conta.strip():
+            return None, mensagens, (400, f"Informe o campo {campo}")
+        return conta, mensagens, None
+
+    async def _recusar(self, send, espera: float):
+        segundos = max(1, math.ceil(espera))
+        await self._responder_erro(
+            send, 429, f"Muitas tentativas. Tente novamente em {segundos} segundos.",
+            [(b"retry-after", str(segundos).encode())],
+        )
+
+    async def _responder_erro(self, send, status: int, detalhe: str, headers=()):
+        corpo = orjson.dumps({"detail": detalhe})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(corpo)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": corpo})
+
+
+async def _campos_multipart(headers: Headers, corpo: bytes) -> dict:
+    async def fluxo():
+        yield corpo
+
+    # arquivos não fazem parte de um login: max_files=0 os recusa sem gravar nada
+    parser = MultiPartParser(headers, fluxo(), max_files=0, max_fields=MAX_CAMPOS_CONTA)
+    campos = {}
+    for nome, valor in (await parser.parse()).multi_items():
+        campos.setdefault(nome, []).append(valor)
+    return campos
+
+
+def _repetir(mensagens, receive):
+    # devolve ao app o corpo já lido e depois segue com o receive original
+    pendentes = list(mensagens)
+
+    async def repetir():
+        if pendentes:
+            return pendentes.pop(0)
+        return await receive()
+
+    return repetir
@@ -0,0 +1,283 @@
+import codecs
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import LOTE_MAX_BYTES, LOTE_MAX_REGISTRO_BYTES, LOTE_TAMANHO_BLOCO
+from app.database import abrir_sessao, particoes
+
+TIPOS_JSON = ("application/json",)
+TIPOS_NDJSON = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+TIPOS_CSV = ("text/csv",)
+
+# (número do registro no arquivo, dados validados)
+Registro = Tuple[int, dict]
+
+
+class ErroImportacao(BaseModel):
+    linha: Optional[int]
+    detalhe: Any
+
+
+class ResultadoImportacao(BaseModel):
+    inseridos: int
+    ids: List[int]
+    erros: List[ErroImportacao]
+
+
+@dataclass
+class ResultadoLote:
+    inseridos: int = 0
+    ids: List[int] = field(default_factory=list)
+    erros: List[dict] = field(default_factory=list)
+
+    def erro(self, linha: Optional[int], detalhe):
+        self.erros.append({"linha": linha, "detalhe": detalhe})
+
+
+async def _texto(request: Request) -> AsyncIterator[str]:
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > LOTE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo permitido")
+
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    tamanho = 0
+    async for chunk in request.stream():
+        tamanho += len(chunk)
+        if tamanho > LOTE_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo permitido")
+        try:
+            texto = decodificador.decode(chunk)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="O arquivo deve estar em UTF-8")
+        if texto:
+            yield texto
+    final = decodificador.decode(b"", final=True)
+    if final:
+        yield final
+
+
+async def _linhas(textos: AsyncIterator[str]) -> AsyncIterator[str]:
+    resto = ""
+    async for texto in textos:
+        resto += texto
+        *completas, resto = resto.split("\n")
+        if len(resto) > LOTE_MAX_REGISTRO_BYTES:
+            raise HTTPException(status_code=400, detail="Registro excede o tamanho máximo permitido")
+        for linha in completas:
+            yield linha
+    if resto:
+        yield resto
+
+
+async def _registros_ndjson(textos):
+    numero = 0
+    async for linha in _linhas(textos):
+        numero += 1
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except json.JSONDecodeError as erro:
+            yield numero, erro
+
+
+async def _registros_json(textos):
+    """Objetos de um array JSON, decodificados à medida que chegam."""
+    decodificador = json.JSONDecoder()
+    buffer = ""
+    inicio_array = False
+    numero = 0
+    fim = False
+    async for texto in textos:
+        buffer += texto
+        while True:
+            buffer = buffer.lstrip()
+            if not inicio_array:
+                if not buffer:
+                    break
+                if buffer[0] != "[":
+                    raise HTTPException(status_code=400, detail="Esperado um array JSON")
+                buffer = buffer[1:]
+                inicio_array = True
+                continue
+            if buffer.startswith(","):
+                buffer = buffer[1:]
+                continue
+            if buffer.startswith("]"):
+                fim = True
+                buffer = buffer[1:]
+                break
+            if not buffer:
+                break
+            try:
+                objeto, posicao = decodificador.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # objeto incompleto: espera o próximo trecho
+                if len(buffer) > LOTE_MAX_REGISTRO_BYTES:
+                    raise HTTPException(status_code=400, detail="JSON inválido ou registro grande demais")
+                break
+            numero += 1
+            buffer = buffer[posicao:]
+            yield numero, objeto
+        if fim:
+            break
+    if not fim or buffer.strip():
+        raise HTTPException(status_code=400, detail="JSON inválido: array não terminado")
+
+
+async def _registros_csv(textos):
+    cabecalho = None
+    numero = 1
+    # linhas do registro atual: campos entre aspas podem conter quebras de linha.
+    # As aspas e o tamanho são somados linha a linha, sem reler o que já foi acumulado
+    partes: List[str] = []
+    aspas = 0
+    tamanho = 0
+    async for linha in _linhas(textos):
+        partes.append(linha)
+        aspas += linha.count('"')
+        tamanho += len(linha) + 1
+        if aspas % 2:
+            if tamanho > LOTE_MAX_REGISTRO_BYTES:
+                raise HTTPException(status_code=400, detail="Registro excede o tamanho máximo permitido")
+            continue
+        registro = "\n".join(partes)
+        partes.clear()
+        aspas = tamanho = 0
+        valores = next(csv.reader([registro.rstrip("\r")]), [])
+        if cabecalho is None:
+            cabecalho = [nome.strip() for nome in valores]
+            continue
+        numero += 1
+        if not any(valor.strip() for valor in valores):
+            continue
+        if len(valores) != len(cabecalho):
+            yield numero, ValueError(f"esperadas {len(cabecalho)} colunas, encontradas {len(valores)}")
+            continue
+        # célula vazia no CSV é ausência de valor
+        yield numero, {nome: (valor if valor.strip() else None) for nome, valor in zip(cabecalho, valores)}
+
+
+def _registros(request: Request):
+    tipo = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    textos = _texto(request)
+    if tipo in TIPOS_JSON:
+        return _registros_json(textos)
+    if tipo in TIPOS_NDJSON:
+        return _registros_ndjson(textos)
+    if tipo in TIPOS_CSV:
+        return _registros_csv(textos)
+    raise HTTPException(status_code=415, detail="Envie JSON, NDJSON ou CSV")
+
+
+InserirBloco = Callable[[object, List[Registro], ResultadoLote], Awaitable[List[int]]]
+
+
+async def importar_lote(request: Request, session, esquema: Type[BaseModel], inserir_bloco: InserirBloco) -> ResultadoLote:
+    """Valida os registros em blocos de LOTE_TAMANHO_BLOCO e grava cada bloco numa transação.
+
+    ``inserir_bloco`` recebe os registros válidos do bloco, grava-os (sem commit),
+    anota os registros recusados no resultado e devolve os ids criados. Uma falha do banco descarta só o bloco atual;
+    um arquivo malformado no meio do envio mantém os blocos já gravados.
+    """
+    resultado = ResultadoLote()
+    bloco: List[Registro] = []
+
+    async def gravar():
+        try:
+            ids = await inserir_bloco(session, bloco, resultado)
+            await session.commit()
+            resultado.ids.extend(ids)
+        except SQLAlchemyError as erro:
+            await session.rollback()
+            motivo = str(getattr(erro, "orig", erro)).splitlines()[0]
+            for numero, _ in bloco:
+                resultado.erro(numero, f"Falha ao gravar o bloco: {motivo}")
+        bloco.clear()
+
+    registros = _registros(request)
+    while True:
+        try:
+            numero, dados = await registros.__anext__()
+        except StopAsyncIteration:
+            break
+        except HTTPException as erro:
+            # blocos anteriores já foram gravados: informa o que entrou e onde parou
+            if not resultado.ids:
+                raise
+            bloco.clear()
+            resultado.erro(None, erro.detail)
+            break
+        if isinstance(dados, Exception):
+            resultado.erro(numero, str(dados))
+            continue
+        if not isinstance(dados, dict):
+            resultado.erro(numero, "Cada registro deve ser um objeto")
+            continue
+        try:
+            bloco.append((numero, esquema(**dados).dict()))
+        except ValidationError as erro:
+            resultado.erro(numero, [
+                {"campo": ".".join(map(str, detalhe["loc"])), "mensagem": detalhe["msg"]}
+                for detalhe in erro.errors()
+            ])
+            continue
+        if len(bloco) >= LOTE_TAMANHO_BLOCO:
+            await gravar()
+    if bloco:
+        await gravar()
+
+    resultado.inseridos = len(resultado.ids)
+    resultado.erros.sort(key=lambda erro: (erro["linha"] is None, erro["linha"] or 0))
+    return resultado
+
+
+def _valor_exportado(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def exportar(statement, campos: Sequence[str], formato: str, nome_arquivo: str) -> StreamingResponse:
+    """Resposta em NDJSON ou CSV lida do banco em partições, com sessão própria.
+
+    A sessão da requisição já foi fechada quando o corpo é transmitido, por isso
+    o gerador abre a sua.
+    """
+    async def ndjson():
+        async with abrir_sessao() as session:
+            async for linhas in particoes(session, statement, LOTE_TAMANHO_BLOCO):
+                yield b"".join(orjson.dumps(dict(zip(campos, linha)), option=orjson.OPT_APPEND_NEWLINE) for linha in linhas)
+
+    async def csv_():
+        saida = io.StringIO()
+        escritor = csv.writer(saida)
+        escritor.writerow(campos)
+        yield saida.getvalue()
+        async with abrir_sessao() as session:
+            async for linhas in particoes(session, statement, LOTE_TAMANHO_BLOCO):
+                saida.seek(0)
+                saida.truncate()
+                escritor.writerows([_valor_exportado(valor) for valor in linha] for linha in linhas)
+                yield saida.getvalue()
+
+    if formato == "csv":
+        corpo, tipo = csv_(), "text/csv; charset=utf-8"
+    else:
+        corpo, tipo = ndjson(), "application/x-ndjson"
+    extensao = "csv" if formato == "csv" else "ndjson"
+    return StreamingResponse(
+        corpo,
+        media_type=tipo,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}.{extensao}"'},
+    )
@@ -1,22 +1,49 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from app.database import create_db_and_tables
-from app.routes import usuarios, animais, ongs, auth
+from fastapi.responses import ORJSONResponse
+from app.auth import encerrar_pool_hash
+from app.cache import CacheRespostasMiddleware
+from app.compressao import CompressaoMiddleware
+from app.config import MIGRAR_AO_INICIAR
+from app.database import aplicar_migracoes
+from app.eventos import encerrar_eventos
+from app.geo import carregar_ceps
+from app.imagens import encerrar_pool_imagens
+from app.instrumentacao import InstrumentacaoMiddleware
+from app.limites import LimiteTaxaMiddleware
+from app.routes import usuarios, animais, ongs, auth, metricas, midia, adocoes, saude
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+app.add_middleware(CacheRespostasMiddleware)
+# antes das rotas: tentativas em excesso não chegam ao banco nem ao bcrypt
+app.add_middleware(LimiteTaxaMiddleware)
+# comprime as respostas do cache também; o cache guarda o corpo original
+app.add_middleware(CompressaoMiddleware)
+# a mais externa: mede também as respostas servidas pelo cache
+app.add_middleware(InstrumentacaoMiddleware)
 
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
-
+    # em produção as migrações rodam antes, com python -m app.migrar
+    if MIGRAR_AO_INICIAR:
+        aplicar_migracoes()
+    carregar_ceps()
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+@app.on_event("shutdown")
+async def on_shutdown():
+    await encerrar_eventos()
+    encerrar_pool_hash()
+    encerrar_pool_imagens()
 
 
 app.include_router(usuarios.router)
 app.include_router(animais.router)
 app.include_router(ongs.router)
 app.include_router(auth.router)
+app.include_router(metricas.router)
+app.include_router(midia.router)
+app.include_router(adocoes.router)
+app.include_router(saude.router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,22 @@
+"""Aplica as migrações pendentes do banco.
+
+    python -m app.migrar
+
+Rode uma vez por deploy, antes de subir os workers da API: eles não criam
+nem alteram o esquema ao iniciar (a menos que MIGRAR_AO_INICIAR=1), então
+vários processos não disputam a mesma migração e o boot não espera por ela.
+"""
+import json
+import time
+
+from app.database import aplicar_migracoes
+
+
+def main():
+    inicio = time.perf_counter()
+    aplicar_migracoes()
+    print(json.dumps({"segundos": round(time.perf_counter() - inicio, 2)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
+from datetime import datetime, timezone
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import JSON, BigInteger, DateTime, FetchedValue, Index, func, text
 from sqlmodel import SQLModel, Field, Relationship
 
 class UsuarioOngAssociacao(SQLModel, table=True):
     usuario_id: Optional[int] = Field(default=None, foreign_key="usuario.id", primary_key=True)
-    ong_id: Optional[int] = Field(default=None, foreign_key="ong.id", primary_key=True)
+    ong_id: Optional[int] = Field(default=None, foreign_key="ong.id", primary_key=True, index=True)
 
 class Ong(SQLModel, table=True):
+    __table_args__ = (
+        # text_pattern_ops: o LIKE 'prefixo%' da busca por proximidade usa o índice em qualquer collation
+        Index("ix_ong_geohash", "geohash", postgresql_ops={"geohash": "text_pattern_ops"}),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     nome: str
     email: str
@@ -13,13 +20,16 @@ class Ong(SQLModel, table=True):
     endereco: str
     rede_social: Optional[str] = None
     site: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    geohash: Optional[str] = None
 
     administradores: List["Usuario"] = Relationship(back_populates="ongs", link_model=UsuarioOngAssociacao)
 
 class Usuario(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     nome: str
-    email: str
+    email: str = Field(index=True, unique=True)
     telefone: str
     endereco_cep: str
     endereco_completo: str
@@ -30,13 +40,39 @@ class Usuario(SQLModel, table=True):
     possui_animais: Optional[bool] = None
     tipo_animais: Optional[str] = None
     qtde_animais: Optional[int] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
     is_admin: bool
     senha: str
-    ong_id: Optional[int] = Field(default=None, foreign_key="ong.id")
+    ong_id: Optional[int] = Field(default=None, foreign_key="ong.id", index=True)
+    token_versao: int = 0
 
     ongs: List["Ong"] = Relationship(back_populates="administradores", link_model=UsuarioOngAssociacao)
 
 class Animal(SQLModel, table=True):
+    __table_args__ = (
+        # GET /animais (filtros de convivência) e /animais/busca (espécie e porte)
+        Index(
+            "ix_animal_disponivel_sociavel",
+            "sociavel_com_gatos", "sociavel_com_caes", "id",
+            postgresql_where=text("disponivel AND deleted_at IS NULL"),
+            sqlite_where=text("disponivel = 1 AND deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_animal_disponivel_especie",
+            "especie", "porte", "id",
+            postgresql_where=text("disponivel AND deleted_at IS NULL"),
+            sqlite_where=text("disponivel = 1 AND deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_animal_disponiveis",
+            "id",
+            postgresql_where=text("disponivel AND deleted_at IS NULL"),
+            sqlite_where=text("disponivel = 1 AND deleted_at IS NULL"),
+        ),
+        Index("ix_animal_ativos", "id", postgresql_where=text("deleted_at IS NULL"), sqlite_where=text("deleted_at IS NULL")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     nome: str
     idade: Optional[int] = None
@@ -53,4 +89,93 @@ class Animal(SQLModel, table=True):
     sociavel_com_gatos: Optional[bool] = None
     sociavel_com_caes: Optional[bool] = None
     foto_url: Optional[str] = None  
-    ong_id: Optional[int] = Field(default=None, foreign_key="usuario.id")
+    foto_thumb_url: Optional[str] = None
+    foto_card_url: Optional[str] = None
+    foto_full_url: Optional[str] = None
+    ong_id: Optional[int] = Field(default=None, foreign_key="ong.id", index=True)
+    # remoção lógica: a linha fica para o histórico e para o feed de mudanças
+    deleted_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    # data de entrada no catálogo; alimenta as estatísticas de entradas por mês
+    criado_em: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True), sa_column_kwargs={"server_default": func.now()},
+    )
+
+class OngEstatistica(SQLModel, table=True):
+    """Contagens de animais ativos por ONG, espécie e mês de entrada, mantidas junto com cada alteração."""
+    ong_id: int = Field(primary_key=True)
+    especie: str = Field(primary_key=True)
+    # "AAAA-MM" do criado_em do animal
+    mes: str = Field(primary_key=True)
+    total: int = 0
+    disponiveis: int = 0
+    vacinados: int = 0
+    castrados: int = 0
+
+class AnimalMudanca(SQLModel, table=True):
+    """Histórico append-only dos animais; (transacao, id) é o cursor de /animais/mudancas."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    animal_id: int = Field(index=True)
+    operacao: str
+    alteracoes: Optional[dict] = Field(default=None, sa_type=JSON)
+    usuario_id: Optional[int] = None
+    criado_em: Optional[datetime] = Field(
+        default=None, sa_type=DateTime(timezone=True), sa_column_kwargs={"server_default": func.now()}
+    )
+    # txid_current() no PostgreSQL (default da migração 0012); nulo no SQLite
+    transacao: Optional[int] = Field(default=None, sa_type=BigInteger, sa_column_kwargs={"server_default": FetchedValue()})
+
+class Adocao(SQLModel, table=True):
+    __table_args__ = (
+        # um pedido pendente por adotante e animal, uma aprovação por animal
+        Index(
+            "ix_adocao_pendente_unica", "animal_id", "usuario_id", unique=True,
+            postgresql_where=text("status = 'pendente'"), sqlite_where=text("status = 'pendente'"),
+        ),
+        Index(
+            "ix_adocao_aprovada_unica", "animal_id", unique=True,
+            postgresql_where=text("status = 'aprovada'"), sqlite_where=text("status = 'aprovada'"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    animal_id: int = Field(foreign_key="animal.id", index=True)
+    usuario_id: int = Field(foreign_key="usuario.id", index=True)
+    # cópia de animal.ong_id no momento do pedido (sem chave estrangeira: não impede excluir a ONG)
+    ong_id: Optional[int] = Field(default=None, index=True)
+    status: str = "pendente"
+    mensagem: Optional[str] = None
+    motivo: Optional[str] = None
+    criado_em: Optional[datetime] = Field(
+        default=None, sa_type=DateTime(timezone=True), sa_column_kwargs={"server_default": func.now()}
+    )
+    decidido_em: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    decidido_por: Optional[int] = None
+
+class Tarefa(SQLModel, table=True):
+    """Fila durável de tarefas em segundo plano, processada por ``python -m app.worker``."""
+    __table_args__ = (
+        Index(
+            "ix_tarefa_pendentes", "executar_em",
+            postgresql_where=text("status = 'pendente'"), sqlite_where=text("status = 'pendente'"),
+        ),
+        Index(
+            "ix_tarefa_executando", "bloqueada_ate",
+            postgresql_where=text("status = 'executando'"), sqlite_where=text("status = 'executando'"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    tipo: str
+    dados: Optional[dict] = Field(default=None, sa_type=JSON)
+    status: str = "pendente"
+    tentativas: int = 0
+    max_tentativas: int = 5
+    executar_em: datetime = Field(sa_type=DateTime(timezone=True))
+    # prazo da execução em andamento; vencido, a tarefa volta para a fila (worker que caiu)
+    bloqueada_ate: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    erro: Optional[str] = None
+    criado_em: Optional[datetime] = Field(
+        default=None, sa_type=DateTime(timezone=True), sa_column_kwargs={"server_default": func.now()}
+    )
+    concluida_em: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, tuple_
+from sqlmodel import select
+
+from app.database import DIALETO
+from app.models import Animal, AnimalMudanca
+from app.paginacao import codificar_cursor, decodificar_cursor
+
+CRIADO = "criado"
+ATUALIZADO = "atualizado"
+REMOVIDO = "removido"
+
+
+def agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def registrar_mudanca(
+    session, animal_id: int, operacao: str, alteracoes: Optional[dict] = None, usuario_id: Optional[int] = None
+) -> AnimalMudanca:
+    """Acrescenta a mudança à transação da sessão: é gravada no mesmo commit da alteração."""
+    mudanca = AnimalMudanca(animal_id=animal_id, operacao=operacao, alteracoes=alteracoes, usuario_id=usuario_id)
+    session.add(mudanca)
+    return mudanca
+
+
+async def registrar_criados(session, ids: Sequence[int], valores: Sequence[dict], usuario_id: Optional[int] = None) -> List[int]:
+    if not ids:
+        return []
+    inseridas = await session.execute(insert(AnimalMudanca).returning(AnimalMudanca.id, sort_by_parameter_order=True), [
+        dict(animal_id=animal_id, operacao=CRIADO, alteracoes=dados, usuario_id=usuario_id)
+        for animal_id, dados in zip(ids, valores)
+    ])
+    return list(inseridas.scalars())
+
+
+async def listar_mudancas(session, campos: Sequence[str], desde: Optional[str], limite: int) -> dict:
+    """Animais alterados depois do cursor, no estado atual, um item por animal.
+
+    O cursor é o id da última mudança lida. Cada item traz o animal como está
+    agora (ou ``removido``), então aplicar o feed em ordem é idempotente mesmo
+    que uma mudança posterior já esteja refletida.
+    """
+    ultima = 0
+    if desde:
+        ultima = decodificar_cursor(desde)["id"]
+
+    query = (
+        select(AnimalMudanca.id, AnimalMudanca.animal_id, Animal.deleted_at, *[getattr(Animal, campo) for campo in campos])
+        .outerjoin(Animal, Animal.id == AnimalMudanca.animal_id)
+        .limit(limite + 1)
+    )
+    if DIALETO == "postgresql":
+        # o id sai da sequência antes do commit: uma transação aberta pode gravar um id
+        # menor que os já visíveis. A ordem é a das transações, e só entram as que
+        # terminaram antes da mais antiga ainda aberta; nenhuma outra pode aparecer antes delas.
+        query = query.where(
+            AnimalMudanca.transacao < func.txid_snapshot_xmin(func.txid_current_snapshot())
+        ).order_by(AnimalMudanca.transacao, AnimalMudanca.id)
+        if ultima:
+            transacao = select(AnimalMudanca.transacao).where(AnimalMudanca.id == ultima).scalar_subquery()
+            query = query.where(tuple_(AnimalMudanca.transacao, AnimalMudanca.id) > tuple_(transacao, ultima))
+    else:
+        # no SQLite as escritas são serializadas: a ordem dos ids é a dos commits
+        query = query.where(AnimalMudanca.id > ultima).order_by(AnimalMudanca.id)
+
+    linhas = (await session.execute(query)).all()
+    mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    # só a mudança mais recente de cada animal na página
+    itens: Dict[int, dict] = {}
+    for mudanca, animal_id, deleted_at, *valores in linhas:
+        animal = dict(zip(campos, valores))
+        removido = deleted_at is not None or animal["id"] is None
+        itens.pop(animal_id, None)
+        itens[animal_id] = {
+            "mudanca": mudanca,
+            "animal_id": animal_id,
+            "removido": removido,
+            "animal": None if removido else animal,
+        }
+    if linhas:
+        ultima = linhas[-1][0]
+
+    return {"itens": list(itens.values()), "proximo_cursor": codificar_cursor({"id": ultima}), "mais": mais}
@@ -0,0 +1,34 @@
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+from typing import Sequence
+
+from app.config import SMTP_HOST, SMTP_PORTA, SMTP_REMETENTE, SMTP_SENHA, SMTP_TLS, SMTP_USUARIO
+
+logger = logging.getLogger(__name__)
+
+
+def _enviar(destinatarios: Sequence[str], assunto: str, corpo: str):
+    mensagem = EmailMessage()
+    mensagem["From"] = SMTP_REMETENTE
+    mensagem["To"] = SMTP_REMETENTE
+    mensagem["Subject"] = assunto
+    mensagem.set_content(corpo)
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORTA, timeout=30) as smtp:
+        if SMTP_TLS:
+            smtp.starttls()
+        if SMTP_USUARIO:
+            smtp.login(SMTP_USUARIO, SMTP_SENHA)
+        # destinatários só no envelope: um não vê o endereço do outro
+        smtp.send_message(mensagem, to_addrs=list(destinatarios))
+
+
+async def enviar_email(destinatarios: Sequence[str], assunto: str, corpo: str):
+    """Envia um e-mail; uma falha propaga para a tarefa ser tentada de novo."""
+    if not destinatarios:
+        return
+    if not SMTP_HOST:
+        logger.info("E-mail para %s: %s\n%s", ", ".join(destinatarios), assunto, corpo)
+        return
+    await asyncio.to_thread(_enviar, destinatarios, assunto, corpo)
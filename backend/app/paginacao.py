@@ -0,0 +1,154 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, func, or_
+from sqlmodel import select
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+class Pagina(BaseModel):
+    itens: List[Dict[str, Any]]
+    proximo_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+@dataclass
+class ParametrosPaginacao:
+    cursor: Optional[str]
+    limit: int
+    ordenar_por: str
+    ordem: str
+    fields: Optional[str]
+    contar_total: bool
+
+
+def parametros_paginacao(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    ordenar_por: str = Query("id"),
+    ordem: str = Query("asc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None),
+    contar_total: bool = Query(True),
+) -> ParametrosPaginacao:
+    return ParametrosPaginacao(cursor, limit, ordenar_por, ordem, fields, contar_total)
+
+
+def codificar_cursor(valores: dict) -> str:
+    bruto = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> dict:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    # bool é subclasse de int, mas não é um id
+    if not isinstance(valores, dict) or type(valores.get("id")) is not int:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valores
+
+
+def _valor_do_tipo(coluna, valor) -> bool:
+    """Se ``valor`` (vindo do cursor) pode ser comparado com a coluna sem erro no banco.
+
+    As chaves de ordenação não são anuláveis, então um cursor legítimo nunca traz null.
+    """
+    try:
+        # AutoString do SQLModel é um TypeDecorator: o tipo Python é o do tipo base
+        tipo = getattr(coluna.type, "impl", coluna.type).python_type
+    except NotImplementedError:
+        return False
+    if tipo in (int, float):
+        return type(valor) in (int, float)
+    return isinstance(valor, tipo)
+
+
+def colunas_selecionadas(fields: Optional[str], permitidos: Sequence[str], ordenar_por: str) -> List[str]:
+    if not fields:
+        return list(permitidos)
+
+    nomes = list(dict.fromkeys(campo.strip() for campo in fields.split(",") if campo.strip()))
+    invalidos = [nome for nome in nomes if nome not in permitidos]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(invalidos)}")
+
+    # id e a chave de ordenação sempre são lidos para montar o próximo cursor
+    for obrigatorio in (ordenar_por, "id"):
+        if obrigatorio not in nomes:
+            nomes.insert(0, obrigatorio)
+    return nomes
+
+
+async def paginar(
+    session,
+    query,
+    modelo,
+    parametros: ParametrosPaginacao,
+    campos_permitidos: Sequence[str],
+    ordenaveis: Sequence[str] = ("id",),
+) -> ORJSONResponse:
+    """Página de linhas lidas coluna a coluna, já no formato de ``Pagina``.
+
+    Devolve a resposta pronta: as linhas vêm do banco em colunas conhecidas,
+    então o FastAPI não precisa revalidá-las pelo response_model nem passá-las
+    pelo jsonable_encoder. O response_model da rota continua documentando o formato.
+    """
+    if parametros.ordenar_por not in ordenaveis:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação permitida apenas por: {', '.join(ordenaveis)}",
+        )
+
+    nomes = colunas_selecionadas(parametros.fields, campos_permitidos, parametros.ordenar_por)
+    chave = getattr(modelo, parametros.ordenar_por)
+    desc = parametros.ordem == "desc"
+
+    total = None
+    if parametros.contar_total:
+        total = (await session.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+
+    pagina = query.with_only_columns(*[getattr(modelo, nome) for nome in nomes])
+
+    if parametros.cursor:
+        anterior = decodificar_cursor(parametros.cursor)
+        if anterior.get("o") != parametros.ordenar_por or anterior.get("d") != parametros.ordem:
+            raise HTTPException(status_code=400, detail="Cursor não corresponde à ordenação solicitada")
+        if parametros.ordenar_por != "id" and ("v" not in anterior or not _valor_do_tipo(chave, anterior["v"])):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+        if parametros.ordenar_por == "id":
+            pagina = pagina.where(modelo.id < anterior["id"] if desc else modelo.id > anterior["id"])
+        elif desc:
+            pagina = pagina.where(or_(chave < anterior["v"], and_(chave == anterior["v"], modelo.id < anterior["id"])))
+        else:
+            pagina = pagina.where(or_(chave > anterior["v"], and_(chave == anterior["v"], modelo.id > anterior["id"])))
+
+    ordenacao = [chave.desc(), modelo.id.desc()] if desc else [chave.asc(), modelo.id.asc()]
+    if parametros.ordenar_por == "id":
+        ordenacao = ordenacao[1:]
+    pagina = pagina.order_by(*ordenacao).limit(parametros.limit + 1)
+
+    linhas = [dict(zip(nomes, linha)) for linha in (await session.execute(pagina)).all()]
+
+    proximo_cursor = None
+    if len(linhas) > parametros.limit:
+        linhas = linhas[: parametros.limit]
+        ultima = linhas[-1]
+        proximo_cursor = codificar_cursor({
+            "o": parametros.ordenar_por,
+            "d": parametros.ordem,
+            "v": ultima[parametros.ordenar_por],
+            "id": ultima["id"],
+        })
+
+    return ORJSONResponse({"itens": linhas, "proximo_cursor": proximo_cursor, "total": total})
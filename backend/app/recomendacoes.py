@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import unicodedata
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
+
+from app.config import RECOMENDACAO_RECONSTRUIR_SEGUNDOS
+from app.database import abrir_sessao
+from app.models import Animal, Usuario
+
+# numpy só é carregado na primeira recomendação: fora do caminho de inicialização
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# colunas da matriz de características; a ordem define o vetor de pesos
+CARACTERISTICAS = (
+    "porte_pequeno",
+    "porte_medio",
+    "porte_grande",
+    "gato",
+    "cao",
+    "sociavel_gatos",
+    "sociavel_caes",
+    "filhote",
+    "idoso",
+    "vacinado",
+    "castrado",
+)
+INDICE = {nome: posicao for posicao, nome in enumerate(CARACTERISTICAS)}
+
+COLUNAS_ANIMAL = (
+    Animal.id,
+    Animal.especie,
+    Animal.porte,
+    Animal.idade,
+    Animal.sociavel_com_gatos,
+    Animal.sociavel_com_caes,
+    Animal.vacinado,
+    Animal.castrado,
+)
+
+
+def _normalizar(texto: Optional[str]) -> str:
+    texto = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return texto.strip().lower()
+
+
+def _categoria(valor: Optional[str], prefixos: dict) -> int:
+    normalizado = _normalizar(valor)
+    for prefixo, coluna in prefixos.items():
+        if normalizado.startswith(prefixo):
+            return coluna
+    return -1
+
+
+PORTES = {"peq": INDICE["porte_pequeno"], "med": INDICE["porte_medio"], "gra": INDICE["porte_grande"]}
+ESPECIES = {"gat": INDICE["gato"], "cao": INDICE["cao"], "cach": INDICE["cao"], "cadel": INDICE["cao"]}
+
+
+def _tripla(valores) -> np.ndarray:
+    import numpy as np
+    # sim = 1, desconhecido = 0, não = -1
+    return np.fromiter((0.0 if valor is None else (1.0 if valor else -1.0) for valor in valores), dtype=np.float32)
+
+
+def matriz_caracteristicas(linhas: Sequence[tuple]) -> Tuple[np.ndarray, np.ndarray]:
+    """Converte linhas (COLUNAS_ANIMAL) em (ids, matriz n x len(CARACTERISTICAS))."""
+    import numpy as np
+
+    matriz = np.zeros((len(linhas), len(CARACTERISTICAS)), dtype=np.float32)
+    if not linhas:
+        return np.zeros(0, dtype=np.int64), matriz
+    ids, especies, portes, idades, gatos, caes, vacinados, castrados = zip(*linhas)
+
+    # poucos valores distintos: normaliza cada texto uma vez só
+    linhas_idx = np.arange(len(linhas))
+    for valores, prefixos in ((portes, PORTES), (especies, ESPECIES)):
+        memo = {}
+        colunas = np.fromiter(
+            (memo[v] if v in memo else memo.setdefault(v, _categoria(v, prefixos)) for v in valores),
+            dtype=np.int64,
+        )
+        conhecidos = colunas >= 0
+        matriz[linhas_idx[conhecidos], colunas[conhecidos]] = 1
+
+    matriz[:, INDICE["sociavel_gatos"]] = _tripla(gatos)
+    matriz[:, INDICE["sociavel_caes"]] = _tripla(caes)
+    idades = np.array([np.nan if idade is None else idade for idade in idades], dtype=np.float32)
+    matriz[:, INDICE["filhote"]] = idades <= 1
+    matriz[:, INDICE["idoso"]] = idades >= 8
+    matriz[:, INDICE["vacinado"]] = np.array(vacinados, dtype=bool)
+    matriz[:, INDICE["castrado"]] = np.array(castrados, dtype=bool)
+    return np.array(ids, dtype=np.int64), matriz
+
+
+def pesos_adotante(usuario: Usuario) -> np.ndarray:
+    import numpy as np
+
+    pesos = np.zeros(len(CARACTERISTICAS), dtype=np.float32)
+    pesos[INDICE["vacinado"]] = 0.5
+    pesos[INDICE["castrado"]] = 0.5
+
+    moradia = _normalizar(usuario.moradia)
+    if moradia.startswith("ap"):
+        pesos[INDICE["porte_pequeno"]] += 2
+        pesos[INDICE["porte_medio"]] += 0.5
+        pesos[INDICE["porte_grande"]] -= 2
+    if usuario.area_aberta:
+        pesos[INDICE["porte_medio"]] += 0.5
+        pesos[INDICE["porte_grande"]] += 1.5
+    elif usuario.area_aberta is False:
+        pesos[INDICE["porte_grande"]] -= 1
+
+    # gatos precisam de telas nas janelas
+    if usuario.telas_em_casa:
+        pesos[INDICE["gato"]] += 1
+    elif usuario.telas_em_casa is False:
+        pesos[INDICE["gato"]] -= 2
+
+    if usuario.criancas_em_casa:
+        pesos[INDICE["filhote"]] -= 0.5
+        pesos[INDICE["vacinado"]] += 1
+
+    if usuario.possui_animais:
+        tipos = _normalizar(usuario.tipo_animais)
+        if "gat" in tipos:
+            pesos[INDICE["sociavel_gatos"]] += 3
+        if any(nome in tipos for nome in ("cao", "caes", "cach", "cadel")):
+            pesos[INDICE["sociavel_caes"]] += 3
+    return pesos
+
+
+class MatrizRecomendacao:
+    """Matriz de características dos animais disponíveis, mantida em memória.
+
+    Animais alterados são marcados pelas rotas e recarregados (um a um) na
+    próxima recomendação; a matriz inteira é reconstruída a cada
+    RECOMENDACAO_RECONSTRUIR_SEGUNDOS para absorver mudanças feitas por outros
+    workers. Essa reconstrução roda em segundo plano, com a montagem da matriz
+    no threadpool; enquanto isso as recomendações usam a matriz anterior.
+    """
+
+    def __init__(self, reconstruir_a_cada: float):
+        self.reconstruir_a_cada = reconstruir_a_cada
+        # preenchidas na primeira reconstrução
+        self.ids: Optional[np.ndarray] = None
+        self.matriz: Optional[np.ndarray] = None
+        self._linha = {}
+        self._construida_em: Optional[float] = None
+        self._pendentes = set()
+        self._lock = asyncio.Lock()
+        self._reconstrucao: Optional[asyncio.Task] = None
+        # ids recarregados na matriz antiga durante uma reconstrução em andamento
+        self._aplicados_durante: Optional[set] = None
+
+    def marcar_alterados(self, ids: Iterable[int]):
+        self._pendentes.update(ids)
+
+    async def atualizar(self, session):
+        async with self._lock:
+            if self._construida_em is None:
+                # ainda não há matriz anterior para servir
+                await self._reconstruir(session)
+                return
+
+            expirada = time.monotonic() - self._construida_em > self.reconstruir_a_cada
+            if expirada and (self._reconstrucao is None or self._reconstrucao.done()):
+                self._aplicados_durante = set()
+                self._reconstrucao = asyncio.create_task(self._reconstruir_em_segundo_plano())
+
+            pendentes, self._pendentes = self._pendentes, set()
+            if pendentes:
+                await self._aplicar(session, pendentes)
+                if self._aplicados_durante is not None:
+                    self._aplicados_durante |= pendentes
+
+    async def _reconstruir_em_segundo_plano(self):
+        try:
+            async with abrir_sessao() as session:
+                await self._reconstruir(session)
+        except Exception:
+            # a matriz anterior continua em uso; a próxima recomendação tenta de novo
+            self._aplicados_durante = None
+            logger.exception("Falha ao reconstruir a matriz de recomendação")
+
+    async def _reconstruir(self, session):
+        # marcações anteriores já estão no banco que a consulta vai ler
+        self._pendentes.clear()
+        linhas = (await session.execute(select(*COLUNAS_ANIMAL).where(Animal.disponivel == True, Animal.deleted_at.is_(None)))).all()
+        ids, matriz = await run_in_threadpool(matriz_caracteristicas, linhas)
+        linha = {int(animal_id): posicao for posicao, animal_id in enumerate(ids)}
+        # troca sem await no meio: nenhuma recomendação vê a matriz pela metade
+        self.ids, self.matriz, self._linha = ids, matriz, linha
+        self._construida_em = time.monotonic()
+        if self._aplicados_durante:
+            # podem ter mudado depois da leitura: recarrega sobre a matriz nova
+            self._pendentes |= self._aplicados_durante
+        self._aplicados_durante = None
+
+    async def _aplicar(self, session, pendentes: set):
+        import numpy as np
+
+        linhas = (await session.execute(
+            select(*COLUNAS_ANIMAL).where(Animal.id.in_(pendentes), Animal.disponivel == True, Animal.deleted_at.is_(None))
+        )).all()
+        ids, matriz = matriz_caracteristicas(linhas)
+        disponiveis = {int(animal_id): vetor for animal_id, vetor in zip(ids, matriz)}
+
+        for animal_id in pendentes - disponiveis.keys():
+            self._remover(animal_id)
+
+        novos_ids, novos_vetores = [], []
+        for animal_id, vetor in disponiveis.items():
+            posicao = self._linha.get(animal_id)
+            if posicao is None:
+                novos_ids.append(animal_id)
+                novos_vetores.append(vetor)
+            else:
+                self.matriz[posicao] = vetor
+        if novos_ids:
+            inicio = len(self.ids)
+            self.ids = np.concatenate([self.ids, np.array(novos_ids, dtype=np.int64)])
+            self.matriz = np.vstack([self.matriz, *novos_vetores])
+            for deslocamento, animal_id in enumerate(novos_ids):
+                self._linha[animal_id] = inicio + deslocamento
+
+    def _remover(self, animal_id: int):
+        # troca a linha removida pela última para não deslocar a matriz
+        posicao = self._linha.pop(animal_id, None)
+        if posicao is None:
+            return
+        ultima = len(self.ids) - 1
+        if posicao != ultima:
+            self.ids[posicao] = self.ids[ultima]
+            self.matriz[posicao] = self.matriz[ultima]
+            self._linha[int(self.ids[posicao])] = posicao
+        self.ids = self.ids[:ultima]
+        self.matriz = self.matriz[:ultima]
+
+    def melhores(self, pesos: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        import numpy as np
+
+        if self.ids is None or len(self.ids) == 0:
+            return []
+        pontuacoes = self.matriz @ pesos
+        k = min(k, len(pontuacoes))
+        candidatos = np.argpartition(-pontuacoes, k - 1)[:k]
+        ordenados = candidatos[np.lexsort((self.ids[candidatos], -pontuacoes[candidatos]))]
+        return [(int(self.ids[posicao]), float(pontuacoes[posicao])) for posicao in ordenados]
+
+
+matriz_recomendacao = MatrizRecomendacao(RECOMENDACAO_RECONSTRUIR_SEGUNDOS)
+
+
+async def recomendar(session, usuario: Usuario, k: int) -> List[Tuple[int, float]]:
+    await matriz_recomendacao.atualizar(session)
+    return matriz_recomendacao.melhores(pesos_adotante(usuario), k)
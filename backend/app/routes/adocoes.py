@@ -0,0 +1,172 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from app.adocoes import APROVADA, CANCELADA, PENDENTE, REJEITADA
+from app.database import Sessao, get_session
+from app.estatisticas import ajustar_estatisticas, parcela
+from app.eventos import ADOTADO, Evento, publicar_eventos
+from app.instrumentacao import RotaInstrumentada
+from app.models import Adocao, Animal, Ong
+from app.mudancas import ATUALIZADO, agora, registrar_mudanca
+from app.paginacao import Pagina, ParametrosPaginacao, paginar, parametros_paginacao
+from app.routes.animais import animais_alterados, estado_animal
+from app.segurity import OngsAdministradas, Principal, get_ongs_administradas, get_principal, ong_administrada
+from app.tarefas import enfileirar
+
+router = APIRouter(route_class=RotaInstrumentada)
+
+class AdocaoCreate(BaseModel):
+    mensagem: Optional[str] = None
+
+class AdocaoRead(BaseModel):
+    id: int
+    animal_id: int
+    usuario_id: int
+    ong_id: Optional[int]
+    status: str
+    mensagem: Optional[str] = None
+    motivo: Optional[str] = None
+    criado_em: Optional[datetime] = None
+    decidido_em: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class Rejeicao(BaseModel):
+    motivo: Optional[str] = None
+
+CAMPOS_ADOCAO = tuple(AdocaoRead.__fields__)
+FILTRO_STATUS = f"^({PENDENTE}|{APROVADA}|{REJEITADA}|{CANCELADA})$"
+
+@router.post("/animais/{animal_id}/adocoes", response_model=AdocaoRead, status_code=201)
+async def solicitar_adocao(
+    animal_id: int,
+    pedido: AdocaoCreate,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal)
+):
+    animal = await session.get(Animal, animal_id)
+    if not animal or animal.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Animal não encontrado")
+    if not animal.disponivel:
+        raise HTTPException(status_code=409, detail="Animal não está disponível para adoção")
+
+    adocao = Adocao(animal_id=animal.id, usuario_id=usuario.id, ong_id=animal.ong_id, status=PENDENTE, mensagem=pedido.mensagem)
+    session.add(adocao)
+    try:
+        await session.flush()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Você já tem um pedido pendente para este animal")
+    # o aviso à ONG entra na fila na mesma transação do pedido
+    enfileirar(session, "notificar_pedido_adocao", {"adocao_id": adocao.id})
+    await session.commit()
+    return adocao
+
+@router.get("/usuarios/me/adocoes", response_model=Pagina)
+async def minhas_adocoes(
+    paginacao: ParametrosPaginacao = Depends(parametros_paginacao),
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal)
+):
+    query = select(Adocao).where(Adocao.usuario_id == usuario.id)
+    return await paginar(session, query, Adocao, paginacao, CAMPOS_ADOCAO)
+
+@router.get("/ongs/{ong_id}/adocoes", response_model=Pagina)
+async def adocoes_da_ong(
+    status: Optional[str] = Query(None, pattern=FILTRO_STATUS),
+    paginacao: ParametrosPaginacao = Depends(parametros_paginacao),
+    ong: Ong = Depends(ong_administrada("Você não tem permissão para ver os pedidos de adoção dessa ONG")),
+    session: Sessao = Depends(get_session)
+):
+    query = select(Adocao).where(Adocao.ong_id == ong.id)
+    if status is not None:
+        query = query.where(Adocao.status == status)
+    return await paginar(session, query, Adocao, paginacao, CAMPOS_ADOCAO)
+
+async def _obter_adocao(session: Sessao, adocao_id: int) -> Adocao:
+    adocao = await session.get(Adocao, adocao_id)
+    if not adocao:
+        raise HTTPException(status_code=404, detail="Pedido de adoção não encontrado")
+    return adocao
+
+async def _decidir(session: Sessao, adocao: Adocao, **valores) -> Adocao:
+    # só sai de pendente uma vez, mesmo com decisões simultâneas
+    decidida = (await session.execute(
+        update(Adocao)
+        .where(Adocao.id == adocao.id, Adocao.status == PENDENTE)
+        .values(decidido_em=agora(), **valores)
+        .returning(Adocao)
+    )).scalar_one_or_none()
+    if decidida is None:
+        raise HTTPException(status_code=409, detail="Este pedido de adoção já foi decidido")
+    return decidida
+
+async def _adocao_da_ong(session: Sessao, adocao_id: int, ongs: OngsAdministradas) -> Adocao:
+    adocao = await _obter_adocao(session, adocao_id)
+    if adocao.ong_id is None or not await ongs.contem(adocao.ong_id):
+        raise HTTPException(status_code=403, detail="Você não administra a ONG deste animal")
+    return adocao
+
+@router.post("/adocoes/{adocao_id}/aprovar", response_model=AdocaoRead)
+async def aprovar_adocao(
+    adocao_id: int,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    adocao = await _adocao_da_ong(session, adocao_id, ongs)
+    # bloqueado até o commit: a parcela de antes não pode ficar velha com outra escrita no animal
+    animal = await session.get(Animal, adocao.animal_id, with_for_update=True, populate_existing=True)
+    if animal.deleted_at is not None or not animal.disponivel:
+        raise HTTPException(status_code=409, detail="Animal não está mais disponível para adoção")
+
+    adocao = await _decidir(session, adocao, status=APROVADA, decidido_por=usuario.id)
+    # o animal sai do catálogo na mesma transação; avisos e os demais pedidos ficam com o worker
+    anterior = estado_animal(animal)
+    antes = parcela(animal)
+    animal.disponivel = False
+    session.add(animal)
+    mudanca = registrar_mudanca(session, animal.id, ATUALIZADO, {"disponivel": False}, usuario.id)
+    await ajustar_estatisticas(session, [antes], [parcela(animal)])
+    enfileirar(session, "adocao_aprovada", {"adocao_id": adocao.id})
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Este animal já tem uma adoção aprovada")
+
+    await animais_alterados(animal.id)
+    await publicar_eventos(Evento(ADOTADO, animal.id, mudanca.id, estado_animal(animal), anterior))
+    return adocao
+
+@router.post("/adocoes/{adocao_id}/rejeitar", response_model=AdocaoRead)
+async def rejeitar_adocao(
+    adocao_id: int,
+    rejeicao: Rejeicao,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    adocao = await _adocao_da_ong(session, adocao_id, ongs)
+    adocao = await _decidir(session, adocao, status=REJEITADA, motivo=rejeicao.motivo, decidido_por=usuario.id)
+    enfileirar(session, "notificar_adotante", {"adocao_id": adocao.id})
+    await session.commit()
+    return adocao
+
+@router.post("/adocoes/{adocao_id}/cancelar", response_model=AdocaoRead)
+async def cancelar_adocao(
+    adocao_id: int,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal)
+):
+    adocao = await _obter_adocao(session, adocao_id)
+    if adocao.usuario_id != usuario.id:
+        raise HTTPException(status_code=403, detail="Só quem fez o pedido pode cancelá-lo")
+    adocao = await _decidir(session, adocao, status=CANCELADA, decidido_por=usuario.id)
+    await session.commit()
+    return adocao
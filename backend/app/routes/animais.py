@@ -1,16 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from sqlmodel import Session, select
-from app.database import engine
-from app.models import Animal, Usuario, UsuarioOngAssociacao
-from typing import List, Optional
-from pydantic import BaseModel
-from app.routes.usuarios import get_usuario_logado
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, insert
+from sqlmodel import select
+from app.armazenamento import armazenamento
+from app.busca import buscar_animais
+from app.cache import invalidar_cache
+from app.database import Sessao, get_session
+from app.estatisticas import ajustar_estatisticas, parcela
+from app.eventos import ADOTADO, Evento, broker, cursor_valido, fluxo_eventos, publicar_eventos
+from app.imagens import processar_foto_animal
+from app.instrumentacao import RotaInstrumentada
+from app.lote import ResultadoImportacao, exportar, importar_lote
+from app.geo import filtro_raio, geocodificar_cep
+from app.models import Animal, AnimalMudanca, Ong, Usuario, UsuarioOngAssociacao
+from app.mudancas import ATUALIZADO, CRIADO, REMOVIDO, agora, listar_mudancas, registrar_criados, registrar_mudanca
+from typing import Dict, List, Optional
+from pydantic import BaseModel, validator
+from app.segurity import OngsAdministradas, Principal, get_ongs_administradas, get_principal
+from app.uploads import receber_imagem
+from app.paginacao import Pagina, ParametrosPaginacao, paginar, parametros_paginacao
+from app.recomendacoes import matriz_recomendacao
 import os
-import shutil
 
-router = APIRouter()
+router = APIRouter(route_class=RotaInstrumentada)
 
-UPLOAD_DIR = "app/static/animais"
+async def animais_alterados(*ids: int):
+    await invalidar_cache("animais")
+    matriz_recomendacao.marcar_alterados(ids)
+
+def estado_animal(animal: Animal) -> dict:
+    return {campo: getattr(animal, campo) for campo in CAMPOS_ANIMAL}
+
+async def _animal_ativo(session: Sessao, animal_id: int, bloquear: bool = False) -> Animal:
+    # bloquear: o estado lido é a base das estatísticas; outra escrita no animal espera o commit
+    animal = await session.get(Animal, animal_id, with_for_update=bloquear, populate_existing=bloquear)
+    if not animal or animal.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Animal não encontrado")
+    return animal
+
+async def _animal_administrado(session: Sessao, animal_id: int, usuario: Principal, ongs: OngsAdministradas) -> Animal:
+    animal = await _animal_ativo(session, animal_id, bloquear=True)
+    if not usuario.is_admin:
+        raise HTTPException(status_code=403, detail="Apenas administradores podem alterar animais")
+    # sem ONG responsável ninguém administra o animal
+    if animal.ong_id is None or not await ongs.contem(animal.ong_id):
+        raise HTTPException(status_code=403, detail="Você não administra a ONG desse animal")
+    return animal
 
 class AnimalBase(BaseModel):
     nome: str
@@ -35,6 +70,9 @@ class AnimalCreate(AnimalBase):
 class AnimalRead(AnimalBase):
     id: int
     ong_id: Optional[int]
+    foto_thumb_url: Optional[str] = None
+    foto_card_url: Optional[str] = None
+    foto_full_url: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -57,34 +95,60 @@ class AnimalUpdate(BaseModel):
     foto_url: Optional[str] = None
     ong_id: Optional[int] = None
 
-def get_session():
-    with Session(engine) as session:
-        yield session
+    # opcionais para o PUT parcial, mas sem null explícito: são obrigatórios no animal
+    @validator("nome", "especie", "ong_id", pre=True)
+    def nao_nulo(cls, valor):
+        if valor is None:
+            raise ValueError("não pode ser nulo")
+        return valor
 
 @router.post("/animais", response_model=AnimalRead)
-def criar_animal(
+async def criar_animal(
     animal: AnimalCreate,
-    session: Session = Depends(get_session),
-    usuario: Usuario = Depends(get_usuario_logado)
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
 ):
     if not usuario.is_admin:
         raise HTTPException(status_code=403, detail="Apenas administradores podem criar animais.")
 
     novo_animal = Animal.from_orm(animal)
-    novo_animal.ong_id = usuario.id  
+    if novo_animal.ong_id is None:
+        if len(usuario.ongs) != 1:
+            raise HTTPException(status_code=400, detail="Informe a ONG responsável pelo animal")
+        novo_animal.ong_id = next(iter(usuario.ongs))
+    elif not await ongs.contem(novo_animal.ong_id):
+        raise HTTPException(status_code=403, detail="Você não administra essa ONG")
     session.add(novo_animal)
-    session.commit()
-    session.refresh(novo_animal)
+    await session.flush()
+    mudanca = registrar_mudanca(session, novo_animal.id, CRIADO, novo_animal.dict(exclude={"id", "deleted_at", "criado_em"}, exclude_none=True), usuario.id)
+    await ajustar_estatisticas(session, adicionados=[parcela(novo_animal)])
+    await session.commit()
+    await animais_alterados(novo_animal.id)
+    await publicar_eventos(Evento(CRIADO, novo_animal.id, mudanca.id, estado_animal(novo_animal)))
     return novo_animal
 
-@router.get("/animais", response_model=List[AnimalRead])
-def listar_animais(
+CAMPOS_ANIMAL = tuple(AnimalRead.__fields__)
+ORDENACOES_ANIMAL = ("id", "nome", "especie")
+
+@router.get("/animais", response_model=Pagina)
+async def listar_animais(
     disponivel: Optional[bool] = Query(None),
     sociavel_com_gatos: Optional[bool] = Query(None),
     sociavel_com_caes: Optional[bool] = Query(None),
-    session: Session = Depends(get_session),
+    perto_de: Optional[str] = Query(None, description="CEP de referência para a busca por proximidade"),
+    raio_km: float = Query(10, gt=0, le=500),
+    paginacao: ParametrosPaginacao = Depends(parametros_paginacao),
+    session: Sessao = Depends(get_session),
 ):
-    query = select(Animal)
+    query = select(Animal).where(Animal.deleted_at.is_(None))
+    if perto_de is not None:
+        centro = geocodificar_cep(perto_de)
+        if centro is None:
+            raise HTTPException(status_code=400, detail="CEP não encontrado")
+        query = query.join(Ong, Ong.id == Animal.ong_id).where(
+            *filtro_raio(Ong.lat, Ong.lon, Ong.geohash, centro, raio_km)
+        )
     if disponivel is not None:
         query = query.where(Animal.disponivel == disponivel)
     if sociavel_com_gatos is not None:
@@ -92,61 +156,293 @@ def listar_animais(
     if sociavel_com_caes is not None:
         query = query.where(Animal.sociavel_com_caes == sociavel_com_caes)
 
-    return session.exec(query).all()
+    return await paginar(session, query, Animal, paginacao, CAMPOS_ANIMAL, ORDENACOES_ANIMAL)
+
+class AnimalBusca(AnimalRead):
+    relevancia: float
+
+class ResultadoBusca(BaseModel):
+    itens: List[AnimalBusca]
+    total: int
+    facetas: Dict[str, Dict[str, int]]
+
+@router.get("/animais/busca", response_model=ResultadoBusca)
+async def buscar(
+    q: Optional[str] = Query(None, max_length=200),
+    especie: Optional[str] = Query(None),
+    raca: Optional[str] = Query(None),
+    porte: Optional[str] = Query(None),
+    cor: Optional[str] = Query(None),
+    sexo: Optional[str] = Query(None),
+    idade_min: Optional[int] = Query(None, ge=0),
+    idade_max: Optional[int] = Query(None, ge=0),
+    disponivel: Optional[bool] = Query(True),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    session: Sessao = Depends(get_session),
+):
+    filtros = [Animal.deleted_at.is_(None)]
+    if disponivel is not None:
+        filtros.append(Animal.disponivel == disponivel)
+    for coluna, valor in ((Animal.especie, especie), (Animal.porte, porte), (Animal.sexo, sexo)):
+        if valor is not None:
+            filtros.append(coluna == valor)
+    for coluna, valor in ((Animal.raca, raca), (Animal.cor, cor)):
+        if valor is not None:
+            filtros.append(func.lower(coluna) == valor.lower())
+    if idade_min is not None:
+        filtros.append(Animal.idade >= idade_min)
+    if idade_max is not None:
+        filtros.append(Animal.idade <= idade_max)
+
+    texto = q.strip() if q and q.strip() else None
+    # linhas do banco em colunas conhecidas: dispensa a revalidação por ResultadoBusca
+    return ORJSONResponse(await buscar_animais(session, CAMPOS_ANIMAL, texto, filtros, limit, offset))
+
+@router.post("/animais/lote", response_model=ResultadoImportacao)
+async def importar_animais(
+    request: Request,
+    ong_id: Optional[int] = Query(None, description="ONG usada nos registros que não informam ong_id"),
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    if not usuario.is_admin:
+        raise HTTPException(status_code=403, detail="Apenas administradores podem criar animais.")
+
+    if ong_id is None and len(usuario.ongs) == 1:
+        ong_id = next(iter(usuario.ongs))
+    # eventos só depois do commit de cada bloco
+    eventos = {}
+
+    async def inserir_bloco(session, bloco, resultado):
+        linhas = []
+        momento = agora()
+        for numero, dados in bloco:
+            destino = dados["ong_id"] or ong_id
+            if destino is None:
+                resultado.erro(numero, "Informe a ONG responsável pelo animal")
+                continue
+            if not await ongs.contem(destino):
+                resultado.erro(numero, f"Você não administra a ONG {destino}")
+                continue
+            linhas.append({**dados, "ong_id": destino, "criado_em": momento})
+        if not linhas:
+            return []
+        inseridos = await session.execute(insert(Animal).returning(Animal.id, sort_by_parameter_order=True), linhas)
+        ids = list(inseridos.scalars())
+        mudancas = await registrar_criados(session, ids, [
+            {campo: valor for campo, valor in linha.items() if valor is not None and campo != "criado_em"} for linha in linhas
+        ], usuario.id)
+        await ajustar_estatisticas(session, adicionados=linhas)
+        for animal_id, mudanca, linha in zip(ids, mudancas, linhas):
+            eventos[animal_id] = Evento(CRIADO, animal_id, mudanca, {campo: linha.get(campo) for campo in CAMPOS_ANIMAL} | {"id": animal_id})
+        return ids
+
+    resultado = await importar_lote(request, session, AnimalCreate, inserir_bloco)
+    if resultado.ids:
+        await animais_alterados(*resultado.ids)
+        await publicar_eventos(*[eventos[animal_id] for animal_id in resultado.ids])
+    return resultado
+
+@router.get("/animais/export")
+async def exportar_animais(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    disponivel: Optional[bool] = Query(None),
+    ong_id: Optional[int] = Query(None),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    query = select(*[getattr(Animal, campo) for campo in CAMPOS_ANIMAL]).where(Animal.deleted_at.is_(None)).order_by(Animal.id)
+    if disponivel is not None:
+        query = query.where(Animal.disponivel == disponivel)
+    if ong_id is not None:
+        if not await ongs.contem(ong_id):
+            raise HTTPException(status_code=403, detail="Você não administra essa ONG")
+        query = query.where(Animal.ong_id == ong_id)
+    else:
+        # só os animais das ONGs que o usuário administra
+        query = query.where(Animal.ong_id.in_(
+            select(UsuarioOngAssociacao.ong_id).where(UsuarioOngAssociacao.usuario_id == usuario.id)
+        ))
+    return exportar(query, CAMPOS_ANIMAL, formato, "animais")
+
+class MudancaAnimal(BaseModel):
+    mudanca: int
+    animal_id: int
+    removido: bool
+    animal: Optional[AnimalRead] = None
+
+class PaginaMudancas(BaseModel):
+    itens: List[MudancaAnimal]
+    proximo_cursor: str
+    mais: bool
+
+@router.get("/animais/mudancas", response_model=PaginaMudancas)
+async def mudancas_animais(
+    desde: Optional[str] = Query(None, description="proximo_cursor da chamada anterior; sem ele, desde o início"),
+    limit: int = Query(500, ge=1, le=1000),
+    session: Sessao = Depends(get_session),
+):
+    return ORJSONResponse(await listar_mudancas(session, CAMPOS_ANIMAL, desde, limit))
+
+@router.get("/animais/eventos", response_class=StreamingResponse)
+async def eventos_animais(
+    request: Request,
+    especie: Optional[str] = Query(None),
+    porte: Optional[str] = Query(None),
+    sexo: Optional[str] = Query(None),
+    disponivel: Optional[bool] = Query(None),
+    sociavel_com_gatos: Optional[bool] = Query(None),
+    sociavel_com_caes: Optional[bool] = Query(None),
+    ong_id: Optional[int] = Query(None),
+    desde: Optional[str] = Query(None, description="cursor de /animais/mudancas; o Last-Event-ID tem o mesmo efeito"),
+):
+    """Server-sent events: criado, atualizado, adotado e removido.
+
+    Os filtros valem para o estado do animal antes ou depois da mudança, então
+    quem assina ``disponivel=true`` também recebe o evento de adoção. Um evento
+    ``sobrecarga`` encerra o fluxo: o cliente deve continuar por /animais/mudancas
+    a partir do último id recebido.
+    """
+    if broker is None:
+        raise HTTPException(status_code=503, detail="Eventos desligados neste servidor")
+    if broker.lotado():
+        raise HTTPException(status_code=503, detail="Limite de conexões de eventos atingido")
+
+    filtros = {
+        campo: valor
+        for campo, valor in dict(
+            especie=especie, porte=porte, sexo=sexo, disponivel=disponivel,
+            sociavel_com_gatos=sociavel_com_gatos, sociavel_com_caes=sociavel_com_caes, ong_id=ong_id,
+        ).items()
+        if valor is not None
+    }
+    cursor = cursor_valido(desde or request.headers.get("last-event-id"))
+    return StreamingResponse(
+        fluxo_eventos(filtros, CAMPOS_ANIMAL, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/animais/{animal_id}", response_model=AnimalRead)
-def obter_animal(animal_id: int, session: Session = Depends(get_session)):
-    animal = session.get(Animal, animal_id)
-    if not animal:
+async def obter_animal(animal_id: int, session: Sessao = Depends(get_session)):
+    return await _animal_ativo(session, animal_id)
+
+CAMPOS_MUDANCA = ("id", "animal_id", "operacao", "alteracoes", "usuario_id", "criado_em")
+
+@router.get("/animais/{animal_id}/historico", response_model=Pagina)
+async def historico_animal(
+    animal_id: int,
+    paginacao: ParametrosPaginacao = Depends(parametros_paginacao),
+    session: Sessao = Depends(get_session),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    # inclui animais removidos: o histórico deles continua disponível para a ONG
+    animal = await session.get(Animal, animal_id)
+    if animal is None:
         raise HTTPException(status_code=404, detail="Animal não encontrado")
-    return animal
+    if animal.ong_id is None or not await ongs.contem(animal.ong_id):
+        raise HTTPException(status_code=403, detail="Você não administra a ONG desse animal")
+
+    query = select(AnimalMudanca).where(AnimalMudanca.animal_id == animal_id)
+    return await paginar(session, query, AnimalMudanca, paginacao, CAMPOS_MUDANCA)
 
 @router.put("/animais/{animal_id}", response_model=AnimalRead)
-def atualizar_animal(animal_id: int, dados: AnimalUpdate, session: Session = Depends(get_session)):
-    animal = session.get(Animal, animal_id)
-    if not animal:
-        raise HTTPException(status_code=404, detail="Animal não encontrado")
+async def atualizar_animal(
+    animal_id: int,
+    dados: AnimalUpdate,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    animal = await _animal_administrado(session, animal_id, usuario, ongs)
+    if dados.ong_id is not None and dados.ong_id != animal.ong_id and not await ongs.contem(dados.ong_id):
+        raise HTTPException(status_code=403, detail="Você não administra essa ONG")
+    anterior = estado_animal(animal)
+    antes = parcela(animal)
 
+    alteracoes = {}
     for key, value in dados.dict(exclude_unset=True).items():
+        if getattr(animal, key) != value:
+            alteracoes[key] = value
         setattr(animal, key, value)
 
     session.add(animal)
-    session.commit()
-    session.refresh(animal)
+    mudanca = registrar_mudanca(session, animal.id, ATUALIZADO, alteracoes, usuario.id) if alteracoes else None
+    await ajustar_estatisticas(session, [antes], [parcela(animal)])
+    await session.commit()
+    await session.refresh(animal)
+    await animais_alterados(animal.id)
+    if mudanca is not None:
+        tipo = ADOTADO if anterior["disponivel"] and not animal.disponivel else ATUALIZADO
+        await publicar_eventos(Evento(tipo, animal.id, mudanca.id, estado_animal(animal), anterior))
     return animal
 
-@router.put("/animais/{animal_id}/foto", response_model=AnimalRead)
-def atualizar_foto_animal(
+FORMULARIO_FOTO = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"arquivo": {"type": "string", "format": "binary"}},
+                    "required": ["arquivo"],
+                }
+            },
+            "image/*": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+@router.put("/animais/{animal_id}/foto", response_model=AnimalRead, openapi_extra=FORMULARIO_FOTO)
+async def atualizar_foto_animal(
     animal_id: int,
-    arquivo: UploadFile = File(...),
-    session: Session = Depends(get_session),
-    usuario: Usuario = Depends(get_usuario_logado)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
 ):
-    animal = session.get(Animal, animal_id)
-    if not animal:
-        raise HTTPException(status_code=404, detail="Animal não encontrado")
-
-    if not usuario.is_admin:
-        raise HTTPException(status_code=403, detail="Apenas administradores podem alterar a imagem")
-
-    filename = f"animal_{animal_id}_{arquivo.filename}"
-    caminho_completo = os.path.join(UPLOAD_DIR, filename)
+    animal = await _animal_administrado(session, animal_id, usuario, ongs)
 
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # o corpo só é lido depois das checagens acima, direto do stream da requisição
+    recebido = await receber_imagem(request, armazenamento.diretorio_temporario())
 
-    with open(caminho_completo, "wb") as buffer:
-        shutil.copyfileobj(arquivo.file, buffer)
+    # imagens idênticas compartilham o mesmo arquivo
+    chave = f"animais/{recebido.sha256[:2]}/{recebido.sha256}{recebido.extensao}"
+    if await armazenamento.existe(chave):
+        os.remove(recebido.caminho)
+    else:
+        await armazenamento.salvar(recebido.caminho, chave, recebido.content_type)
 
-    animal.foto_url = f"/static/animais/{filename}"
+    animal.foto_url = armazenamento.url(chave)
+    animal.foto_thumb_url = animal.foto_card_url = animal.foto_full_url = None
     session.add(animal)
-    session.commit()
-    session.refresh(animal)
+    mudanca = registrar_mudanca(session, animal.id, ATUALIZADO, {"foto_url": animal.foto_url}, usuario.id)
+    await session.commit()
+    await session.refresh(animal)
+    await invalidar_cache("animais")
+    await publicar_eventos(Evento(ATUALIZADO, animal.id, mudanca.id, estado_animal(animal)))
+
+    # as variantes redimensionadas são geradas depois da resposta
+    background_tasks.add_task(processar_foto_animal, animal.id, chave, recebido.sha256)
     return animal
 
 @router.delete("/animais/{animal_id}", status_code=204)
-def deletar_animal(animal_id: int, session: Session = Depends(get_session)):
-    animal = session.get(Animal, animal_id)
-    if not animal:
-        raise HTTPException(status_code=404, detail="Animal não encontrado")
-    session.delete(animal)
-    session.commit()
+async def deletar_animal(
+    animal_id: int,
+    session: Sessao = Depends(get_session),
+    usuario: Principal = Depends(get_principal),
+    ongs: OngsAdministradas = Depends(get_ongs_administradas)
+):
+    animal = await _animal_administrado(session, animal_id, usuario, ongs)
+    anterior = estado_animal(animal)
+    antes = parcela(animal)
+    animal.deleted_at = agora()
+    session.add(animal)
+    mudanca = registrar_mudanca(session, animal_id, REMOVIDO, usuario_id=usuario.id)
+    await ajustar_estatisticas(session, removidos=[antes])
+    await session.commit()
+    await animais_alterados(animal_id)
+    await publicar_eventos(Evento(REMOVIDO, animal_id, mudanca.id, None, anterior))
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.database import metricas_pool
+from app.instrumentacao import RotaInstrumentada, metricas_prometheus
+
+router = APIRouter(route_class=RotaInstrumentada)
+
+@router.get("/metricas/pool")
+def obter_metricas_pool():
+    return metricas_pool()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metricas():
+    gauges = {
+        f"db_pool_{nome}": valor
+        for nome, valor in metricas_pool().items()
+        if isinstance(valor, (int, float))
+    }
+    return PlainTextResponse(metricas_prometheus(gauges), media_type="text/plain; version=0.0.4")
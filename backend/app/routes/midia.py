@@ -0,0 +1,137 @@
+import os
+import re
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.armazenamento import ArmazenamentoLocal, armazenamento
+from app.config import MIDIA_OFFLOAD, MIDIA_OFFLOAD_PREFIXO, MIDIA_URL_BASE
+from app.instrumentacao import RotaInstrumentada
+
+router = APIRouter(route_class=RotaInstrumentada)
+
+TIPOS = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+}
+
+# arquivos gravados pelo upload têm o sha256 do conteúdo no nome e nunca mudam
+CHAVE_IMUTAVEL = re.compile(r"(?:^|/)([0-9a-f]{64}(?:_[a-z]+)?)\.[a-z0-9]+$")
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_PADRAO = "public, max-age=3600"
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _intervalo(range_header: str, tamanho: int) -> Optional[Tuple[int, int]]:
+    """Interpreta um único intervalo ``bytes=inicio-fim``; None se não for atendível."""
+    unidade, _, especificacao = range_header.partition("=")
+    if unidade.strip().lower() != "bytes" or "," in especificacao:
+        return None
+    inicio, _, fim = especificacao.strip().partition("-")
+    try:
+        if not inicio:
+            sufixo = int(fim)
+            if sufixo <= 0:
+                return None
+            return max(tamanho - sufixo, 0), tamanho - 1
+        inicio = int(inicio)
+        fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    except ValueError:
+        return None
+    if inicio > fim or inicio >= tamanho:
+        return None
+    return inicio, fim
+
+
+async def _ler_intervalo(caminho: str, inicio: int, fim: int):
+    async with await anyio.open_file(caminho, "rb") as origem:
+        await origem.seek(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            bloco = await origem.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def _etag_confere(valor: Optional[str], etag: str) -> bool:
+    if not valor:
+        return False
+    return any(candidato.strip() in ("*", etag, f"W/{etag}") for candidato in valor.split(","))
+
+
+@router.get(MIDIA_URL_BASE.rstrip("/") + "/{chave:path}", include_in_schema=False)
+async def servir_midia(chave: str, request: Request):
+    if not isinstance(armazenamento, ArmazenamentoLocal):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    partes = chave.split("/")
+    if any(not parte or parte.startswith(".") for parte in partes):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    caminho = armazenamento.caminho(chave)
+    try:
+        estado = await anyio.to_thread.run_sync(os.stat, caminho)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    imutavel = CHAVE_IMUTAVEL.search(chave)
+    if imutavel:
+        etag = f'"{imutavel.group(1)}"'
+        cache_control = CACHE_IMUTAVEL
+    else:
+        etag = f'"{int(estado.st_mtime)}-{estado.st_size}"'
+        cache_control = CACHE_PADRAO
+
+    content_type = TIPOS.get(os.path.splitext(chave)[1].lower(), "application/octet-stream")
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        # servido da origem da API: o navegador não pode reinterpretar o arquivo como HTML ou script
+        "X-Content-Type-Options": "nosniff",
+    }
+
+    if _etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if MIDIA_OFFLOAD:
+        # o proxy (nginx/apache) envia o arquivo com sendfile e trata o Range;
+        # o worker Python não lê nenhum byte
+        if MIDIA_OFFLOAD == "x-accel":
+            headers["X-Accel-Redirect"] = MIDIA_OFFLOAD_PREFIXO.rstrip("/") + "/" + chave
+        else:
+            headers["X-Sendfile"] = os.path.abspath(caminho)
+        return Response(media_type=content_type, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range divergente ou múltiplos intervalos: responde o arquivo inteiro
+    if range_header and ((if_range and if_range.strip() != etag) or "," in range_header):
+        range_header = None
+
+    if range_header:
+        intervalo = _intervalo(range_header, estado.st_size)
+        if intervalo is None:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{estado.st_size}"},
+            )
+        inicio, fim = intervalo
+        headers.update({
+            "Content-Range": f"bytes {inicio}-{fim}/{estado.st_size}",
+            "Content-Length": str(fim - inicio + 1),
+        })
+        return StreamingResponse(
+            _ler_intervalo(caminho, inicio, fim), status_code=206, media_type=content_type, headers=headers
+        )
+
+    return FileResponse(caminho, media_type=content_type, headers=headers)
+
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.database import engine
-from app.models import Ong, Usuario, UsuarioOngAssociacao
-from app.routes.usuarios import get_usuario_logado
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from app.cache import invalidar_cache
+from app.database import Sessao, get_session
+from app.estatisticas import estatisticas_ong
+from app.models import Animal, Ong, OngEstatistica, Usuario, UsuarioOngAssociacao
+from app.routes.usuarios import UsuarioRead
+from app.geo import localizar
+from app.lote import ResultadoImportacao, exportar, importar_lote
+from app.segurity import Principal, get_principal, ong_administrada, publicar_revogacoes, revogar_tokens
+from app.paginacao import Pagina, ParametrosPaginacao, paginar, parametros_paginacao
 from pydantic import BaseModel
 from typing import List, Optional
+from app.instrumentacao import RotaInstrumentada
 
-router = APIRouter()
-
-def get_session():
-    with Session(engine) as session:
-        yield session
+router = APIRouter(route_class=RotaInstrumentada)
 
 class OngCreate(BaseModel):
     nome: str
@@ -28,6 +33,8 @@ class OngRead(BaseModel):
     endereco: str
     rede_social: Optional[str] = None
     site: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
 
     class Config:
         orm_mode = True
@@ -41,175 +48,200 @@ class OngUpdate(BaseModel):
     site: Optional[str] = None
 
 @router.post("/ongs", response_model=OngRead)
-def criar_ong(
+async def criar_ong(
     ong: OngCreate,
-    usuario_logado: Usuario = Depends(get_usuario_logado),
-    session: Session = Depends(get_session)
+    usuario_logado: Principal = Depends(get_principal),
+    session: Sessao = Depends(get_session)
 ):
     if not usuario_logado.is_admin:
         raise HTTPException(status_code=403, detail="Somente administradores podem criar ONGs")
 
-    nova_ong = Ong(**ong.dict())
+    # ONG e associação na mesma transação: o flush só obtém o id
+    nova_ong = Ong(**ong.dict(), **localizar(ong.endereco))
     session.add(nova_ong)
-    session.commit()
-    session.refresh(nova_ong)
-
-    associacao = UsuarioOngAssociacao(usuario_id=usuario_logado.id, ong_id=nova_ong.id)
-    session.add(associacao)
-    session.commit()
+    await session.flush()
+    session.add(UsuarioOngAssociacao(usuario_id=usuario_logado.id, ong_id=nova_ong.id))
+    await session.commit()
+    await invalidar_cache("ongs")
 
     return nova_ong
 
-@router.get("/ongs", response_model=List[OngRead])
-def listar_ongs(session: Session = Depends(get_session)):
-    return session.exec(select(Ong)).all()
+CAMPOS_ONG = tuple(OngRead.__fields__)
+CAMPOS_ADMINISTRADOR = tuple(UsuarioRead.__fields__)
+ORDENACOES_ONG = ("id", "nome")
 
-@router.put("/ongs/{ong_id}", response_model=OngRead)
-def atualizar_ong(
-    ong_id: int,
-    dados: OngUpdate,
-    usuario_logado: Usuario = Depends(get_usuario_logado),
-    session: Session = Depends(get_session)
+@router.get("/ongs", response_model=Pagina)
+async def listar_ongs(
+    paginacao: ParametrosPaginacao = Depends(parametros_paginacao),
+    session: Sessao = Depends(get_session)
 ):
-    permissao = session.exec(
-        select(UsuarioOngAssociacao).where(
-            (UsuarioOngAssociacao.usuario_id == usuario_logado.id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
+    return await paginar(session, select(Ong), Ong, paginacao, CAMPOS_ONG, ORDENACOES_ONG)
+
+@router.post("/ongs/lote", response_model=ResultadoImportacao)
+async def importar_ongs(
+    request: Request,
+    usuario_logado: Principal = Depends(get_principal),
+    session: Sessao = Depends(get_session)
+):
+    if not usuario_logado.is_admin:
+        raise HTTPException(status_code=403, detail="Somente administradores podem criar ONGs")
+
+    async def inserir_bloco(session, bloco, resultado):
+        linhas = [{**dados, **localizar(dados["endereco"])} for _, dados in bloco]
+        inseridas = await session.execute(insert(Ong).returning(Ong.id, sort_by_parameter_order=True), linhas)
+        ids = list(inseridas.scalars())
+        await session.execute(
+            insert(UsuarioOngAssociacao),
+            [{"usuario_id": usuario_logado.id, "ong_id": ong_id} for ong_id in ids],
         )
-    ).first()
+        return ids
 
-    if not permissao:
-        raise HTTPException(status_code=403, detail="Você não pode editar essa ONG")
+    resultado = await importar_lote(request, session, OngCreate, inserir_bloco)
+    if resultado.ids:
+        await invalidar_cache("ongs")
+    return resultado
 
-    ong = session.get(Ong, ong_id)
-    if not ong:
-        raise HTTPException(status_code=404, detail="ONG não encontrada")
+@router.get("/ongs/export")
+async def exportar_ongs(formato: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    query = select(*[getattr(Ong, campo) for campo in CAMPOS_ONG]).order_by(Ong.id)
+    return exportar(query, CAMPOS_ONG, formato, "ongs")
 
-    for key, value in dados.dict(exclude_unset=True).items():
+@router.put("/ongs/{ong_id}", response_model=OngRead)
+async def atualizar_ong(
+    dados: OngUpdate,
+    ong: Ong = Depends(ong_administrada("Você não pode editar essa ONG")),
+    session: Sessao = Depends(get_session)
+):
+    alteracoes = dados.dict(exclude_unset=True)
+    if "endereco" in alteracoes:
+        alteracoes.update(localizar(alteracoes["endereco"]))
+    for key, value in alteracoes.items():
         setattr(ong, key, value)
 
     session.add(ong)
-    session.commit()
-    session.refresh(ong)
+    await session.commit()
+    await invalidar_cache("ongs")
+    if "endereco" in alteracoes:
+        # a busca de animais por proximidade usa a localização da ONG
+        await invalidar_cache("animais")
     return ong
 
 @router.delete("/ongs/{ong_id}/administradores/{admin_id}", status_code=204)
-def remover_administrador(
-    ong_id: int,
+async def remover_administrador(
     admin_id: int,
-    usuario_logado: Usuario = Depends(get_usuario_logado),
-    session: Session = Depends(get_session)
+    ong: Ong = Depends(ong_administrada("Você não tem permissão para remover administradores desta ONG")),
+    session: Sessao = Depends(get_session)
 ):
-    permissao = session.exec(
-        select(UsuarioOngAssociacao).where(
-            (UsuarioOngAssociacao.usuario_id == usuario_logado.id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
-        )
-    ).first()
-
-    if not permissao:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para remover administradores desta ONG")
-
-    associacao = session.exec(
-        select(UsuarioOngAssociacao).where(
+    removidas = await session.execute(
+        delete(UsuarioOngAssociacao).where(
             (UsuarioOngAssociacao.usuario_id == admin_id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
+            (UsuarioOngAssociacao.ong_id == ong.id)
         )
-    ).first()
-
-    if not associacao:
+    )
+    if not removidas.rowcount:
         raise HTTPException(status_code=404, detail="Admin não está associado a essa ONG")
 
-    session.delete(associacao)
-    session.commit()
+    revogadas = await revogar_tokens(session, [admin_id])
+    await session.commit()
+    publicar_revogacoes(revogadas)
 
 @router.delete("/ongs/{ong_id}", status_code=204)
-def excluir_ong(
-    ong_id: int,
-    usuario_logado: Usuario = Depends(get_usuario_logado),
-    session: Session = Depends(get_session)
+async def excluir_ong(
+    ong: Ong = Depends(ong_administrada("Você não tem permissão para excluir essa ONG")),
+    usuario_logado: Principal = Depends(get_principal),
+    session: Sessao = Depends(get_session)
 ):
-    permissao = session.exec(
-        select(UsuarioOngAssociacao).where(
-            (UsuarioOngAssociacao.usuario_id == usuario_logado.id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
-        )
-    ).first()
-
-    if not permissao:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para excluir essa ONG")
-
-    ong = session.get(Ong, ong_id)
-    if not ong:
-        raise HTTPException(status_code=404, detail="ONG não encontrada")
-
-    session.exec(
-        select(UsuarioOngAssociacao).where(UsuarioOngAssociacao.ong_id == ong_id)
-    ).delete()
-
-    session.delete(ong)
-    session.commit()
+    # verificado aqui e não só pela chave estrangeira: o SQLite roda com foreign_keys desligado
+    ativo = (await session.execute(
+        select(Animal.id).where(Animal.ong_id == ong.id, Animal.deleted_at.is_(None)).limit(1)
+    )).first()
+    if ativo is not None:
+        raise HTTPException(status_code=409, detail="Transfira ou remova os animais da ONG antes de excluí-la")
+
+    administradores = (await session.execute(
+        delete(UsuarioOngAssociacao)
+        .where(UsuarioOngAssociacao.ong_id == ong.id)
+        .returning(UsuarioOngAssociacao.usuario_id)
+    )).scalars().all()
+    # o token de quem excluiu continua válido: a ONG que ele cita deixa de existir
+    revogadas = await revogar_tokens(session, [admin for admin in administradores if admin != usuario_logado.id])
+    # animais removidos logicamente não impedem a exclusão; o histórico continua
+    await session.execute(
+        update(Animal).where(Animal.ong_id == ong.id, Animal.deleted_at.is_not(None)).values(ong_id=None)
+    )
+    await session.execute(delete(OngEstatistica).where(OngEstatistica.ong_id == ong.id))
+    await session.execute(delete(Ong).where(Ong.id == ong.id))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Transfira ou remova os animais da ONG antes de excluí-la")
+    publicar_revogacoes(revogadas)
+    await invalidar_cache("ongs")
 
 class ConviteAdmin(BaseModel):
     usuario_id: int
 
 @router.post("/ongs/{ong_id}/convidar", status_code=201)
-def convidar_administrador(
-    ong_id: int,
+async def convidar_administrador(
     convite: ConviteAdmin,
-    usuario_logado: Usuario = Depends(get_usuario_logado),
-    session: Session = Depends(get_session)
+    ong: Ong = Depends(ong_administrada("Você não tem permissão para convidar nesta ONG")),
+    session: Sessao = Depends(get_session)
 ):
-    permissao = session.exec(
-        select(UsuarioOngAssociacao).where(
-            (UsuarioOngAssociacao.usuario_id == usuario_logado.id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
+    # existência do convidado e associação prévia numa só consulta
+    convidado = (await session.execute(
+        select(Usuario.id, UsuarioOngAssociacao.ong_id)
+        .outerjoin(
+            UsuarioOngAssociacao,
+            (UsuarioOngAssociacao.usuario_id == Usuario.id) & (UsuarioOngAssociacao.ong_id == ong.id),
         )
-    ).first()
-
-    if not permissao:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para convidar nesta ONG")
-
-    usuario_convidado = session.get(Usuario, convite.usuario_id)
-    if not usuario_convidado:
+        .where(Usuario.id == convite.usuario_id)
+    )).first()
+    if convidado is None:
         raise HTTPException(status_code=404, detail="Usuário convidado não encontrado")
-
-   
-    ja_associado = session.exec(
-        select(UsuarioOngAssociacao).where(
-            (UsuarioOngAssociacao.usuario_id == convite.usuario_id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
-        )
-    ).first()
-
-    if ja_associado:
+    if convidado[1] is not None:
         raise HTTPException(status_code=400, detail="Usuário já é administrador dessa ONG")
 
-    nova_associacao = UsuarioOngAssociacao(usuario_id=convite.usuario_id, ong_id=ong_id)
-    session.add(nova_associacao)
-    session.commit()
+    session.add(UsuarioOngAssociacao(usuario_id=convite.usuario_id, ong_id=ong.id))
+    await session.commit()
     return {"mensagem": "Administrador convidado com sucesso"}
 
-@router.get("/ongs/{ong_id}/administradores", response_model=List[UsuarioRead])
-def listar_administradores(
-    ong_id: int,
-    usuario_logado: Usuario = Depends(get_usuario_logado),
-    session: Session = Depends(get_session)
+@router.get("/ongs/{ong_id}/administradores", response_model=Pagina)
+async def listar_administradores(
+    paginacao: ParametrosPaginacao = Depends(parametros_paginacao),
+    ong: Ong = Depends(ong_administrada("Você não tem permissão para ver os administradores dessa ONG")),
+    session: Sessao = Depends(get_session)
 ):
-    
-    permissao = session.exec(
-        select(UsuarioOngAssociacao).where(
-            (UsuarioOngAssociacao.usuario_id == usuario_logado.id) &
-            (UsuarioOngAssociacao.ong_id == ong_id)
-        )
-    ).first()
-
-    if not permissao:
-        raise HTTPException(status_code=403, detail="Você não tem permissão para ver os administradores dessa ONG")
-
-    
-    ongs_associacoes = session.exec(
-        select(Usuario).join(UsuarioOngAssociacao).where(UsuarioOngAssociacao.ong_id == ong_id)
-    ).all()
-
-    return ongs_associacoes
+    query = select(Usuario).join(UsuarioOngAssociacao).where(UsuarioOngAssociacao.ong_id == ong.id)
+
+    return await paginar(session, query, Usuario, paginacao, CAMPOS_ADMINISTRADOR, ORDENACOES_ONG)
+
+class ResumoAnimais(BaseModel):
+    total: int
+    disponiveis: int
+    adotados: int
+    vacinados: int
+    castrados: int
+    taxa_vacinacao: float
+    taxa_castracao: float
+
+class ResumoEspecie(ResumoAnimais):
+    especie: str
+
+class EntradasMes(BaseModel):
+    mes: str
+    total: int
+
+class EstatisticasOng(ResumoAnimais):
+    ong_id: int
+    por_especie: List[ResumoEspecie]
+    entradas_por_mes: List[EntradasMes]
+
+@router.get("/ongs/{ong_id}/estatisticas", response_model=EstatisticasOng)
+async def obter_estatisticas(
+    meses: int = Query(12, ge=1, le=120, description="Meses mais recentes em entradas_por_mes"),
+    ong: Ong = Depends(ong_administrada("Você não tem permissão para ver as estatísticas dessa ONG")),
+    session: Sessao = Depends(get_session)
+):
+    # contadores pré-calculados: poucas linhas por ONG, qualquer que seja o tamanho do catálogo
+    return await estatisticas_ong(session, ong.id, meses)
@@ -0,0 +1,31 @@
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from app.config import PRONTIDAO_TIMEOUT
+from app.database import abrir_sessao, pool_esgotado
+from app.instrumentacao import RotaInstrumentada
+
+router = APIRouter(route_class=RotaInstrumentada)
+
+@router.get("/health", include_in_schema=False)
+def saude():
+    # liveness: o processo responde; não depende do banco
+    return {"status": "ok"}
+
+async def _consultar_banco():
+    async with abrir_sessao() as session:
+        await session.execute(text("SELECT 1"))
+
+@router.get("/ready", include_in_schema=False)
+async def prontidao():
+    # readiness: o balanceador só manda tráfego se há conexão livre e o banco responde
+    if pool_esgotado():
+        return ORJSONResponse({"status": "indisponivel", "motivo": "pool de conexões esgotado"}, status_code=503)
+    try:
+        await asyncio.wait_for(_consultar_banco(), PRONTIDAO_TIMEOUT)
+    except asyncio.TimeoutError:
+        return ORJSONResponse({"status": "indisponivel", "motivo": "banco não respondeu a tempo"}, status_code=503)
+    except Exception:
+        return ORJSONResponse({"status": "indisponivel", "motivo": "banco inacessível"}, status_code=503)
+    return {"status": "ok"}
@@ -1,28 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.database import engine
-from app.models import Usuario
-from app.auth import verificar_senha, hash_senha, criar_token, verificar_token
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from app.database import Sessao, get_session
+from app.models import Animal, Usuario
+from app.recomendacoes import recomendar
+from app.routes.animais import CAMPOS_ANIMAL, AnimalRead
+from app.auth import hash_senha_async
+from app.geo import localizar
+from app.segurity import autenticar, criar_token_usuario, get_usuario_logado
 from pydantic import BaseModel
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm
+from app.instrumentacao import RotaInstrumentada
 
-router = APIRouter()
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/usuarios/login")
-
-def get_session():
-    with Session(engine) as session:
-        yield session
-
-def get_usuario_logado(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> Usuario:
-    dados = verificar_token(token)
-    if not dados:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-
-    usuario = session.exec(select(Usuario).where(Usuario.id == dados["sub"])).first()
-    if not usuario:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
-    return usuario
+router = APIRouter(route_class=RotaInstrumentada)
 
 class UsuarioCreate(BaseModel):
     nome: str
@@ -51,27 +42,55 @@ class UsuarioRead(BaseModel):
         orm_mode = True
 
 @router.post("/usuarios/", response_model=UsuarioRead)
-def criar_usuario(usuario: UsuarioCreate, session: Session = Depends(get_session)):
-    usuario_existente = session.exec(select(Usuario).where(Usuario.email == usuario.email)).first()
+async def criar_usuario(usuario: UsuarioCreate, session: Sessao = Depends(get_session)):
+    usuario_existente = (await session.exec(select(Usuario).where(Usuario.email == usuario.email))).first()
     if usuario_existente:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
 
-    novo_usuario = Usuario(**usuario.dict(exclude={"senha"}))
-    novo_usuario.senha = hash_senha(usuario.senha)
+    local = localizar(usuario.endereco_cep)
+    novo_usuario = Usuario(**usuario.dict(exclude={"senha"}), lat=local["lat"], lon=local["lon"])
+    novo_usuario.senha = await hash_senha_async(usuario.senha)
     session.add(novo_usuario)
-    session.commit()
-    session.refresh(novo_usuario)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # outro cadastro com o mesmo email passou pela checagem acima ao mesmo tempo
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Email já cadastrado")
+    await session.refresh(novo_usuario)
     return novo_usuario
 
 @router.post("/usuarios/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    usuario = session.exec(select(Usuario).where(Usuario.email == form_data.username)).first()
-    if not usuario or not verificar_senha(form_data.password, usuario.senha):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Sessao = Depends(get_session)):
+    usuario = await autenticar(session, form_data.username, form_data.password)
+    if not usuario:
         raise HTTPException(status_code=400, detail="Credenciais inválidas")
 
-    token = criar_token({"sub": str(usuario.id)})
+    token = await criar_token_usuario(session, usuario)
     return {"access_token": token, "token_type": "bearer"}
 
 @router.get("/usuarios/me", response_model=UsuarioRead)
-def perfil(usuario: Usuario = Depends(get_usuario_logado)):
+async def perfil(usuario: Usuario = Depends(get_usuario_logado)):
     return usuario
+
+class Recomendacao(AnimalRead):
+    pontuacao: float
+
+@router.get("/usuarios/me/recomendacoes", response_model=List[Recomendacao])
+async def recomendacoes(
+    k: int = Query(10, ge=1, le=100),
+    usuario: Usuario = Depends(get_usuario_logado),
+    session: Sessao = Depends(get_session),
+):
+    melhores = await recomendar(session, usuario, k)
+    if not melhores:
+        return []
+
+    colunas = [getattr(Animal, campo) for campo in CAMPOS_ANIMAL]
+    linhas = (await session.execute(select(*colunas).where(Animal.id.in_([animal_id for animal_id, _ in melhores])))).all()
+    animais = {linha.id: linha._mapping for linha in linhas}
+    return [
+        {**animais[animal_id], "pontuacao": pontuacao}
+        for animal_id, pontuacao in melhores
+        if animal_id in animais
+    ]
@@ -1,22 +1,211 @@
 # app/security.py
-from fastapi import Depends, HTTPException
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
-from sqlmodel import Session, select
-from app.database import engine
-from app.auth import verificar_token
-from app.models import Usuario
+from sqlalchemy import update
+from sqlmodel import select
+from app.config import TOKEN_CACHE_MAX, TOKEN_CACHE_TTL
+from app.database import Sessao, get_session
+from app.auth import criar_token, verificar_senha_async, verificar_token
+from app.models import Ong, Usuario, UsuarioOngAssociacao
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_usuario_logado(token: str = Depends(oauth2_scheme)) -> Usuario:
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    is_admin: bool
+    ongs: FrozenSet[int]
+    versao: int
+
+
+class CacheVersoes:
+    """Versão atual do token de cada usuário, com TTL e tamanho limitados.
+
+    Um usuário cuja versão no banco é maior que a do token teve os tokens
+    revogados; outros workers enxergam a revogação em até TOKEN_CACHE_TTL.
+    """
+
+    def __init__(self, ttl: float, maximo: int):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._itens: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, usuario_id: int) -> Optional[int]:
+        with self._lock:
+            item = self._itens.get(usuario_id)
+            if item is None:
+                return None
+            versao, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[usuario_id]
+                return None
+            self._itens.move_to_end(usuario_id)
+            return versao
+
+    def definir(self, usuario_id: int, versao: int):
+        with self._lock:
+            # uma leitura do banco anterior à revogação não pode sobrescrever a versão nova
+            atual = self._itens.get(usuario_id)
+            if atual is not None and atual[0] > versao:
+                versao = atual[0]
+            self._itens[usuario_id] = (versao, time.monotonic() + self.ttl)
+            self._itens.move_to_end(usuario_id)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, usuario_id: int):
+        with self._lock:
+            self._itens.pop(usuario_id, None)
+
+
+versoes_token = CacheVersoes(TOKEN_CACHE_TTL, TOKEN_CACHE_MAX)
+
+
+async def autenticar(session: Sessao, email: str, senha: str) -> Optional[Usuario]:
+    usuario = (await session.exec(select(Usuario).where(Usuario.email == email))).first()
+    if not usuario:
+        return None
+
+    valida, novo_hash = await verificar_senha_async(senha, usuario.senha)
+    if not valida:
+        return None
+
+    if novo_hash:
+        usuario.senha = novo_hash
+        session.add(usuario)
+        await session.commit()
+    return usuario
+
+
+async def criar_token_usuario(session: Sessao, usuario: Usuario) -> str:
+    ongs = (await session.exec(
+        select(UsuarioOngAssociacao.ong_id).where(UsuarioOngAssociacao.usuario_id == usuario.id)
+    )).all()
+    return criar_token({
+        "sub": str(usuario.id),
+        "adm": usuario.is_admin,
+        "ongs": sorted(ongs),
+        "ver": usuario.token_versao,
+    })
+
+
+async def revogar_tokens(session: Sessao, usuario_ids: Iterable[int]) -> Dict[int, int]:
+    """Incrementa token_versao na transação da sessão e devolve as novas versões.
+
+    Depois do commit, passe o resultado a ``publicar_revogacoes``: mexer no
+    cache antes deixaria um request concorrente guardar de novo a versão antiga.
+    """
+    usuario_ids = list(usuario_ids)
+    if not usuario_ids:
+        return {}
+    linhas = (await session.execute(
+        update(Usuario)
+        .where(Usuario.id.in_(usuario_ids))
+        .values(token_versao=Usuario.token_versao + 1)
+        .returning(Usuario.id, Usuario.token_versao)
+    )).all()
+    return {usuario_id: versao for usuario_id, versao in linhas}
+
+
+def publicar_revogacoes(versoes: Dict[int, int]):
+    for usuario_id, versao in versoes.items():
+        versoes_token.definir(usuario_id, versao)
+
+
+async def get_principal(token: str = Depends(oauth2_scheme), session: Sessao = Depends(get_session)) -> Principal:
     dados = verificar_token(token)
-    if not dados or "sub" not in dados:
-        raise HTTPException(status_code=401, detail="Token inválido")
-
-    user_id = int(dados["sub"])
-    with Session(engine) as session:
-        usuario = session.get(Usuario, user_id)
-        if not usuario:
-            raise HTTPException(status_code=404, detail="Usuário não encontrado")
-        return usuario
+    if not dados or "sub" not in dados or "ver" not in dados:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
+
+    principal = Principal(
+        id=int(dados["sub"]),
+        is_admin=bool(dados.get("adm")),
+        ongs=frozenset(dados.get("ongs") or ()),
+        versao=int(dados["ver"]),
+    )
+
+    versao_atual = versoes_token.obter(principal.id)
+    if versao_atual is None:
+        versao_atual = (await session.exec(
+            select(Usuario.token_versao).where(Usuario.id == principal.id)
+        )).first()
+        if versao_atual is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
+        versoes_token.definir(principal.id, versao_atual)
+
+    if principal.versao < versao_atual:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revogado")
+    return principal
+
+
+# a mesma sessão do request (get_session é resolvida uma única vez por request)
+# é compartilhada entre a autenticação e a rota
+async def get_usuario_logado(principal: Principal = Depends(get_principal), session: Sessao = Depends(get_session)) -> Usuario:
+    usuario = await session.get(Usuario, principal.id)
+    if not usuario:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário não encontrado")
+    return usuario
+
+
+class OngsAdministradas:
+    """ONGs que o usuário administra, resolvidas no máximo uma vez por request.
+
+    O token já traz as ONGs administradas no login (revogações invalidam o
+    token); só quando a ONG pedida não está nele o conjunto atual é lido do
+    banco, numa única consulta reaproveitada pelo resto do request.
+    """
+
+    def __init__(self, principal: Principal, session: Sessao):
+        self.principal = principal
+        self.session = session
+        self._do_banco: Optional[FrozenSet[int]] = None
+
+    async def contem(self, ong_id: int) -> bool:
+        if ong_id in self.principal.ongs:
+            return True
+        if self._do_banco is None:
+            ids = (await self.session.execute(
+                select(UsuarioOngAssociacao.ong_id).where(UsuarioOngAssociacao.usuario_id == self.principal.id)
+            )).scalars().all()
+            self._do_banco = frozenset(ids)
+        return ong_id in self._do_banco
+
+
+async def get_ongs_administradas(
+    principal: Principal = Depends(get_principal), session: Sessao = Depends(get_session)
+) -> OngsAdministradas:
+    return OngsAdministradas(principal, session)
+
+
+def ong_administrada(mensagem: str):
+    """Dependência que carrega a ONG do path e confere a permissão na mesma consulta.
+
+    404 se a ONG não existe; 403 (com ``mensagem``) se o usuário não a administra.
+    """
+    async def dependencia(
+        ong_id: int,
+        principal: Principal = Depends(get_principal),
+        session: Sessao = Depends(get_session),
+    ) -> Ong:
+        linha = (await session.execute(
+            select(Ong, UsuarioOngAssociacao.usuario_id)
+            .outerjoin(
+                UsuarioOngAssociacao,
+                (UsuarioOngAssociacao.ong_id == Ong.id) & (UsuarioOngAssociacao.usuario_id == principal.id),
+            )
+            .where(Ong.id == ong_id)
+        )).first()
+        if linha is None:
+            raise HTTPException(status_code=404, detail="ONG não encontrada")
+        if linha[1] is None:
+            raise HTTPException(status_code=403, detail=mensagem)
+        return linha[0]
+
+    return dependencia
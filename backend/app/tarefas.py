@@ -0,0 +1,156 @@
+import asyncio
+import importlib
+import logging
+import random
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, case, delete, update
+from sqlmodel import select
+
+from app.config import (
+    TAREFAS_BACKOFF_BASE,
+    TAREFAS_BACKOFF_MAX,
+    TAREFAS_MAX_TENTATIVAS,
+    TAREFAS_RETENCAO_DIAS,
+    TAREFAS_TIMEOUT,
+)
+from app.database import abrir_sessao
+from app.models import Tarefa
+from app.mudancas import agora
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+# módulos que registram tarefas com @tarefa; o worker importa todos
+MODULOS_TAREFAS = ("app.adocoes",)
+
+# folga do prazo além do timeout da execução
+MARGEM_BLOQUEIO = timedelta(seconds=30)
+
+Executor = Callable[[dict], Awaitable[None]]
+_registro: Dict[str, Executor] = {}
+
+
+def tarefa(tipo: str):
+    """Registra o executor de um tipo de tarefa. Deve ser idempotente: a entrega é pelo menos uma vez."""
+    def registrar(funcao: Executor) -> Executor:
+        _registro[tipo] = funcao
+        return funcao
+    return registrar
+
+
+def importar_tarefas():
+    for modulo in MODULOS_TAREFAS:
+        importlib.import_module(modulo)
+
+
+def enfileirar(session, tipo: str, dados: dict, atraso: float = 0, max_tentativas: int = TAREFAS_MAX_TENTATIVAS) -> Tarefa:
+    """Acrescenta a tarefa à transação da sessão: só entra na fila se o commit da requisição acontecer."""
+    nova = Tarefa(
+        tipo=tipo, dados=dados, status=PENDENTE, max_tentativas=max_tentativas,
+        executar_em=agora() + timedelta(seconds=atraso),
+    )
+    session.add(nova)
+    return nova
+
+
+@dataclass
+class TarefaReivindicada:
+    id: int
+    tipo: str
+    dados: dict
+    tentativa: int
+    max_tentativas: int
+
+
+async def reivindicar(quantidade: int) -> List[TarefaReivindicada]:
+    """Marca até ``quantidade`` tarefas vencidas como em execução por este worker.
+
+    No PostgreSQL o FOR UPDATE SKIP LOCKED deixa cada worker com tarefas
+    diferentes sem esperar pelos outros; no SQLite a cláusula é omitida e as
+    escritas já são serializadas pelo próprio banco.
+    """
+    momento = agora()
+    vencidas = (
+        select(Tarefa.id)
+        .where(Tarefa.status == PENDENTE, Tarefa.executar_em <= momento)
+        .order_by(Tarefa.executar_em)
+        .limit(quantidade)
+        .with_for_update(skip_locked=True)
+    )
+    async with abrir_sessao() as session:
+        linhas = (await session.execute(
+            update(Tarefa)
+            .where(Tarefa.id.in_(vencidas.scalar_subquery()))
+            .values(
+                status=EXECUTANDO,
+                tentativas=Tarefa.tentativas + 1,
+                bloqueada_ate=momento + timedelta(seconds=TAREFAS_TIMEOUT) + MARGEM_BLOQUEIO,
+            )
+            .returning(Tarefa.id, Tarefa.tipo, Tarefa.dados, Tarefa.tentativas, Tarefa.max_tentativas)
+        )).all()
+        await session.commit()
+    return [TarefaReivindicada(*linha) for linha in sorted(linhas)]
+
+
+def _espera(tentativa: int) -> float:
+    # exponencial com jitter, para falhas simultâneas não voltarem juntas
+    return min(TAREFAS_BACKOFF_MAX, TAREFAS_BACKOFF_BASE * 2 ** (tentativa - 1)) * random.uniform(0.5, 1)
+
+
+async def executar(item: TarefaReivindicada):
+    executor = _registro.get(item.tipo)
+    erro: Optional[str] = None
+    if executor is None:
+        erro = f"Tipo de tarefa desconhecido: {item.tipo}"
+    else:
+        try:
+            await asyncio.wait_for(executor(item.dados or {}), TAREFAS_TIMEOUT)
+        except Exception as excecao:
+            logger.exception("Tarefa %s (%s) falhou na tentativa %s", item.id, item.tipo, item.tentativa)
+            erro = "".join(traceback.format_exception_only(type(excecao), excecao)).strip()[:2000]
+
+    # a tentativa no filtro evita sobrescrever uma tarefa que venceu o prazo e foi reivindicada de novo
+    mesma_execucao = and_(Tarefa.id == item.id, Tarefa.status == EXECUTANDO, Tarefa.tentativas == item.tentativa)
+    if erro is None:
+        valores = dict(status=CONCLUIDA, concluida_em=agora(), bloqueada_ate=None, erro=None)
+    elif executor is None or item.tentativa >= item.max_tentativas:
+        valores = dict(status=FALHOU, bloqueada_ate=None, erro=erro)
+    else:
+        valores = dict(
+            status=PENDENTE, bloqueada_ate=None, erro=erro,
+            executar_em=agora() + timedelta(seconds=_espera(item.tentativa)),
+        )
+    async with abrir_sessao() as session:
+        await session.execute(update(Tarefa).where(mesma_execucao).values(**valores))
+        await session.commit()
+
+
+async def recuperar_expiradas() -> int:
+    """Devolve à fila as tarefas de workers que pararam no meio e apaga as concluídas antigas."""
+    momento = agora()
+    async with abrir_sessao() as session:
+        recuperadas = await session.execute(
+            update(Tarefa)
+            .where(Tarefa.status == EXECUTANDO, Tarefa.bloqueada_ate < momento)
+            .values(
+                status=case((Tarefa.tentativas >= Tarefa.max_tentativas, FALHOU), else_=PENDENTE),
+                bloqueada_ate=None,
+                executar_em=momento,
+                erro="Prazo de execução esgotado",
+            )
+        )
+        await session.execute(
+            delete(Tarefa).where(
+                Tarefa.status == CONCLUIDA, Tarefa.concluida_em < momento - timedelta(days=TAREFAS_RETENCAO_DIAS)
+            )
+        )
+        await session.commit()
+    return recuperadas.rowcount or 0
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import anyio
+from fastapi import HTTPException, Request
+from multipart import MultipartParser
+from multipart.exceptions import FormParserError
+from multipart.multipart import parse_options_header
+
+from app.config import UPLOAD_MAX_BYTES
+
+TIPOS_IMAGEM = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+# assinaturas dos formatos aceitos: o tipo gravado vem do conteúdo, nunca do Content-Type do cliente
+ASSINATURAS = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def tipo_pelo_conteudo(inicio: bytes) -> Optional[str]:
+    """Formato da imagem pelos primeiros bytes (12 bastam); None se não for um dos aceitos."""
+    if inicio[:4] == b"RIFF" and inicio[8:12] == b"WEBP":
+        return "image/webp"
+    for assinatura, tipo in ASSINATURAS:
+        if inicio.startswith(assinatura):
+            return tipo
+    return None
+
+
+@dataclass
+class ArquivoRecebido:
+    caminho: str
+    sha256: str
+    tamanho: int
+    content_type: str
+
+    @property
+    def extensao(self) -> str:
+        return TIPOS_IMAGEM[self.content_type]
+
+
+class _PartesMultipart:
+    """Callbacks do python-multipart que separam os bytes do campo de arquivo.
+
+    Os callbacks são síncronos; os trechos são acumulados e escritos de forma
+    assíncrona depois de cada chunk, como faz o parser de formulários do Starlette.
+    """
+
+    def __init__(self, campo: str):
+        self.campo = campo.encode()
+        self.content_type: Optional[str] = None
+        self.pendentes = []
+        self._nome_header = b""
+        self._valor_header = b""
+        self._headers = {}
+        self._no_campo = False
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data, inicio, fim):
+        self._nome_header += data[inicio:fim]
+
+    def on_header_value(self, data, inicio, fim):
+        self._valor_header += data[inicio:fim]
+
+    def on_header_end(self):
+        self._headers[self._nome_header.lower()] = self._valor_header
+        self._nome_header = b""
+        self._valor_header = b""
+
+    def on_headers_finished(self):
+        _, opcoes = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._no_campo = opcoes.get(b"name") == self.campo and b"filename" in opcoes
+        if self._no_campo:
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip()
+
+    def on_part_data(self, data, inicio, fim):
+        if self._no_campo:
+            self.pendentes.append(data[inicio:fim])
+
+    def on_part_end(self):
+        self._no_campo = False
+
+    def callbacks(self) -> dict:
+        return {
+            nome: getattr(self, nome)
+            for nome in (
+                "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+                "on_headers_finished", "on_part_data", "on_part_end",
+            )
+        }
+
+
+async def _trechos_multipart(request: Request, partes: _PartesMultipart, boundary: bytes) -> AsyncIterator[bytes]:
+    parser = MultipartParser(boundary, partes.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for trecho in partes.pendentes:
+                yield trecho
+            partes.pendentes.clear()
+        parser.finalize()
+    except FormParserError:
+        raise HTTPException(status_code=400, detail="Requisição multipart inválida")
+    for trecho in partes.pendentes:
+        yield trecho
+    partes.pendentes.clear()
+
+
+async def receber_imagem(request: Request, diretorio_temporario: str, campo: str = "arquivo") -> ArquivoRecebido:
+    """Grava o corpo da requisição num arquivo temporário, em streaming.
+
+    Aceita multipart/form-data (campo ``arquivo``) ou o binário da imagem no
+    corpo com o Content-Type da imagem. O limite UPLOAD_MAX_BYTES é checado
+    pelo Content-Length antes de ler qualquer byte e de novo durante a leitura.
+    O tipo guardado é o identificado pelos primeiros bytes do arquivo.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_BYTES + 64 * 1024:
+        raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo permitido")
+
+    tipo, opcoes = parse_options_header(request.headers.get("content-type", ""))
+    tipo = tipo.decode("latin-1").lower()
+
+    partes = None
+    if tipo == "multipart/form-data":
+        if b"boundary" not in opcoes:
+            raise HTTPException(status_code=400, detail="Requisição multipart sem boundary")
+        partes = _PartesMultipart(campo)
+        trechos = _trechos_multipart(request, partes, opcoes[b"boundary"])
+    elif tipo in TIPOS_IMAGEM:
+        trechos = request.stream()
+    else:
+        raise HTTPException(status_code=415, detail="Formato de imagem não suportado")
+
+    os.makedirs(diretorio_temporario, exist_ok=True)
+    caminho = os.path.join(diretorio_temporario, f"{uuid.uuid4().hex}.parcial")
+    sha256 = hashlib.sha256()
+    tamanho = 0
+    inicio = b""
+    try:
+        async with await anyio.open_file(caminho, "wb") as destino:
+            async for trecho in trechos:
+                tamanho += len(trecho)
+                if tamanho > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Arquivo excede o tamanho máximo permitido")
+                if len(inicio) < 12:
+                    inicio += trecho[:12 - len(inicio)]
+                sha256.update(trecho)
+                await destino.write(trecho)
+
+        if partes is not None:
+            tipo = (partes.content_type or "").lower()
+        if tamanho == 0:
+            raise HTTPException(status_code=400, detail="Nenhum arquivo enviado")
+        if tipo not in TIPOS_IMAGEM:
+            raise HTTPException(status_code=415, detail="Formato de imagem não suportado")
+        tipo = tipo_pelo_conteudo(inicio)
+        if tipo is None:
+            raise HTTPException(status_code=415, detail="O conteúdo não é uma imagem JPEG, PNG, WebP ou GIF")
+    except BaseException:
+        await anyio.Path(caminho).unlink(missing_ok=True)
+        raise
+
+    return ArquivoRecebido(caminho=caminho, sha256=sha256.hexdigest(), tamanho=tamanho, content_type=tipo)
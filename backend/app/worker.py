@@ -0,0 +1,75 @@
+"""Worker da fila de tarefas.
+
+    python -m app.worker --concorrencia 4
+
+Rode quantos processos forem necessários, em uma ou várias máquinas: cada um
+reivindica tarefas diferentes (FOR UPDATE SKIP LOCKED no PostgreSQL). SIGTERM
+ou SIGINT param a busca de novas tarefas e esperam as em andamento.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import time
+from typing import Set
+
+from app.config import TAREFAS_CONCORRENCIA, TAREFAS_INTERVALO
+from app.tarefas import executar, importar_tarefas, recuperar_expiradas, reivindicar
+
+logger = logging.getLogger("app.worker")
+
+# intervalo entre as varreduras de tarefas com prazo esgotado
+RECUPERACAO_SEGUNDOS = 30
+
+
+async def rodar(concorrencia: int):
+    importar_tarefas()
+    parar = asyncio.Event()
+    laco = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        laco.add_signal_handler(sinal, parar.set)
+
+    em_execucao: Set[asyncio.Task] = set()
+    espera_parada = asyncio.create_task(parar.wait())
+    proxima_recuperacao = 0.0
+    logger.info("Worker iniciado (concorrência %s)", concorrencia)
+
+    while not parar.is_set():
+        livres = concorrencia - len(em_execucao)
+        reivindicadas = []
+        try:
+            if time.monotonic() >= proxima_recuperacao:
+                recuperadas = await recuperar_expiradas()
+                if recuperadas:
+                    logger.warning("%s tarefa(s) com prazo esgotado voltaram para a fila", recuperadas)
+                proxima_recuperacao = time.monotonic() + RECUPERACAO_SEGUNDOS
+            if livres:
+                reivindicadas = await reivindicar(livres)
+        except Exception:
+            logger.exception("Falha ao buscar tarefas")
+
+        for item in reivindicadas:
+            execucao = asyncio.create_task(executar(item))
+            em_execucao.add(execucao)
+            execucao.add_done_callback(em_execucao.discard)
+
+        # fila vazia ou sem vagas: espera uma vaga, a parada ou o próximo ciclo
+        if len(reivindicadas) < livres or not livres:
+            await asyncio.wait({espera_parada, *em_execucao}, timeout=TAREFAS_INTERVALO, return_when=asyncio.FIRST_COMPLETED)
+
+    espera_parada.cancel()
+    logger.info("Parando: aguardando %s tarefa(s) em andamento", len(em_execucao))
+    if em_execucao:
+        await asyncio.wait(em_execucao)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concorrencia", type=int, default=TAREFAS_CONCORRENCIA, help="tarefas simultâneas neste processo")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(rodar(args.concorrencia))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Vazão de verificação de senha (logins/s) antes e depois do pool de hashing.
+
+    python -m benchmarks.bench_login --logins 64 --concorrencia 16
+
+Os dois casos recebem os mesmos logins com a mesma concorrência:
+"antes" verifica no threadpool do Starlette, onde as rotas síncronas
+rodavam; "depois" despacha para o pool de processos.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app import auth
+
+
+async def _verificar_threadpool(hash_senha: str):
+    return await run_in_threadpool(auth.verificar_senha, "senha-de-teste", hash_senha)
+
+
+async def _verificar_pool(hash_senha: str):
+    return await auth.verificar_senha_async("senha-de-teste", hash_senha)
+
+
+async def medir(verificar, hash_senha: str, logins: int, concorrencia: int) -> float:
+    vagas = asyncio.Semaphore(concorrencia)
+
+    async def login():
+        async with vagas:
+            await verificar(hash_senha)
+
+    # aquece threads e processos antes de medir
+    await asyncio.gather(*[login() for _ in range(concorrencia)])
+    inicio = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    return logins / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concorrencia", type=int, default=16, help="logins simultâneos nos dois casos")
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    hash_senha = auth.hash_senha("senha-de-teste")
+
+    antes = asyncio.run(medir(_verificar_threadpool, hash_senha, args.logins, args.concorrencia))
+    depois = asyncio.run(medir(_verificar_pool, hash_senha, args.logins, args.concorrencia))
+    auth.encerrar_pool_hash()
+
+    print(json.dumps({
+        "bcrypt_rounds": auth.BCRYPT_ROUNDS,
+        "nucleos": nucleos,
+        "hash_workers": auth.HASH_WORKERS,
+        "concorrencia": args.concorrencia,
+        "antes": {"logins_s": round(antes, 2), "logins_s_por_nucleo": round(antes / nucleos, 2)},
+        "depois": {"logins_s": round(depois, 2), "logins_s_por_nucleo": round(depois / nucleos, 2)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Micro-benchmarks das rotas quentes com pytest-benchmark.
+
+    python -m pytest benchmarks/bench_rotas.py --benchmark-json=bench.json
+    pytest-benchmark compare 0001 0002   # com --benchmark-autosave
+
+Sem DATABASE_URL usa um SQLite temporário populado com BENCH_USUARIOS,
+BENCH_ONGS e BENCH_ANIMAIS; um banco já populado é usado como está.
+"""
+import random
+
+from benchmarks.carga import imagem_jpeg
+from benchmarks.semear import SENHA, email_usuario
+
+
+def _ok(resposta):
+    assert resposta.status_code < 400, resposta.text
+    return resposta
+
+
+def test_listar_animais_filtros(benchmark, cliente):
+    parametros = {"disponivel": "true", "sociavel_com_gatos": "true", "limit": 50}
+    benchmark(lambda: _ok(cliente.get("/animais", params=parametros)))
+
+
+def test_listar_animais_sem_total(benchmark, cliente):
+    parametros = {"disponivel": "true", "limit": 50, "contar_total": "false"}
+    benchmark(lambda: _ok(cliente.get("/animais", params=parametros)))
+
+
+def test_obter_animal(benchmark, cliente, ids_animais):
+    aleatorio = random.Random(42)
+    benchmark(lambda: _ok(cliente.get(f"/animais/{aleatorio.choice(ids_animais)}")))
+
+
+def test_perfil(benchmark, cliente, headers):
+    benchmark(lambda: _ok(cliente.get("/usuarios/me", headers=headers)))
+
+
+def test_login(benchmark, cliente):
+    dados = {"username": email_usuario(0), "password": SENHA}
+    # cada rodada custa um bcrypt completo
+    benchmark.pedantic(lambda: _ok(cliente.post("/login", data=dados)), rounds=10, iterations=1, warmup_rounds=1)
+
+
+def test_upload_foto(benchmark, cliente, headers, ids_animais):
+    jpeg = imagem_jpeg()
+    aleatorio = random.Random(42)
+
+    def enviar():
+        arquivos = {"arquivo": ("foto.jpg", jpeg, "image/jpeg")}
+        return _ok(cliente.put(f"/animais/{aleatorio.choice(ids_animais)}/foto", files=arquivos, headers=headers))
+
+    benchmark.pedantic(enviar, rounds=10, iterations=1, warmup_rounds=1)
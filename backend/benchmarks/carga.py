@@ -0,0 +1,211 @@
+"""Carga nas rotas quentes da API: vazão e latência p50/p90/p99 em JSON.
+
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --requisicoes 500 --concorrencia 16 > atual.json
+    python -m benchmarks.comparar base.json atual.json
+
+Sem --url a aplicação roda no próprio processo (transporte ASGI do httpx),
+com o banco de DATABASE_URL. Em ambos os casos o banco deve ter sido
+populado por ``benchmarks.semear``. Para medir o banco e não o cache de
+respostas, rode com CACHE_BACKEND=desligado. Todo o tráfego sai de um IP:
+rode o servidor com LIMITES_BACKEND=desligado para o login não receber 429.
+No modo em processo o transporte ASGI espera as background tasks, então o
+upload inclui a geração das variantes.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.semear import SENHA, email_usuario
+
+CENARIOS = ("listar_animais", "obter_animal", "login", "perfil", "upload_foto")
+
+
+def percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+async def executar(
+    requisicao: Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]],
+    cliente: httpx.AsyncClient,
+    total: int,
+    concorrencia: int,
+    semente: int,
+) -> dict:
+    latencias: List[float] = []
+    erros: Dict[str, int] = {}
+    fila = iter(range(total))
+
+    async def trabalhador(numero: int):
+        aleatorio = random.Random(semente + numero)
+        for _ in fila:
+            inicio = time.perf_counter()
+            try:
+                resposta = await requisicao(cliente, aleatorio)
+                codigo = str(resposta.status_code) if resposta.status_code >= 400 else None
+            except httpx.HTTPError as erro:
+                codigo = type(erro).__name__
+            latencias.append(time.perf_counter() - inicio)
+            if codigo:
+                erros[codigo] = erros.get(codigo, 0) + 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabalhador(numero) for numero in range(concorrencia)])
+    duracao = time.perf_counter() - inicio
+
+    milissegundos = [latencia * 1000 for latencia in latencias]
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "duracao_s": round(duracao, 3),
+        "req_s": round(len(latencias) / duracao, 2) if duracao else 0.0,
+        "p50_ms": round(percentil(milissegundos, 50), 3),
+        "p90_ms": round(percentil(milissegundos, 90), 3),
+        "p99_ms": round(percentil(milissegundos, 99), 3),
+        "media_ms": round(statistics.fmean(milissegundos), 3) if milissegundos else 0.0,
+    }
+
+
+def imagem_jpeg(lado: int = 640) -> bytes:
+    from PIL import Image
+
+    imagem = Image.new("RGB", (lado, lado))
+    imagem.putdata([((x * 7) % 256, (y * 5) % 256, ((x + y) * 3) % 256) for y in range(lado) for x in range(lado)])
+    saida = io.BytesIO()
+    imagem.save(saida, "JPEG", quality=85)
+    return saida.getvalue()
+
+
+async def preparar(cliente: httpx.AsyncClient, usuarios: int) -> dict:
+    resposta = await cliente.post("/login", data={"username": email_usuario(0), "password": SENHA})
+    resposta.raise_for_status()
+    token = resposta.json()["access_token"]
+    animais = (await cliente.get("/animais", params={"limit": 200, "fields": "id"})).json()
+    ids = [item["id"] for item in animais["itens"]]
+    if not ids:
+        raise SystemExit("banco sem animais: rode antes python -m benchmarks.semear")
+    return {"headers": {"Authorization": f"Bearer {token}"}, "ids": ids, "usuarios": usuarios}
+
+
+def montar_cenarios(contexto: dict) -> dict:
+    headers = contexto["headers"]
+    ids = contexto["ids"]
+    jpeg = imagem_jpeg()
+
+    async def listar_animais(cliente, aleatorio):
+        return await cliente.get("/animais", params={
+            "disponivel": "true",
+            "sociavel_com_gatos": aleatorio.choice(("true", "false")),
+            "limit": 50,
+        })
+
+    async def obter_animal(cliente, aleatorio):
+        return await cliente.get(f"/animais/{aleatorio.choice(ids)}")
+
+    async def login(cliente, aleatorio):
+        indice = aleatorio.randrange(max(contexto["usuarios"], 1))
+        return await cliente.post("/login", data={"username": email_usuario(indice), "password": SENHA})
+
+    async def perfil(cliente, aleatorio):
+        return await cliente.get("/usuarios/me", headers=headers)
+
+    async def upload_foto(cliente, aleatorio):
+        return await cliente.put(
+            f"/animais/{aleatorio.choice(ids)}/foto",
+            files={"arquivo": ("foto.jpg", jpeg, "image/jpeg")},
+            headers=headers,
+        )
+
+    return {
+        "listar_animais": listar_animais,
+        "obter_animal": obter_animal,
+        "login": login,
+        "perfil": perfil,
+        "upload_foto": upload_foto,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def medir(args) -> dict:
+    if args.url:
+        transporte = None
+        base = args.url
+        alvo = args.url
+    else:
+        from app.main import app
+
+        transporte = httpx.ASGITransport(app=app)
+        base = "http://bench"
+        alvo = "asgi:" + os.getenv("DATABASE_URL", "")
+
+    limites = httpx.Limits(max_connections=args.concorrencia, max_keepalive_connections=args.concorrencia)
+    async with httpx.AsyncClient(base_url=base, transport=transporte, limits=limites, timeout=60) as cliente:
+        contexto = await preparar(cliente, args.usuarios)
+        cenarios = montar_cenarios(contexto)
+        resultados = {}
+        for nome in args.cenarios:
+            # login é caro (bcrypt) e o upload grava em disco: usam menos requisições
+            total = args.requisicoes if nome not in ("login", "upload_foto") else max(args.requisicoes // 10, 1)
+            # aquecimento: conexões, pools de processos e caches
+            await executar(cenarios[nome], cliente, min(total, args.concorrencia * 2), args.concorrencia, args.semente)
+            resultados[nome] = await executar(cenarios[nome], cliente, total, args.concorrencia, args.semente)
+
+    return {
+        "commit": _commit(),
+        "alvo": alvo,
+        "python": platform.python_version(),
+        "nucleos": os.cpu_count(),
+        "parametros": {
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "semente": args.semente,
+        },
+        "cenarios": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="servidor já em execução; sem ele a app roda no processo")
+    parser.add_argument("--requisicoes", type=int, default=500)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--usuarios", type=int, default=1000, help="usuários semeados, para o login")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=list(CENARIOS))
+    args = parser.parse_args()
+
+    relatorio = asyncio.run(medir(args))
+    if not args.url:
+        from app.auth import encerrar_pool_hash
+        from app.imagens import encerrar_pool_imagens
+
+        encerrar_pool_hash()
+        encerrar_pool_imagens()
+    print(json.dumps(relatorio, indent=2))
+
+
+if __name__ == "__main__":
+    main()
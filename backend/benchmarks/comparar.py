@@ -0,0 +1,61 @@
+"""Compara dois relatórios de ``benchmarks.carga`` e aponta regressões.
+
+    python -m benchmarks.comparar base.json atual.json --tolerancia 10
+
+Termina com código 1 se algum cenário piorar além da tolerância (%) em
+p50, p99 ou vazão.
+"""
+import argparse
+import json
+import sys
+
+# métrica -> True se maior é melhor
+METRICAS = {"req_s": True, "p50_ms": False, "p99_ms": False}
+
+
+def variacao(antes: float, depois: float) -> float:
+    if not antes:
+        return 0.0
+    return (depois - antes) / antes * 100
+
+
+def comparar(base: dict, atual: dict, tolerancia: float):
+    linhas = []
+    regressoes = []
+    for cenario, depois in atual["cenarios"].items():
+        antes = base["cenarios"].get(cenario)
+        if antes is None:
+            continue
+        for metrica, maior_melhor in METRICAS.items():
+            delta = variacao(antes[metrica], depois[metrica])
+            piora = -delta if maior_melhor else delta
+            marca = "REGRESSÃO" if piora > tolerancia else ""
+            if marca:
+                regressoes.append(f"{cenario}.{metrica}")
+            linhas.append(f"{cenario:<16} {metrica:<7} {antes[metrica]:>10} {depois[metrica]:>10} {delta:>+8.1f}%  {marca}")
+    return linhas, regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("atual")
+    parser.add_argument("--tolerancia", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.base) as arquivo:
+        base = json.load(arquivo)
+    with open(args.atual) as arquivo:
+        atual = json.load(arquivo)
+
+    linhas, regressoes = comparar(base, atual, args.tolerancia)
+    print(f"{base.get('commit') or 'base'} -> {atual.get('commit') or 'atual'}")
+    print(f"{'cenário':<16} {'métrica':<7} {'antes':>10} {'depois':>10} {'variação':>9}")
+    print("\n".join(linhas))
+    if regressoes:
+        print(f"\nregressões acima de {args.tolerancia}%: {', '.join(regressoes)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
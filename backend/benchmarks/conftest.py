@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+# o banco e o diretório de mídia precisam estar definidos antes de importar a app
+_DIRETORIO = tempfile.mkdtemp(prefix="rede-de-patas-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIRETORIO}/bench.db")
+os.environ.setdefault("MIDIA_DIR", os.path.join(_DIRETORIO, "midia"))
+# mede as rotas, não o cache de respostas
+os.environ.setdefault("CACHE_BACKEND", "desligado")
+# o login é medido em rajada, do mesmo IP
+os.environ.setdefault("LIMITES_BACKEND", "desligado")
+
+import pytest  # noqa: E402
+
+VOLUMES = {
+    "usuarios": int(os.getenv("BENCH_USUARIOS", "200")),
+    "ongs": int(os.getenv("BENCH_ONGS", "20")),
+    "animais": int(os.getenv("BENCH_ANIMAIS", "20000")),
+}
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from benchmarks.semear import populado, semear
+
+    if not populado():
+        semear(**VOLUMES)
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture(scope="session")
+def headers(cliente):
+    from benchmarks.semear import SENHA, email_usuario
+
+    resposta = cliente.post("/login", data={"username": email_usuario(0), "password": SENHA})
+    assert resposta.status_code == 200, resposta.text
+    return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def ids_animais(cliente):
+    return [item["id"] for item in cliente.get("/animais", params={"limit": 200, "fields": "id"}).json()["itens"]]
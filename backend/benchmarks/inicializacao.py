@@ -0,0 +1,105 @@
+"""Tempo de inicialização da API: importação a frio e boot até o primeiro /ready.
+
+    python -m benchmarks.inicializacao --repeticoes 5 > atual.json
+    python -m benchmarks.inicializacao --servidor gunicorn --workers 4
+
+"importacao" mede ``import app.main`` em um interpretador novo a cada
+repetição; "boot" sobe o servidor (uvicorn ou gunicorn) e mede até o /ready
+responder 200, ou seja, até aceitar tráfego com o banco de DATABASE_URL
+acessível. O esquema já deve estar migrado (python -m app.migrar).
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.carga import _commit, percentil
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _resumo(valores: List[float]) -> dict:
+    return {
+        "mediana_ms": round(statistics.median(valores) * 1000, 1),
+        "p90_ms": round(percentil(valores, 90) * 1000, 1),
+        "min_ms": round(min(valores) * 1000, 1),
+        "amostras": len(valores),
+    }
+
+
+def medir_importacao() -> float:
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=DIRETORIO, check=True, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def medir_boot(servidor: str, workers: int, limite: float) -> float:
+    porta = _porta_livre()
+    if servidor == "gunicorn":
+        comando = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{porta}", "app.main:app"]
+        # com vários workers o gunicorn.conf.py exige backends compartilhados ou desligados
+        ambiente = {"LIMITES_BACKEND": "desligado", **os.environ, "WEB_CONCURRENCY": str(workers)}
+    else:
+        comando = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(porta), "--log-level", "warning"]
+        ambiente = dict(os.environ)
+
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(comando, cwd=DIRETORIO, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(timeout=1) as cliente:
+            while time.perf_counter() - inicio < limite:
+                if processo.poll() is not None:
+                    raise RuntimeError(f"{servidor} terminou com código {processo.returncode}")
+                try:
+                    if cliente.get(f"http://127.0.0.1:{porta}/ready").status_code == 200:
+                        return time.perf_counter() - inicio
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"/ready não respondeu 200 em {limite} s")
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--servidor", choices=("uvicorn", "gunicorn"), default="uvicorn")
+    parser.add_argument("--workers", type=int, default=2, help="workers do gunicorn")
+    parser.add_argument("--limite", type=float, default=60, help="segundos até desistir do /ready")
+    args = parser.parse_args()
+
+    importacao = [medir_importacao() for _ in range(args.repeticoes)]
+    boot = [medir_boot(args.servidor, args.workers, args.limite) for _ in range(args.repeticoes)]
+    print(json.dumps({
+        "commit": _commit(),
+        "alvo": os.getenv("DATABASE_URL", ""),
+        "python": platform.python_version(),
+        "nucleos": os.cpu_count(),
+        "parametros": {
+            "repeticoes": args.repeticoes,
+            "servidor": args.servidor,
+            "workers": args.workers if args.servidor == "gunicorn" else 1,
+        },
+        "importacao": _resumo(importacao),
+        "boot": _resumo(boot),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
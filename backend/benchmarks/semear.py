@@ -0,0 +1,137 @@
+"""Popula o banco de DATABASE_URL com volumes configuráveis para os benchmarks.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.semear --usuarios 1000 --ongs 50 --animais 100000
+
+Use um banco vazio (os e-mails são fixos). Os dados são determinísticos
+(--semente); todos os usuários têm a senha SENHA e o primeiro,
+``bench0@rede.bench``, administra todas as ONGs. Aplica as migrações e
+insere em lotes de BLOCO linhas.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, literal, select
+
+from app.auth import hash_senha
+from app.database import DIALETO, aplicar_migracoes, obter_engine
+from app.estatisticas import instrucoes_reconstrucao
+from app.geo import localizar
+from app.models import Animal, AnimalMudanca, Ong, Usuario, UsuarioOngAssociacao
+
+SENHA = "senha-de-teste"
+BLOCO = 5000
+
+ESPECIES = ("cao", "gato")
+PORTES = ("pequeno", "medio", "grande")
+CORES = ("preto", "branco", "caramelo", "cinza", "tigrado", "malhado")
+RACAS = ("SRD", "Labrador", "Poodle", "Siamês", "Persa", "Vira-lata")
+CEPS = ("01001-000", "04538-132", "20040-002", "30130-010", "40020-000", "80010-000", "90010-150")
+NOMES = ("Rex", "Mia", "Thor", "Luna", "Bob", "Nina", "Fred", "Mel", "Toby", "Lola", "Zeca", "Pipoca")
+
+
+def email_usuario(indice: int) -> str:
+    return f"bench{indice}@rede.bench"
+
+
+def _em_blocos(conexao, tabela, linhas):
+    for inicio in range(0, len(linhas), BLOCO):
+        conexao.execute(insert(tabela), linhas[inicio:inicio + BLOCO])
+
+
+def populado() -> bool:
+    aplicar_migracoes()
+    with obter_engine().connect() as conexao:
+        return conexao.execute(select(Animal.id).limit(1)).first() is not None
+
+
+def semear(usuarios: int, ongs: int, animais: int, semente: int = 42) -> dict:
+    aleatorio = random.Random(semente)
+    inicio = time.perf_counter()
+    aplicar_migracoes()
+    # um único hash: o custo do bcrypt não é o que está sendo semeado
+    senha = hash_senha(SENHA)
+
+    with obter_engine().begin() as conexao:
+        primeiro_usuario = (conexao.execute(select(func.coalesce(func.max(Usuario.id), 0))).scalar_one()) + 1
+        linhas = []
+        for indice in range(usuarios):
+            cep = aleatorio.choice(CEPS)
+            local = localizar(cep)
+            linhas.append(dict(
+                nome=f"Usuário {indice}", email=email_usuario(indice), telefone="11999999999",
+                endereco_cep=cep, endereco_completo="Rua dos Testes, 1",
+                moradia=aleatorio.choice(("casa", "apartamento")), telas_em_casa=aleatorio.random() < 0.5,
+                criancas_em_casa=aleatorio.random() < 0.3, area_aberta=aleatorio.random() < 0.4,
+                possui_animais=aleatorio.random() < 0.5, tipo_animais=aleatorio.choice(("", "gato", "cao")),
+                qtde_animais=aleatorio.randint(0, 3), is_admin=indice == 0, senha=senha,
+                lat=local["lat"], lon=local["lon"], token_versao=0,
+            ))
+        _em_blocos(conexao, Usuario, linhas)
+
+        primeiro_animal = (conexao.execute(select(func.coalesce(func.max(Animal.id), 0))).scalar_one()) + 1
+        primeira_ong = (conexao.execute(select(func.coalesce(func.max(Ong.id), 0))).scalar_one()) + 1
+        linhas = []
+        for indice in range(ongs):
+            endereco = f"Rua das ONGs, {indice} - CEP {aleatorio.choice(CEPS)}"
+            linhas.append(dict(
+                nome=f"ONG {indice}", email=f"ong{indice}@rede.bench", telefone="1133333333",
+                endereco=endereco, **localizar(endereco),
+            ))
+        _em_blocos(conexao, Ong, linhas)
+        _em_blocos(conexao, UsuarioOngAssociacao, [
+            dict(usuario_id=primeiro_usuario, ong_id=primeira_ong + indice) for indice in range(ongs)
+        ])
+
+        linhas = []
+        criado_em = datetime.now(timezone.utc)
+        for indice in range(animais):
+            linhas.append(dict(
+                nome=aleatorio.choice(NOMES), idade=aleatorio.randint(0, 15), especie=aleatorio.choice(ESPECIES),
+                raca=aleatorio.choice(RACAS), porte=aleatorio.choice(PORTES), cor=aleatorio.choice(CORES),
+                vacinado=aleatorio.random() < 0.7, castrado=aleatorio.random() < 0.6,
+                vermifugado=aleatorio.random() < 0.7, sexo=aleatorio.choice(("M", "F")),
+                descricao="Animal dócil e brincalhão, procura um lar.",
+                disponivel=aleatorio.random() < 0.8,
+                sociavel_com_gatos=aleatorio.choice((True, False, None)),
+                sociavel_com_caes=aleatorio.choice((True, False, None)),
+                ong_id=primeira_ong + aleatorio.randrange(ongs) if ongs else None,
+                criado_em=criado_em,
+            ))
+            if len(linhas) == BLOCO:
+                conexao.execute(insert(Animal), linhas)
+                linhas = []
+        if linhas:
+            conexao.execute(insert(Animal), linhas)
+        # o feed de mudanças a partir do início deve refletir o catálogo semeado
+        conexao.execute(insert(AnimalMudanca).from_select(
+            ["animal_id", "operacao"],
+            select(Animal.id, literal("criado")).where(Animal.id >= primeiro_animal).order_by(Animal.id),
+        ))
+        for instrucao in instrucoes_reconstrucao(DIALETO):
+            conexao.execute(instrucao)
+
+    return {
+        "usuarios": usuarios,
+        "ongs": ongs,
+        "animais": animais,
+        "semente": semente,
+        "admin": email_usuario(0) if usuarios else None,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--ongs", type=int, default=50)
+    parser.add_argument("--animais", type=int, default=10000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(semear(args.usuarios, args.ongs, args.animais, args.semente), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Linhas por segundo serializadas em cada caminho de resposta das listagens.
+
+    python -m benchmarks.serializacao --linhas 200 --repeticoes 200
+
+- orm: instâncias de Animal validadas por AnimalRead (orm_mode), jsonable_encoder e json
+- pagina: dicts em ``Pagina``, revalidados pelo response_model, jsonable_encoder e json
+- direta: dicts renderizados com orjson, sem revalidação (o caminho de ``paginar``)
+
+Não usa banco: as linhas são geradas em memória, com a forma das colunas de Animal.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import Animal
+from app.paginacao import Pagina
+from app.routes.animais import CAMPOS_ANIMAL, AnimalRead
+from benchmarks.semear import CORES, ESPECIES, NOMES, PORTES, RACAS
+
+
+def gerar_linhas(total: int, semente: int) -> list:
+    aleatorio = random.Random(semente)
+    return [
+        dict(
+            id=indice + 1, nome=aleatorio.choice(NOMES), idade=aleatorio.randint(0, 15),
+            especie=aleatorio.choice(ESPECIES), raca=aleatorio.choice(RACAS), porte=aleatorio.choice(PORTES),
+            cor=aleatorio.choice(CORES), vacinado=aleatorio.random() < 0.7, castrado=aleatorio.random() < 0.6,
+            vermifugado=aleatorio.random() < 0.7, sexo=aleatorio.choice(("M", "F")),
+            descricao="Animal dócil e brincalhão, procura um lar.", disponivel=True,
+            sociavel_com_gatos=aleatorio.choice((True, False, None)),
+            sociavel_com_caes=aleatorio.choice((True, False, None)),
+            foto_url=f"/static/animais/{indice}.jpg", ong_id=aleatorio.randint(1, 50),
+            foto_thumb_url=None, foto_card_url=None, foto_full_url=None,
+        )
+        for indice in range(total)
+    ]
+
+
+def caminhos(linhas: list) -> dict:
+    campo_pagina = create_response_field("Pagina", Pagina)
+    campo_lista = create_response_field("Lista", list[AnimalRead])
+    instancias = [Animal(**{campo: linha[campo] for campo in CAMPOS_ANIMAL}) for linha in linhas]
+    laco = asyncio.new_event_loop()
+
+    def orm():
+        conteudo = laco.run_until_complete(serialize_response(field=campo_lista, response_content=instancias))
+        return JSONResponse(conteudo).body
+
+    def pagina():
+        resposta = Pagina(itens=[dict(linha) for linha in linhas], proximo_cursor="x", total=len(linhas))
+        conteudo = laco.run_until_complete(serialize_response(field=campo_pagina, response_content=resposta))
+        return JSONResponse(conteudo).body
+
+    def direta():
+        return ORJSONResponse({"itens": [dict(linha) for linha in linhas], "proximo_cursor": "x", "total": len(linhas)}).body
+
+    return {"orm": orm, "pagina": pagina, "direta": direta}
+
+
+def medir(funcao, repeticoes: int) -> float:
+    funcao()
+    melhor = float("inf")
+    # melhor de 5 rodadas: reduz o ruído de outros processos
+    for _ in range(5):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=200, help="linhas por resposta")
+    parser.add_argument("--repeticoes", type=int, default=100)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    linhas = gerar_linhas(args.linhas, args.semente)
+    resultados = {}
+    for nome, funcao in caminhos(linhas).items():
+        duracao = medir(funcao, args.repeticoes)
+        resultados[nome] = {
+            "linhas_s": round(args.linhas * args.repeticoes / duracao),
+            "ms_por_resposta": round(duracao / args.repeticoes * 1000, 3),
+            "bytes": len(funcao()),
+        }
+    base = resultados["pagina"]["linhas_s"]
+    for resultado in resultados.values():
+        resultado["vs_pagina"] = round(resultado["linhas_s"] / base, 2)
+    print(json.dumps({"linhas": args.linhas, "repeticoes": args.repeticoes, "caminhos": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
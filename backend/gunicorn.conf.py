@@ -0,0 +1,52 @@
+"""Servidor de produção: gunicorn gerenciando workers uvicorn.
+
+    python -m app.migrar                         # uma vez por deploy
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Com preload a aplicação é importada uma vez no processo mestre e os workers
+nascem por fork já com ela carregada (memória compartilhada, boot rápido).
+Engines e pools de processos são criados no primeiro uso, dentro de cada
+worker; o que vier herdado do mestre é descartado depois do fork.
+
+Variáveis: WEB_CONCURRENCY (workers, padrão = núcleos), BIND, GUNICORN_TIMEOUT,
+GUNICORN_PRELOAD (padrão ligado). Com vários workers, deixe
+MIGRAR_AO_INICIAR desligado e use os backends redis de cache, eventos e
+limites, que são compartilhados entre processos. Nenhum deles é aceito em
+memória com mais de um worker: a invalidação do cache e os eventos de um
+worker não chegariam aos outros, e cada limite valeria uma vez por worker.
+Sem CACHE_BACKEND o cache fica desligado e sem EVENTOS_BACKEND os eventos
+também; LIMITES_BACKEND precisa ser informado (redis, ou desligado se outro
+componente limita o login).
+"""
+import os
+
+nucleos = os.cpu_count() or 1
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(nucleos)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").strip().lower() in ("1", "true", "sim", "yes", "on")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# recicla workers aos poucos para conter vazamentos; o jitter evita reinícios simultâneos
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+
+if workers > 1:
+    os.environ.setdefault("CACHE_BACKEND", "desligado")
+    os.environ.setdefault("EVENTOS_BACKEND", "desligado")
+    # desligar o limite de login não pode ser o padrão: sem valor, app.config usaria memoria
+    for variavel, problema in (
+        ("CACHE_BACKEND", "serviria listagens antigas"),
+        ("EVENTOS_BACKEND", "perderia as escritas feitas nos outros workers"),
+        ("LIMITES_BACKEND", "multiplicaria cada limite pelo número de workers"),
+    ):
+        if os.getenv(variavel, "memoria") == "memoria":
+            raise RuntimeError(f"{variavel}=memoria com vários workers {problema}; use redis ou desligado")
+
+# os pools de bcrypt e de imagens são por worker: divide os núcleos entre eles
+# em vez de cada worker abrir um processo por núcleo (lido por app.config no preload)
+os.environ.setdefault("HASH_WORKERS", str(max(1, nucleos // workers)))
+os.environ.setdefault("IMAGEM_WORKERS", str(max(1, nucleos // (2 * workers))))
@@ -0,0 +1,64 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401 - registra as tabelas em SQLModel.metadata
+from app.database import DATABASE_URL
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configurar_logs", True):
+    fileConfig(config.config_file_name)
+
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
+target_metadata = SQLModel.metadata
+
+
+def include_object(objeto, nome, tipo, refletido, comparado_com):
+    # estruturas de busca textual criadas à mão na migração 0005
+    if tipo == "table" and nome.startswith("animal_fts"):
+        return False
+    if tipo == "column" and nome == "busca" and objeto.table.name == "animal":
+        return False
+    if tipo == "index" and nome == "ix_animal_busca":
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
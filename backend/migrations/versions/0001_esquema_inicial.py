@@ -0,0 +1,78 @@
+"""esquema inicial
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ong",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("telefone", sa.String(), nullable=False),
+        sa.Column("endereco", sa.String(), nullable=False),
+        sa.Column("rede_social", sa.String(), nullable=True),
+        sa.Column("site", sa.String(), nullable=True),
+    )
+    op.create_table(
+        "usuario",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("telefone", sa.String(), nullable=False),
+        sa.Column("endereco_cep", sa.String(), nullable=False),
+        sa.Column("endereco_completo", sa.String(), nullable=False),
+        sa.Column("moradia", sa.String(), nullable=True),
+        sa.Column("telas_em_casa", sa.Boolean(), nullable=True),
+        sa.Column("criancas_em_casa", sa.Boolean(), nullable=True),
+        sa.Column("area_aberta", sa.Boolean(), nullable=True),
+        sa.Column("possui_animais", sa.Boolean(), nullable=True),
+        sa.Column("tipo_animais", sa.String(), nullable=True),
+        sa.Column("qtde_animais", sa.Integer(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=False),
+        sa.Column("senha", sa.String(), nullable=False),
+        sa.Column("ong_id", sa.Integer(), sa.ForeignKey("ong.id"), nullable=True),
+    )
+    op.create_table(
+        "usuarioongassociacao",
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("usuario.id"), primary_key=True),
+        sa.Column("ong_id", sa.Integer(), sa.ForeignKey("ong.id"), primary_key=True),
+    )
+    op.create_table(
+        "animal",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nome", sa.String(), nullable=False),
+        sa.Column("idade", sa.Integer(), nullable=True),
+        sa.Column("especie", sa.String(), nullable=False),
+        sa.Column("raca", sa.String(), nullable=True),
+        sa.Column("porte", sa.String(), nullable=True),
+        sa.Column("cor", sa.String(), nullable=True),
+        sa.Column("vacinado", sa.Boolean(), nullable=True),
+        sa.Column("castrado", sa.Boolean(), nullable=True),
+        sa.Column("vermifugado", sa.Boolean(), nullable=True),
+        sa.Column("sexo", sa.String(), nullable=True),
+        sa.Column("descricao", sa.String(), nullable=True),
+        sa.Column("disponivel", sa.Boolean(), nullable=True),
+        sa.Column("sociavel_com_gatos", sa.Boolean(), nullable=True),
+        sa.Column("sociavel_com_caes", sa.Boolean(), nullable=True),
+        sa.Column("foto_url", sa.String(), nullable=True),
+        sa.Column("ong_id", sa.Integer(), sa.ForeignKey("usuario.id"), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("animal")
+    op.drop_table("usuarioongassociacao")
+    op.drop_table("usuario")
+    op.drop_table("ong")
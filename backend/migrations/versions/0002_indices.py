@@ -0,0 +1,44 @@
+"""índices das consultas de catálogo, login e permissões
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_usuario_email", "usuario", ["email"], unique=True)
+    op.create_index("ix_usuario_ong_id", "usuario", ["ong_id"])
+    op.create_index("ix_usuarioongassociacao_ong_id", "usuarioongassociacao", ["ong_id"])
+    op.create_index("ix_animal_ong_id", "animal", ["ong_id"])
+    op.create_index(
+        "ix_animal_disponivel_filtros",
+        "animal",
+        ["especie", "porte", "sociavel_com_gatos", "sociavel_com_caes", "id"],
+        postgresql_where=sa.text("disponivel"),
+        sqlite_where=sa.text("disponivel = 1"),
+    )
+    op.create_index(
+        "ix_animal_disponiveis",
+        "animal",
+        ["id"],
+        postgresql_where=sa.text("disponivel"),
+        sqlite_where=sa.text("disponivel = 1"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_animal_disponiveis", table_name="animal")
+    op.drop_index("ix_animal_disponivel_filtros", table_name="animal")
+    op.drop_index("ix_animal_ong_id", table_name="animal")
+    op.drop_index("ix_usuarioongassociacao_ong_id", table_name="usuarioongassociacao")
+    op.drop_index("ix_usuario_ong_id", table_name="usuario")
+    op.drop_index("ix_usuario_email", table_name="usuario")
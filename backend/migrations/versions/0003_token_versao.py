@@ -0,0 +1,22 @@
+"""versão do token por usuário, usada para revogar tokens
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("usuario", sa.Column("token_versao", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("usuario", "token_versao")
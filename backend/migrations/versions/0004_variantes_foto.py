@@ -0,0 +1,26 @@
+"""URLs das variantes redimensionadas da foto do animal
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("animal", sa.Column("foto_thumb_url", sa.String(), nullable=True))
+    op.add_column("animal", sa.Column("foto_card_url", sa.String(), nullable=True))
+    op.add_column("animal", sa.Column("foto_full_url", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("animal", "foto_full_url")
+    op.drop_column("animal", "foto_card_url")
+    op.drop_column("animal", "foto_thumb_url")
@@ -0,0 +1,68 @@
+"""busca textual em animais: tsvector + GIN no PostgreSQL, FTS5 no SQLite
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == "postgresql":
+        op.execute("""
+            ALTER TABLE animal ADD COLUMN busca tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', coalesce(nome, '')), 'A') ||
+                setweight(to_tsvector('portuguese', coalesce(especie, '') || ' ' || coalesce(raca, '')), 'B') ||
+                setweight(to_tsvector('portuguese', coalesce(cor, '') || ' ' || coalesce(porte, '')), 'C') ||
+                setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'D')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_animal_busca ON animal USING gin (busca)")
+    elif dialeto == "sqlite":
+        op.execute("""
+            CREATE VIRTUAL TABLE animal_fts USING fts5(
+                nome, especie, raca, cor, porte, descricao,
+                content='animal', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER animal_fts_ai AFTER INSERT ON animal BEGIN
+                INSERT INTO animal_fts(rowid, nome, especie, raca, cor, porte, descricao)
+                VALUES (new.id, new.nome, new.especie, new.raca, new.cor, new.porte, new.descricao);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER animal_fts_ad AFTER DELETE ON animal BEGIN
+                INSERT INTO animal_fts(animal_fts, rowid, nome, especie, raca, cor, porte, descricao)
+                VALUES ('delete', old.id, old.nome, old.especie, old.raca, old.cor, old.porte, old.descricao);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER animal_fts_au AFTER UPDATE ON animal BEGIN
+                INSERT INTO animal_fts(animal_fts, rowid, nome, especie, raca, cor, porte, descricao)
+                VALUES ('delete', old.id, old.nome, old.especie, old.raca, old.cor, old.porte, old.descricao);
+                INSERT INTO animal_fts(rowid, nome, especie, raca, cor, porte, descricao)
+                VALUES (new.id, new.nome, new.especie, new.raca, new.cor, new.porte, new.descricao);
+            END
+        """)
+        op.execute("INSERT INTO animal_fts(animal_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == "postgresql":
+        op.execute("DROP INDEX ix_animal_busca")
+        op.execute("ALTER TABLE animal DROP COLUMN busca")
+    elif dialeto == "sqlite":
+        op.execute("DROP TRIGGER animal_fts_au")
+        op.execute("DROP TRIGGER animal_fts_ad")
+        op.execute("DROP TRIGGER animal_fts_ai")
+        op.execute("DROP TABLE animal_fts")
@@ -0,0 +1,129 @@
+"""coordenadas de ONGs e usuários; animal.ong_id passa a apontar para ong.id
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# cópia congelada da geocodificação de app.geo e da tabela de CEPs como estavam
+# nesta revisão: a migração não pode mudar de resultado se o código da app mudar
+CEPS = {
+    "01": (-23.5489, -46.6388),
+    "02": (-23.4990, -46.6250),
+    "03": (-23.5450, -46.5700),
+    "04": (-23.6200, -46.6600),
+    "05": (-23.5400, -46.7100),
+    "06": (-23.5320, -46.7920),
+    "07": (-23.4540, -46.5330),
+    "09": (-23.6640, -46.5380),
+    "13": (-22.9056, -47.0608),
+    "20": (-22.9068, -43.1729),
+    "22": (-22.9711, -43.1822),
+    "24": (-22.8833, -43.1036),
+    "30": (-19.9167, -43.9345),
+    "40": (-12.9714, -38.5014),
+    "50": (-8.0476, -34.8770),
+    "60": (-3.7319, -38.5267),
+    "66": (-1.4558, -48.4902),
+    "69": (-3.1190, -60.0217),
+    "70": (-15.7942, -47.8822),
+    "74": (-16.6869, -49.2648),
+    "80": (-25.4284, -49.2733),
+    "88": (-27.5954, -48.5480),
+    "90": (-30.0346, -51.2177),
+}
+CEP = re.compile(r"\b(\d{5})-?(\d{3})\b")
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _geohash(lat: float, lon: float, precisao: int = 7) -> str:
+    lat_min, lat_max, lon_min, lon_max = -90.0, 90.0, -180.0, 180.0
+    codigo, valor, bits, usar_lon = [], 0, 0, True
+    while len(codigo) < precisao:
+        if usar_lon:
+            meio = (lon_min + lon_max) / 2
+            valor = valor * 2 + (lon >= meio)
+            lon_min, lon_max = (meio, lon_max) if lon >= meio else (lon_min, meio)
+        else:
+            meio = (lat_min + lat_max) / 2
+            valor = valor * 2 + (lat >= meio)
+            lat_min, lat_max = (meio, lat_max) if lat >= meio else (lat_min, meio)
+        usar_lon = not usar_lon
+        bits += 1
+        if bits == 5:
+            codigo.append(BASE32[valor])
+            valor, bits = 0, 0
+    return "".join(codigo)
+
+
+def localizar(texto) -> dict:
+    encontrado = CEP.search(texto or "")
+    if encontrado:
+        digitos = encontrado.group(1) + encontrado.group(2)
+        for tamanho in range(len(digitos), 0, -1):
+            coordenadas = CEPS.get(digitos[:tamanho])
+            if coordenadas is not None:
+                lat, lon = coordenadas
+                return {"lat": lat, "lon": lon, "geohash": _geohash(lat, lon)}
+    return {"lat": None, "lon": None, "geohash": None}
+
+
+def upgrade():
+    op.add_column("ong", sa.Column("lat", sa.Float(), nullable=True))
+    op.add_column("ong", sa.Column("lon", sa.Float(), nullable=True))
+    op.add_column("ong", sa.Column("geohash", sa.String(), nullable=True))
+    op.create_index("ix_ong_geohash", "ong", ["geohash"])
+    op.add_column("usuario", sa.Column("lat", sa.Float(), nullable=True))
+    op.add_column("usuario", sa.Column("lon", sa.Float(), nullable=True))
+
+    conexao = op.get_bind()
+    for ong_id, endereco in conexao.execute(sa.text("SELECT id, endereco FROM ong")).all():
+        local = localizar(endereco)
+        if local["geohash"]:
+            conexao.execute(
+                sa.text("UPDATE ong SET lat = :lat, lon = :lon, geohash = :geohash WHERE id = :id"),
+                {**local, "id": ong_id},
+            )
+    for usuario_id, cep in conexao.execute(sa.text("SELECT id, endereco_cep FROM usuario")).all():
+        local = localizar(cep)
+        if local["lat"] is not None:
+            conexao.execute(
+                sa.text("UPDATE usuario SET lat = :lat, lon = :lon WHERE id = :id"),
+                {"lat": local["lat"], "lon": local["lon"], "id": usuario_id},
+            )
+
+    # animais eram gravados com o id do usuário que os cadastrou; passam a
+    # referenciar a (primeira) ONG administrada por esse usuário
+    op.execute("""
+        UPDATE animal SET ong_id = (
+            SELECT min(a.ong_id) FROM usuarioongassociacao a WHERE a.usuario_id = animal.ong_id
+        )
+        WHERE ong_id IS NOT NULL
+    """)
+    # no SQLite a chave estrangeira não é verificada (foreign_keys desligado) e
+    # recriar a tabela perderia os gatilhos da busca textual
+    if conexao.dialect.name == "postgresql":
+        op.drop_constraint("animal_ong_id_fkey", "animal", type_="foreignkey")
+        op.create_foreign_key("animal_ong_id_fkey", "animal", "ong", ["ong_id"], ["id"])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint("animal_ong_id_fkey", "animal", type_="foreignkey")
+        op.create_foreign_key("animal_ong_id_fkey", "animal", "usuario", ["ong_id"], ["id"])
+    op.drop_column("usuario", "lon")
+    op.drop_column("usuario", "lat")
+    op.drop_index("ix_ong_geohash", table_name="ong")
+    op.drop_column("ong", "geohash")
+    op.drop_column("ong", "lon")
+    op.drop_column("ong", "lat")
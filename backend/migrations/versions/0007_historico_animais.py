@@ -0,0 +1,73 @@
+"""remoção lógica de animais (deleted_at) e histórico de mudanças
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def _indices_disponiveis(condicao_pg: str, condicao_sqlite: str):
+    op.create_index(
+        "ix_animal_disponivel_filtros",
+        "animal",
+        ["especie", "porte", "sociavel_com_gatos", "sociavel_com_caes", "id"],
+        postgresql_where=sa.text(condicao_pg),
+        sqlite_where=sa.text(condicao_sqlite),
+    )
+    op.create_index(
+        "ix_animal_disponiveis",
+        "animal",
+        ["id"],
+        postgresql_where=sa.text(condicao_pg),
+        sqlite_where=sa.text(condicao_sqlite),
+    )
+
+
+def upgrade():
+    op.add_column("animal", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+
+    # os índices parciais passam a cobrir só os animais não removidos
+    op.drop_index("ix_animal_disponiveis", table_name="animal")
+    op.drop_index("ix_animal_disponivel_filtros", table_name="animal")
+    _indices_disponiveis("disponivel AND deleted_at IS NULL", "disponivel = 1 AND deleted_at IS NULL")
+    op.create_index(
+        "ix_animal_ativos",
+        "animal",
+        ["id"],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+        sqlite_where=sa.text("deleted_at IS NULL"),
+    )
+
+    op.create_table(
+        "animalmudanca",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("animal_id", sa.Integer(), nullable=False),
+        sa.Column("operacao", sa.String(), nullable=False),
+        sa.Column("alteracoes", sa.JSON(), nullable=True),
+        sa.Column("usuario_id", sa.Integer(), nullable=True),
+        sa.Column("criado_em", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_animalmudanca_animal_id", "animalmudanca", ["animal_id"])
+
+    # o feed a partir do início reconstrói o catálogo atual
+    op.execute("INSERT INTO animalmudanca (animal_id, operacao) SELECT id, 'criado' FROM animal ORDER BY id")
+
+
+def downgrade():
+    op.drop_index("ix_animalmudanca_animal_id", table_name="animalmudanca")
+    op.drop_table("animalmudanca")
+    # animais removidos logicamente voltariam a aparecer
+    op.execute("DELETE FROM animal WHERE deleted_at IS NOT NULL")
+    op.drop_index("ix_animal_ativos", table_name="animal")
+    op.drop_index("ix_animal_disponiveis", table_name="animal")
+    op.drop_index("ix_animal_disponivel_filtros", table_name="animal")
+    _indices_disponiveis("disponivel", "disponivel = 1")
+    op.drop_column("animal", "deleted_at")
@@ -0,0 +1,90 @@
+"""pedidos de adoção e fila de tarefas em segundo plano
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "adocao",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("animal_id", sa.Integer(), sa.ForeignKey("animal.id"), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("usuario.id"), nullable=False),
+        sa.Column("ong_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("mensagem", sa.String(), nullable=True),
+        sa.Column("motivo", sa.String(), nullable=True),
+        sa.Column("criado_em", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("decidido_em", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("decidido_por", sa.Integer(), nullable=True),
+    )
+    op.create_index("ix_adocao_animal_id", "adocao", ["animal_id"])
+    op.create_index("ix_adocao_usuario_id", "adocao", ["usuario_id"])
+    op.create_index("ix_adocao_ong_id", "adocao", ["ong_id"])
+    op.create_index(
+        "ix_adocao_pendente_unica",
+        "adocao",
+        ["animal_id", "usuario_id"],
+        unique=True,
+        postgresql_where=sa.text("status = 'pendente'"),
+        sqlite_where=sa.text("status = 'pendente'"),
+    )
+    op.create_index(
+        "ix_adocao_aprovada_unica",
+        "adocao",
+        ["animal_id"],
+        unique=True,
+        postgresql_where=sa.text("status = 'aprovada'"),
+        sqlite_where=sa.text("status = 'aprovada'"),
+    )
+
+    op.create_table(
+        "tarefa",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("dados", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("tentativas", sa.Integer(), nullable=False),
+        sa.Column("max_tentativas", sa.Integer(), nullable=False),
+        sa.Column("executar_em", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("bloqueada_ate", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("erro", sa.String(), nullable=True),
+        sa.Column("criado_em", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("concluida_em", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_tarefa_pendentes",
+        "tarefa",
+        ["executar_em"],
+        postgresql_where=sa.text("status = 'pendente'"),
+        sqlite_where=sa.text("status = 'pendente'"),
+    )
+    op.create_index(
+        "ix_tarefa_executando",
+        "tarefa",
+        ["bloqueada_ate"],
+        postgresql_where=sa.text("status = 'executando'"),
+        sqlite_where=sa.text("status = 'executando'"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_tarefa_executando", table_name="tarefa")
+    op.drop_index("ix_tarefa_pendentes", table_name="tarefa")
+    op.drop_table("tarefa")
+    op.drop_index("ix_adocao_aprovada_unica", table_name="adocao")
+    op.drop_index("ix_adocao_pendente_unica", table_name="adocao")
+    op.drop_index("ix_adocao_ong_id", table_name="adocao")
+    op.drop_index("ix_adocao_usuario_id", table_name="adocao")
+    op.drop_index("ix_adocao_animal_id", table_name="adocao")
+    op.drop_table("adocao")
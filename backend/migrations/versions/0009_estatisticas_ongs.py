@@ -0,0 +1,59 @@
+"""data de entrada dos animais e estatísticas pré-calculadas das ONGs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == "postgresql"
+    # o SQLite não aceita default não constante em ADD COLUMN; lá a aplicação sempre informa a data
+    op.add_column(
+        "animal",
+        sa.Column("criado_em", sa.DateTime(timezone=True), server_default=sa.func.now() if postgres else None, nullable=True),
+    )
+    # animais existentes: a data do registro "criado" no histórico
+    op.execute(
+        "UPDATE animal SET criado_em = ("
+        "SELECT MIN(m.criado_em) FROM animalmudanca m WHERE m.animal_id = animal.id AND m.operacao = 'criado'"
+        ") WHERE EXISTS (SELECT 1 FROM animalmudanca m WHERE m.animal_id = animal.id AND m.operacao = 'criado')"
+    )
+
+    op.create_table(
+        "ongestatistica",
+        sa.Column("ong_id", sa.Integer(), primary_key=True),
+        sa.Column("especie", sa.String(), primary_key=True),
+        sa.Column("mes", sa.String(), primary_key=True),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("disponiveis", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("vacinados", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("castrados", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    if postgres:
+        mes = "to_char(COALESCE(criado_em, now()) AT TIME ZONE 'UTC', 'YYYY-MM')"
+    else:
+        mes = "strftime('%Y-%m', COALESCE(criado_em, 'now'))"
+    op.execute(
+        "INSERT INTO ongestatistica (ong_id, especie, mes, total, disponiveis, vacinados, castrados) "
+        f"SELECT ong_id, especie, {mes}, COUNT(*), "
+        "SUM(CASE WHEN disponivel THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN vacinado THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN castrado THEN 1 ELSE 0 END) "
+        "FROM animal WHERE deleted_at IS NULL AND ong_id IS NOT NULL "
+        f"GROUP BY ong_id, especie, {mes}"
+    )
+
+
+def downgrade():
+    op.drop_table("ongestatistica")
+    op.drop_column("animal", "criado_em")
@@ -0,0 +1,37 @@
+"""índices de disponíveis alinhados aos filtros reais da listagem e da busca
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+CONDICAO_PG = "disponivel AND deleted_at IS NULL"
+CONDICAO_SQLITE = "disponivel = 1 AND deleted_at IS NULL"
+
+
+def _indice(nome: str, colunas: list):
+    op.create_index(
+        nome, "animal", colunas, postgresql_where=sa.text(CONDICAO_PG), sqlite_where=sa.text(CONDICAO_SQLITE)
+    )
+
+
+def upgrade():
+    # GET /animais filtra pelos sociavel_* sem espécie: o índice que começava por
+    # especie não servia a listagem. Um índice por conjunto de filtros
+    op.drop_index("ix_animal_disponivel_filtros", table_name="animal")
+    _indice("ix_animal_disponivel_sociavel", ["sociavel_com_gatos", "sociavel_com_caes", "id"])
+    _indice("ix_animal_disponivel_especie", ["especie", "porte", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_animal_disponivel_especie", table_name="animal")
+    op.drop_index("ix_animal_disponivel_sociavel", table_name="animal")
+    _indice("ix_animal_disponivel_filtros", ["especie", "porte", "sociavel_com_gatos", "sociavel_com_caes", "id"])
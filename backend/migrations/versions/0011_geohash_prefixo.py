@@ -0,0 +1,26 @@
+"""índice do geohash das ONGs com text_pattern_ops (busca por prefixo com LIKE)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # no SQLite o índice comum já atende a faixa de prefixo (comparação binária)
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_ong_geohash", table_name="ong")
+        op.create_index("ix_ong_geohash", "ong", ["geohash"], postgresql_ops={"geohash": "text_pattern_ops"})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_ong_geohash", table_name="ong")
+        op.create_index("ix_ong_geohash", "ong", ["geohash"])
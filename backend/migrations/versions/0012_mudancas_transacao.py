@@ -0,0 +1,33 @@
+"""transação que gravou cada mudança: cursor do feed na ordem dos commits
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        # as linhas existentes ficam com a transação da migração, anterior a todas as próximas
+        op.add_column(
+            "animalmudanca",
+            sa.Column("transacao", sa.BigInteger(), server_default=sa.text("txid_current()"), nullable=False),
+        )
+        op.create_index("ix_animalmudanca_transacao", "animalmudanca", ["transacao", "id"])
+    else:
+        # no SQLite as escritas são serializadas: o feed continua pela ordem dos ids
+        op.add_column("animalmudanca", sa.Column("transacao", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_animalmudanca_transacao", table_name="animalmudanca")
+    op.drop_column("animalmudanca", "transacao")
@@ -0,0 +1,74 @@
+"""Testes de integração da API.
+
+    pip install -r tests/requirements.txt
+    python -m pytest
+
+Sem DATABASE_URL usa um SQLite temporário; com ele, aponte para um banco
+descartável (os testes criam usuários, ONGs e animais). As migrações são
+aplicadas no início da sessão.
+"""
+import os
+import tempfile
+
+# o banco e o diretório de mídia precisam estar definidos antes de importar a app
+_DIRETORIO = tempfile.mkdtemp(prefix="rede-de-patas-testes-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DIRETORIO}/testes.db")
+os.environ.setdefault("MIDIA_DIR", os.path.join(_DIRETORIO, "midia"))
+os.environ.setdefault("CACHE_BACKEND", "desligado")
+os.environ.setdefault("LIMITES_BACKEND", "desligado")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def banco():
+    from benchmarks.semear import populado, semear
+
+    if not populado():
+        semear(usuarios=10, ongs=3, animais=500)
+
+
+@pytest.fixture(scope="session")
+def cliente(banco):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture(scope="session")
+def headers(cliente):
+    from benchmarks.semear import SENHA, email_usuario
+
+    resposta = cliente.post("/login", data={"username": email_usuario(0), "password": SENHA})
+    assert resposta.status_code == 200, resposta.text
+    return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+
+class Consultas(list):
+    """Instruções SQL (texto, parâmetros) executadas enquanto a captura está ativa."""
+
+    def __call__(self, conexao, cursor, instrucao, parametros, contexto, varias):
+        self.append((instrucao, parametros))
+
+    def com(self, *trechos: str):
+        for instrucao, parametros in self:
+            texto = " ".join(instrucao.lower().split())
+            if all(trecho in texto for trecho in trechos):
+                return instrucao, parametros
+        raise AssertionError(f"nenhuma consulta com {trechos}")
+
+
+@pytest.fixture
+def consultas(cliente):
+    from sqlalchemy import event
+
+    from app.database import engine_ativo
+
+    capturadas = Consultas()
+    event.listen(engine_ativo(), "before_cursor_execute", capturadas)
+    yield capturadas
+    event.remove(engine_ativo(), "before_cursor_execute", capturadas)
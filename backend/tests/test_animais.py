@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from app.database import DIALETO
+from benchmarks.semear import SENHA, email_usuario
+
+
+def _token(cliente, indice: int) -> dict:
+    resposta = cliente.post("/login", data={"username": email_usuario(indice), "password": SENHA})
+    return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+
+def test_alterar_e_remover_exigem_administrador_da_ong(cliente, headers):
+    ong = cliente.post("/ongs", json=dict(nome="Abrigo", email="a@x", telefone="1", endereco="Rua"), headers=headers).json()
+    animal = cliente.post("/animais", json=dict(nome="Bidu", especie="cao", ong_id=ong["id"]), headers=headers).json()
+
+    assert cliente.put(f"/animais/{animal['id']}", json={"nome": "x"}).status_code == 401
+    assert cliente.delete(f"/animais/{animal['id']}").status_code == 401
+    comum = _token(cliente, 4)
+    assert cliente.put(f"/animais/{animal['id']}", json={"nome": "x"}, headers=comum).status_code == 403
+    assert cliente.delete(f"/animais/{animal['id']}", headers=comum).status_code == 403
+
+    assert cliente.put(f"/animais/{animal['id']}", json={"nome": "Bidu II"}, headers=headers).status_code == 200
+    assert cliente.delete(f"/animais/{animal['id']}", headers=headers).status_code == 204
+
+    # o histórico registra quem alterou
+    autor = cliente.get("/usuarios/me", headers=headers).json()["id"]
+    historico = cliente.get(f"/animais/{animal['id']}/historico", headers=headers).json()["itens"]
+    assert [(item["operacao"], item["usuario_id"]) for item in historico] == [
+        ("criado", autor), ("atualizado", autor), ("removido", autor),
+    ]
+    cliente.delete(f"/ongs/{ong['id']}", headers=headers)
+
+
+@pytest.mark.skipif(DIALETO != "postgresql", reason="o SQLite não tem FOR UPDATE: as escritas já são serializadas")
+def test_alterar_e_remover_bloqueiam_o_animal(cliente, headers, consultas):
+    ong_id = cliente.get("/ongs", params={"limit": 1}).json()["itens"][0]["id"]
+    animal = cliente.post("/animais", json=dict(nome="Lupi", especie="gato", ong_id=ong_id), headers=headers).json()
+    consultas.clear()
+    assert cliente.put(f"/animais/{animal['id']}", json={"castrado": True}, headers=headers).status_code == 200
+    assert cliente.delete(f"/animais/{animal['id']}", headers=headers).status_code == 204
+    bloqueios = [instrucao for instrucao, _ in consultas if "from animal" in instrucao.lower() and "for update" in instrucao.lower()]
+    assert len(bloqueios) == 2
+
+
+def test_atualizacao_recusa_nulo_em_campo_obrigatorio(cliente, headers):
+    ong_id = cliente.get("/ongs", params={"limit": 1}).json()["itens"][0]["id"]
+    animal = cliente.post("/animais", json=dict(nome="Nino", especie="cao", ong_id=ong_id), headers=headers).json()
+    for campo in ("nome", "especie", "ong_id"):
+        assert cliente.put(f"/animais/{animal['id']}", json={campo: None}, headers=headers).status_code == 422
+    # campos opcionais continuam aceitando null
+    assert cliente.put(f"/animais/{animal['id']}", json={"raca": None}, headers=headers).status_code == 200
+    assert cliente.get(f"/animais/{animal['id']}").json()["ong_id"] == ong_id
+
+
+def test_animal_sem_ong_nao_e_administrado_por_ninguem(cliente, headers):
+    from sqlalchemy import insert
+
+    from app.database import obter_engine
+    from app.models import Animal
+
+    with obter_engine().begin() as conexao:
+        animal_id = conexao.execute(
+            insert(Animal).values(nome="Órfão", especie="gato").returning(Animal.id)
+        ).scalar_one()
+    assert cliente.put(f"/animais/{animal_id}", json={"nome": "x"}, headers=headers).status_code == 403
+    assert cliente.delete(f"/animais/{animal_id}", headers=headers).status_code == 403
+
+
+def test_foto_exportacao_e_historico_restritos_a_ong(cliente, headers):
+    ong_id = cliente.get("/ongs", params={"limit": 1}).json()["itens"][0]["id"]
+    animal = cliente.post("/animais", json=dict(nome="Fifi", especie="cao", ong_id=ong_id), headers=headers).json()
+    comum = _token(cliente, 5)
+
+    foto = {"content": b"\xff\xd8\xff" + b"0" * 100, "headers": {**comum, "Content-Type": "image/jpeg"}}
+    assert cliente.put(f"/animais/{animal['id']}/foto", **foto).status_code == 403
+    assert cliente.get(f"/animais/{animal['id']}/historico", headers=comum).status_code == 403
+    assert cliente.get("/animais/export", params={"ong_id": ong_id}, headers=comum).status_code == 403
+    assert cliente.get("/animais/export").status_code == 401
+    # sem ong_id, só os animais das ONGs administradas (nenhuma)
+    assert cliente.get("/animais/export", headers=comum).text == ""
+
+    exportados = cliente.get("/animais/export", params={"ong_id": ong_id}, headers=headers).text.splitlines()
+    assert animal["id"] in {json.loads(linha)["id"] for linha in exportados}
+    assert cliente.get(f"/animais/{animal['id']}/historico", headers=headers).status_code == 200
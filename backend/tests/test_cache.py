@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.cache import CacheMemoria, CacheRespostasMiddleware
+
+
+def _app(cache):
+    def animais(request):
+        return JSONResponse([1, 2], headers={"x-total": "2", "set-cookie": "sessao=1"})
+
+    app = Starlette(routes=[Route("/animais", animais)])
+    app.add_middleware(CacheRespostasMiddleware, cache=cache)
+    return app
+
+
+def test_acerto_repassa_headers_da_rota():
+    cliente = TestClient(_app(CacheMemoria(60, 100, 1024 * 1024)))
+    primeira = cliente.get("/animais")
+    segunda = cliente.get("/animais")
+    assert (primeira.headers["x-cache"], segunda.headers["x-cache"]) == ("MISS", "HIT")
+    assert segunda.headers["x-total"] == "2"
+    assert segunda.headers["content-type"] == "application/json"
+    # cookies não vão para outros clientes
+    assert "set-cookie" not in segunda.headers
+
+
+def _app_catalogo(cache, catalogo):
+    def animais(request):
+        return JSONResponse(catalogo)
+
+    app = Starlette(routes=[Route("/animais", animais)])
+    app.add_middleware(CacheRespostasMiddleware, cache=cache)
+    return app
+
+
+def test_memoria_valida_etag_pelo_conteudo():
+    # TTL zero: toda revalidação volta à rota, como num worker cuja entrada expirou
+    catalogo = {"nome": "Rex"}
+    cliente = TestClient(_app_catalogo(CacheMemoria(0, 100, 1024 * 1024), catalogo))
+    etag = cliente.get("/animais").headers["etag"]
+    assert cliente.get("/animais", headers={"if-none-match": etag}).status_code == 304
+
+    # escrita feita em outro worker: a geração deste não mudou, o conteúdo sim
+    catalogo["nome"] = "Thor"
+    resposta = cliente.get("/animais", headers={"if-none-match": etag})
+    assert resposta.status_code == 200
+    assert resposta.json() == {"nome": "Thor"}
+    assert resposta.headers["etag"] != etag
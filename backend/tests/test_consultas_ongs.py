@@ -0,0 +1,72 @@
+"""Idas ao banco por rota de ONGs: uma regressão (consulta a mais) falha aqui."""
+import uuid
+
+import pytest
+
+# consultas por rota, já com a autenticação (versão do token em cache)
+ESPERADO = {
+    "criar_ong": 2,
+    "atualizar_ong": 2,
+    "convidar_administrador": 3,
+    "listar_administradores": 3,
+    "remover_administrador": 3,
+    # permissão, animais ativos, associações, revogação dos outros administradores,
+    # animais removidos, estatísticas e a ONG
+    "excluir_ong": 7,
+}
+
+
+@pytest.fixture(scope="module")
+def medidas(cliente, headers):
+    from sqlalchemy import event
+
+    from app.database import engine_ativo
+
+    consultas = []
+
+    def contar(*args):
+        consultas.append(1)
+
+    convidado = cliente.post("/usuarios/", json=dict(
+        nome="Convidado", email=f"convidado-{uuid.uuid4().hex[:8]}@teste", telefone="1", endereco_cep="01001-000",
+        endereco_completo="Rua", moradia="casa", telas_em_casa=True, criancas_em_casa=False, area_aberta=True,
+        possui_animais=False, tipo_animais="", qtde_animais=0, is_admin=False, senha="senha-de-teste",
+    )).json()
+    # aquece o cache de versões do token
+    cliente.get("/usuarios/me", headers=headers)
+
+    resultados = {}
+
+    def medir(nome, requisicao):
+        antes = len(consultas)
+        resposta = requisicao()
+        assert resposta.status_code < 400, resposta.text
+        resultados[nome] = len(consultas) - antes
+        return resposta
+
+    event.listen(engine_ativo(), "before_cursor_execute", contar)
+    try:
+        ong = medir("criar_ong", lambda: cliente.post(
+            "/ongs", json=dict(nome="ONG", email="o@teste", telefone="1", endereco="Rua 01001-000"), headers=headers
+        )).json()
+        base = f"/ongs/{ong['id']}"
+        medir("atualizar_ong", lambda: cliente.put(base, json={"site": "https://teste"}, headers=headers))
+        medir("convidar_administrador", lambda: cliente.post(
+            f"{base}/convidar", json={"usuario_id": convidado["id"]}, headers=headers
+        ))
+        medir("listar_administradores", lambda: cliente.get(f"{base}/administradores", headers=headers))
+        medir("remover_administrador", lambda: cliente.delete(
+            f"{base}/administradores/{convidado['id']}", headers=headers
+        ))
+        # com outro administrador a exclusão também revoga o token dele
+        cliente.post(f"{base}/convidar", json={"usuario_id": convidado["id"]}, headers=headers)
+        medir("excluir_ong", lambda: cliente.delete(base, headers=headers))
+    finally:
+        event.remove(engine_ativo(), "before_cursor_execute", contar)
+    return resultados
+
+
+@pytest.mark.parametrize("rota", sorted(ESPERADO))
+def test_consultas_por_rota(medidas, rota):
+    # igualdade: uma consulta a menos também pede atualizar ESPERADO
+    assert medidas[rota] == ESPERADO[rota], f"{rota}: {medidas[rota]} consultas, esperado {ESPERADO[rota]}"
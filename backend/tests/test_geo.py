@@ -0,0 +1,25 @@
+from sqlalchemy import insert
+
+from app.database import obter_engine
+from app.models import Animal
+
+
+def test_perto_de_encontra_animais_da_ong_proxima(cliente, headers):
+    ong = cliente.post(
+        "/ongs", json=dict(nome="Centro", email="c@x", telefone="1", endereco="Praça da Sé, CEP 01001-000"), headers=headers
+    ).json()
+    with obter_engine().begin() as conexao:
+        animal_id = conexao.execute(insert(Animal).values(
+            nome="Vizinho", idade=2, especie="cao", raca="SRD", porte="medio", cor="caramelo", vacinado=True,
+            castrado=True, vermifugado=True, sexo="M", descricao="", disponivel=True, ong_id=ong["id"],
+        )).inserted_primary_key[0]
+
+    def proximos(cep: str, raio_km: float):
+        resposta = cliente.get("/animais", params={
+            "perto_de": cep, "raio_km": raio_km, "ordenar_por": "id", "ordem": "desc", "limit": 50, "fields": "id",
+        })
+        return [item["id"] for item in resposta.json()["itens"]]
+
+    assert animal_id in proximos("01310-100", 5)
+    # Campinas fica a ~80 km
+    assert animal_id not in proximos("13083-970", 20)
@@ -0,0 +1,35 @@
+import os
+import runpy
+
+import pytest
+
+CONFIGURACAO = os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py")
+BACKENDS = ("CACHE_BACKEND", "EVENTOS_BACKEND", "LIMITES_BACKEND")
+
+
+@pytest.fixture
+def ambiente(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    # o arquivo preenche o ambiente com setdefault: o monkeypatch desfaz depois do teste
+    for variavel in (*BACKENDS, "HASH_WORKERS", "IMAGEM_WORKERS"):
+        monkeypatch.delenv(variavel, raising=False)
+    return monkeypatch
+
+
+@pytest.mark.parametrize("variavel", BACKENDS)
+def test_varios_workers_recusam_backend_em_memoria(ambiente, variavel):
+    ambiente.setenv("LIMITES_BACKEND", "redis")
+    ambiente.setenv(variavel, "memoria")
+    with pytest.raises(RuntimeError, match=variavel):
+        runpy.run_path(CONFIGURACAO)
+
+
+def test_limites_precisam_ser_informados(ambiente):
+    with pytest.raises(RuntimeError, match="LIMITES_BACKEND"):
+        runpy.run_path(CONFIGURACAO)
+
+
+def test_cache_e_eventos_desligados_por_padrao(ambiente):
+    ambiente.setenv("LIMITES_BACKEND", "redis")
+    runpy.run_path(CONFIGURACAO)
+    assert (os.environ["CACHE_BACKEND"], os.environ["EVENTOS_BACKEND"]) == ("desligado", "desligado")
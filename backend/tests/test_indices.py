@@ -0,0 +1,59 @@
+"""As consultas quentes usam os índices das migrações (EXPLAIN sobre o SQL real das rotas)."""
+import pytest
+
+from app.config import DATABASE_ASYNC
+from app.database import DIALETO, obter_engine
+from benchmarks.semear import SENHA, email_usuario
+
+# o SQL capturado no modo assíncrono usa o paramstyle do asyncpg/aiosqlite
+pytestmark = pytest.mark.skipif(DATABASE_ASYNC, reason="EXPLAIN reaproveita o SQL do engine síncrono")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def analisado(banco):
+    # o planejador escolhe entre índices parciais pelas estatísticas, como em produção
+    with obter_engine().begin() as conexao:
+        conexao.exec_driver_sql("ANALYZE")
+
+
+def plano(instrucao: str, parametros) -> str:
+    with obter_engine().connect() as conexao:
+        if DIALETO == "postgresql":
+            # tabelas pequenas: sem isso o planejador prefere varrer a tabela
+            conexao.exec_driver_sql("SET enable_seqscan = off")
+            linhas = conexao.exec_driver_sql("EXPLAIN " + instrucao, parametros).all()
+        else:
+            linhas = conexao.exec_driver_sql("EXPLAIN QUERY PLAN " + instrucao, parametros).all()
+    return "\n".join(str(linha[-1]) for linha in linhas)
+
+
+def test_listagem_com_filtros_de_convivencia(cliente, consultas):
+    cliente.get("/animais", params={"disponivel": True, "sociavel_com_gatos": True, "sociavel_com_caes": False})
+    assert "ix_animal_disponivel_sociavel" in plano(*consultas.com("from animal", "sociavel_com_gatos =", "order by"))
+
+
+def test_listagem_de_disponiveis(cliente, consultas):
+    cliente.get("/animais", params={"disponivel": True})
+    resultado = plano(*consultas.com("from animal", "disponivel =", "order by"))
+    if DIALETO == "postgresql":
+        assert "ix_animal_disponiveis" in resultado
+    else:
+        # no SQLite a tabela já fica na ordem do id (rowid): basta não ordenar em memória
+        assert "TEMP B-TREE" not in resultado
+
+
+def test_busca_por_especie_e_porte(cliente, consultas):
+    cliente.get("/animais/busca", params={"especie": "cao", "porte": "pequeno"})
+    assert "ix_animal_disponivel_especie" in plano(*consultas.com("from animal", "especie =", "porte ="))
+
+
+def test_login_por_email(cliente, consultas):
+    cliente.post("/login", data={"username": email_usuario(1), "password": SENHA})
+    assert "ix_usuario_email" in plano(*consultas.com("from usuario", "email ="))
+
+
+def test_administradores_da_ong(cliente, consultas, headers):
+    ong_id = cliente.get("/ongs", params={"limit": 1}).json()["itens"][0]["id"]
+    cliente.get(f"/ongs/{ong_id}/administradores", headers=headers)
+    assert "ix_usuarioongassociacao_ong_id" in plano(*consultas.com("from usuario join usuarioongassociacao"))
+
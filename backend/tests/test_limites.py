@@ -0,0 +1,43 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.limites import MAX_CORPO_CONTA, BaldesMemoria, Limite, LimiteTaxaMiddleware, Regra
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    async def login(request):
+        return JSONResponse({"username": (await request.form()).get("username")})
+
+    monkeypatch.setattr("app.limites.REGRAS", [
+        Regra("login", "POST", re.compile(r"^/login$"), None, Limite(2, 60), "username"),
+    ])
+    app = Starlette(routes=[Route("/login", login, methods=["POST"])])
+    app.add_middleware(LimiteTaxaMiddleware, baldes_limite=BaldesMemoria(1000))
+    return TestClient(app)
+
+
+def test_multipart_conta_no_mesmo_balde_do_formulario(cliente):
+    assert cliente.post("/login", data={"username": "ana@x.com", "password": "s"}).status_code == 200
+    resposta = cliente.post("/login", files={"username": (None, "ana@x.com"), "password": (None, "s")})
+    assert resposta.status_code == 200
+    assert resposta.json() == {"username": "ana@x.com"}
+    # o terceiro, em qualquer formato, já excede o limite da conta
+    assert cliente.post("/login", files={"username": (None, "ana@x.com"), "password": (None, "s")}).status_code == 429
+
+
+@pytest.mark.parametrize("requisicao, status", [
+    (dict(data={"username": "ana@x.com", "password": "s", **{f"campo{i}": "x" for i in range(30)}}), 400),
+    (dict(data={"username": "ana@x.com", "password": "x" * (MAX_CORPO_CONTA + 1)}), 413),
+    (dict(data={"password": "s"}), 400),
+    (dict(json={"username": "ana@x.com", "password": "s"}), 400),
+    (dict(files={"username": ("a.txt", b"ana@x.com"), "password": (None, "s")}), 400),
+    (dict(content=b"username=ana", headers={"content-type": "multipart/form-data"}), 400),
+])
+def test_login_sem_conta_identificavel_e_recusado(cliente, requisicao, status):
+    assert cliente.post("/login", **requisicao).status_code == status
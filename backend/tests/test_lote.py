@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import LOTE_MAX_REGISTRO_BYTES
+from app.lote import _registros_csv
+
+
+def _ler(*textos):
+    async def fluxo():
+        for texto in textos:
+            yield texto
+
+    async def coletar():
+        return [registro async for registro in _registros_csv(fluxo())]
+
+    return asyncio.run(coletar())
+
+
+def test_campo_entre_aspas_com_quebra_de_linha():
+    registros = _ler('nome,descricao\nRex,"linha1\n', 'linha2 ""citada"""\nMia,\n')
+    assert registros == [
+        (2, {"nome": "Rex", "descricao": 'linha1\nlinha2 "citada"'}),
+        (3, {"nome": "Mia", "descricao": None}),
+    ]
+
+
+def test_aspas_sem_fechamento_param_no_limite_do_registro():
+    linhas = ("x" * 100 + "\n" for _ in range(10 * LOTE_MAX_REGISTRO_BYTES // 100))
+    with pytest.raises(HTTPException) as erro:
+        _ler('nome,descricao\nRex,"sem fechar\n', *linhas)
+    assert erro.value.status_code == 400
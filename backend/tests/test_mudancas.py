@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.database import DIALETO, obter_engine
+from app.models import AnimalMudanca
+from app.paginacao import codificar_cursor
+
+
+def _gravar(conexao, animal_id: int) -> int:
+    return conexao.execute(
+        insert(AnimalMudanca).values(animal_id=animal_id, operacao="atualizado").returning(AnimalMudanca.id)
+    ).scalar_one()
+
+
+def _mudancas(cliente, cursor: str) -> dict:
+    resposta = cliente.get("/animais/mudancas", params={"desde": cursor})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+@pytest.mark.skipif(DIALETO != "postgresql", reason="no SQLite as escritas são serializadas")
+def test_transacoes_intercaladas_nao_pulam_mudancas(cliente):
+    engine = obter_engine()
+    with engine.connect() as conexao:
+        cursor = codificar_cursor({"id": conexao.execute(select(func.max(AnimalMudanca.id))).scalar_one()})
+
+    with engine.connect() as primeira:
+        transacao = primeira.begin()
+        # a primeira transação pega o id menor e fica aberta enquanto a segunda confirma
+        id_primeira = _gravar(primeira, 1)
+        with engine.begin() as segunda:
+            id_segunda = _gravar(segunda, 2)
+        assert id_segunda > id_primeira
+
+        # com a primeira aberta a segunda fica retida: entregá-la moveria o cursor além de id_primeira
+        pagina = _mudancas(cliente, cursor)
+        assert pagina["itens"] == []
+        assert pagina["proximo_cursor"] == cursor
+        transacao.commit()
+
+    pagina = _mudancas(cliente, pagina["proximo_cursor"])
+    assert [item["mudanca"] for item in pagina["itens"]] == [id_primeira, id_segunda]
+
+    # e o cursor seguinte não repete nenhuma das duas
+    assert _mudancas(cliente, pagina["proximo_cursor"])["itens"] == []
+
+
+def test_cursor_avanca_sem_repetir(cliente, headers):
+    inicio = _mudancas(cliente, codificar_cursor({"id": 0}))
+    cursor = inicio["proximo_cursor"]
+    while inicio["mais"]:
+        inicio = _mudancas(cliente, cursor)
+        cursor = inicio["proximo_cursor"]
+
+    for animal_id in (3, 4):
+        resposta = cliente.put(f"/animais/{animal_id}", json={"descricao": "atualizado"}, headers=headers)
+        assert resposta.status_code == 200, resposta.text
+
+    pagina = _mudancas(cliente, cursor)
+    assert [item["animal_id"] for item in pagina["itens"]] == [3, 4]
+    assert _mudancas(cliente, pagina["proximo_cursor"])["itens"] == []
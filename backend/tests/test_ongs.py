@@ -0,0 +1,12 @@
+def test_excluir_ong_com_animais_ativos_e_recusado(cliente, headers):
+    ong = cliente.post("/ongs", json=dict(nome="Lar", email="l@x", telefone="1", endereco="Rua"), headers=headers).json()
+    animal = cliente.post("/animais", json=dict(nome="Pingo", especie="cao", ong_id=ong["id"]), headers=headers).json()
+
+    assert cliente.delete(f"/ongs/{ong['id']}", headers=headers).status_code == 409
+    # nada foi desfeito: o animal continua na ONG e ela continua administrada
+    assert cliente.get(f"/animais/{animal['id']}").json()["ong_id"] == ong["id"]
+    assert cliente.get(f"/ongs/{ong['id']}/administradores", headers=headers).status_code == 200
+
+    # animais removidos não impedem a exclusão
+    assert cliente.delete(f"/animais/{animal['id']}", headers=headers).status_code == 204
+    assert cliente.delete(f"/ongs/{ong['id']}", headers=headers).status_code == 204
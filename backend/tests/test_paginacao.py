@@ -0,0 +1,30 @@
+import pytest
+
+from app.paginacao import codificar_cursor
+
+
+@pytest.mark.parametrize("valores", [
+    {"o": "id", "d": "asc", "id": "1"},
+    {"o": "id", "d": "asc", "id": [1]},
+    {"o": "id", "d": "asc", "id": True},
+    {"o": "nome", "d": "asc", "v": [1], "id": 1},
+    {"o": "nome", "d": "asc", "v": {"a": 1}, "id": 1},
+    {"o": "nome", "d": "asc", "v": 3, "id": 1},
+    {"o": "nome", "d": "asc", "v": None, "id": 1},
+    {"o": "nome", "d": "asc", "id": 1},
+])
+def test_cursor_com_tipos_errados_e_recusado(cliente, valores):
+    ordenar_por = valores["o"]
+    resposta = cliente.get("/ongs", params={"cursor": codificar_cursor(valores), "ordenar_por": ordenar_por})
+    assert resposta.status_code == 400
+
+
+def test_cursor_valido_continua_a_listagem(cliente):
+    cursor = codificar_cursor({"o": "nome", "d": "asc", "v": "A", "id": 1})
+    assert cliente.get("/ongs", params={"cursor": cursor, "ordenar_por": "nome"}).status_code == 200
+
+
+def test_desde_com_id_invalido_e_recusado(cliente):
+    for id_ in ("1", [1], None):
+        resposta = cliente.get("/animais/mudancas", params={"desde": codificar_cursor({"id": id_})})
+        assert resposta.status_code == 400
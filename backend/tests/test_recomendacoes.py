@@ -0,0 +1,32 @@
+import asyncio
+
+from sqlalchemy import insert
+
+from app.database import abrir_sessao, obter_engine
+from app.models import Animal
+from app.recomendacoes import MatrizRecomendacao
+
+
+def test_reconstrucao_expirada_roda_em_segundo_plano(banco):
+    async def cenario():
+        matriz = MatrizRecomendacao(reconstruir_a_cada=3600)
+        async with abrir_sessao() as session:
+            await matriz.atualizar(session)
+        anteriores = matriz.ids
+
+        with obter_engine().begin() as conexao:
+            novo_id = conexao.execute(insert(Animal).values(
+                nome="Recém-chegado", idade=1, especie="gato", raca="SRD", porte="pequeno", cor="preto",
+                vacinado=True, castrado=True, vermifugado=True, sexo="F", descricao="", disponivel=True,
+            )).inserted_primary_key[0]
+        matriz._construida_em -= 7200
+
+        async with abrir_sessao() as session:
+            await matriz.atualizar(session)
+            # a recomendação não espera a reconstrução: usa a matriz anterior
+            assert matriz.ids is anteriores
+            assert matriz._reconstrucao is not None
+        await matriz._reconstrucao
+        assert novo_id in set(matriz.ids.tolist())
+
+    asyncio.run(cenario())
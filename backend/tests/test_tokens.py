@@ -0,0 +1,31 @@
+from benchmarks.semear import SENHA, email_usuario
+
+
+def _token(cliente, indice: int) -> dict:
+    resposta = cliente.post("/login", data={"username": email_usuario(indice), "password": SENHA})
+    return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+
+def test_excluir_ong_revoga_os_outros_administradores(cliente, headers):
+    ong = cliente.post("/ongs", json=dict(nome="Temporária", email="t@x", telefone="1", endereco="Rua"), headers=headers).json()
+    convidado = cliente.get("/usuarios/me", headers=_token(cliente, 2)).json()
+    cliente.post(f"/ongs/{ong['id']}/convidar", json={"usuario_id": convidado["id"]}, headers=headers)
+    headers_convidado = _token(cliente, 2)
+    assert cliente.get("/usuarios/me", headers=headers_convidado).status_code == 200
+
+    assert cliente.delete(f"/ongs/{ong['id']}", headers=headers).status_code == 204
+    assert cliente.get("/usuarios/me", headers=headers_convidado).status_code == 401
+    # quem excluiu continua autenticado
+    assert cliente.get("/usuarios/me", headers=headers).status_code == 200
+
+
+def test_remover_administrador_revoga_o_token(cliente, headers):
+    ong = cliente.post("/ongs", json=dict(nome="Outra", email="o@x", telefone="1", endereco="Rua"), headers=headers).json()
+    convidado = cliente.get("/usuarios/me", headers=_token(cliente, 3)).json()
+    cliente.post(f"/ongs/{ong['id']}/convidar", json={"usuario_id": convidado["id"]}, headers=headers)
+    headers_convidado = _token(cliente, 3)
+    assert cliente.get("/usuarios/me", headers=headers_convidado).status_code == 200
+
+    cliente.delete(f"/ongs/{ong['id']}/administradores/{convidado['id']}", headers=headers)
+    assert cliente.get("/usuarios/me", headers=headers_convidado).status_code == 401
+    cliente.delete(f"/ongs/{ong['id']}", headers=headers)
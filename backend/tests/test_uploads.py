@@ -0,0 +1,38 @@
+import io
+
+from PIL import Image
+
+from app.uploads import tipo_pelo_conteudo
+
+
+def _png() -> bytes:
+    saida = io.BytesIO()
+    Image.new("RGB", (4, 4), (10, 200, 10)).save(saida, "PNG")
+    return saida.getvalue()
+
+
+def test_tipo_pelo_conteudo():
+    assert tipo_pelo_conteudo(_png()[:12]) == "image/png"
+    assert tipo_pelo_conteudo(b"\xff\xd8\xff\xe0") == "image/jpeg"
+    assert tipo_pelo_conteudo(b"RIFF\x00\x00\x00\x00WEBP") == "image/webp"
+    assert tipo_pelo_conteudo(b"GIF89a") == "image/gif"
+    assert tipo_pelo_conteudo(b'<svg xmlns="http://www.w3.org/2000/svg">') is None
+
+
+def test_foto_guarda_o_tipo_do_conteudo(cliente, headers):
+    ong_id = cliente.get("/ongs", params={"limit": 1}).json()["itens"][0]["id"]
+    animal = cliente.post("/animais", json=dict(nome="Bolinha", especie="gato", ong_id=ong_id), headers=headers).json()
+    url = f"/animais/{animal['id']}/foto"
+
+    script = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+    assert cliente.put(url, content=script, headers={**headers, "Content-Type": "image/png"}).status_code == 415
+    assert cliente.put(url, files={"arquivo": ("a.png", script, "image/png")}, headers=headers).status_code == 415
+
+    # declarado como JPEG, gravado como o PNG que é
+    resposta = cliente.put(url, content=_png(), headers={**headers, "Content-Type": "image/jpeg"})
+    assert resposta.status_code == 200
+    foto_url = resposta.json()["foto_url"]
+    assert foto_url.endswith(".png")
+    midia = cliente.get(foto_url)
+    assert midia.headers["content-type"] == "image/png"
+    assert midia.headers["x-content-type-options"] == "nosniff"
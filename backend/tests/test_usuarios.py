@@ -0,0 +1,33 @@
+import uuid
+
+from sqlalchemy import insert
+
+from app.database import obter_engine
+from app.models import Usuario
+from app.routes import usuarios
+
+
+def _cadastro(email: str) -> dict:
+    return dict(
+        nome="Novo", email=email, telefone="1", endereco_cep="01001-000", endereco_completo="Rua",
+        moradia="casa", telas_em_casa=True, criancas_em_casa=False, area_aberta=True,
+        possui_animais=False, tipo_animais="", qtde_animais=0, is_admin=False, senha="senha-de-teste",
+    )
+
+
+def test_cadastro_concorrente_com_mesmo_email_e_recusado(cliente, monkeypatch):
+    email = f"corrida-{uuid.uuid4().hex[:8]}@teste"
+    localizar = usuarios.localizar
+
+    def cadastro_concorrente(cep):
+        # o outro cadastro confirma depois da checagem do email e antes do commit deste
+        campos = _cadastro(email)
+        campos.update(senha="x", lat=None, lon=None)
+        with obter_engine().begin() as conexao:
+            conexao.execute(insert(Usuario).values(**campos))
+        return localizar(cep)
+
+    monkeypatch.setattr(usuarios, "localizar", cadastro_concorrente)
+    resposta = cliente.post("/usuarios/", json=_cadastro(email))
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == "Email já cadastrado"